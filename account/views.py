@@ -16,7 +16,8 @@ from django.contrib.auth.decorators import login_required
 import re
 from .tokens import account_activation_token
 
-from app.models import Follow, Post, Bookmark, Comment, PostReaction, Bookmark
+from app.models import Follow, Post, Bookmark
+from app.pagination import CursorPaginator
 from app.views import get_paginated_object_list
 
 from imgur_python import Imgur
@@ -197,8 +198,8 @@ def _get_follower_followed(request, request_user, num_each_page=12):
     page_followed = request.GET.get('page_followed')
     
     # Get following, followed of request user
-    following = Follow.objects.filter(follower=request_user)
-    followed = Follow.objects.filter(followed=request_user)
+    following = Follow.objects.filter(follower=request_user).select_related('followed')
+    followed = Follow.objects.filter(followed=request_user).select_related('follower')
 
     following_paginator = Paginator(following, num_each_page)
     followed_paginator = Paginator(followed, num_each_page)
@@ -210,19 +211,20 @@ def _get_follower_followed(request, request_user, num_each_page=12):
     if current_user.is_authenticated:
         current_user_following = Follow.objects.filter(follower=current_user, followed=request_user).first()
     
+    # Users of both pages that the current user follows, in one query
+    if current_user.is_authenticated:
+        listed_users = [item.followed_id for item in following] + [item.follower_id for item in followed]
+        current_user_followings = set(Follow.objects.filter(follower=current_user, followed__in=listed_users)
+                                      .values_list('followed_id', flat=True))
+
     # count follower, post of following, followed
-    for var in [following, followed]:
-        for index, item in enumerate(var):
-            if var == following:
-                var[index].num_follower = Follow.objects.filter(followed=item.followed).count()
-                var[index].num_post = Post.objects.filter(user=item.followed).count()
-                if current_user.is_authenticated:
-                    var[index].is_following = Follow.objects.filter(follower=current_user, followed=item.followed).first()
-            else:
-                var[index].num_follower = Follow.objects.filter(followed=item.follower).count()
-                var[index].num_post = Post.objects.filter(user=item.follower).count()
-                if current_user.is_authenticated:
-                    var[index].is_following = Follow.objects.filter(follower=current_user, followed=item.follower).first()
+    for var, field in [(following, 'followed'), (followed, 'follower')]:
+        for item in var:
+            user = getattr(item, field)
+            item.num_follower = user.follower_count
+            item.num_post = user.post_count
+            if current_user.is_authenticated:
+                item.is_following = user.pk in current_user_followings
 
     context = {
         'following': following,
@@ -234,68 +236,30 @@ def _get_follower_followed(request, request_user, num_each_page=12):
     return context
 
 def _get_post(request, request_user, num_each_page=10):
-    # Get page number
+    # Get page cursor
     page_number = request.GET.get('page_post')
 
     # Get posts of request user
     if request_user == request.user:
-        posts = Post.objects.filter(user=request_user, status__in=[0, 1, 3])
+        posts = Post.objects.with_engagement().filter(user=request_user, status__in=[0, 1, 3])
     else:
-        posts = Post.objects.filter(user=request_user, status=1)
-
-    posts = posts.order_by('-created_at')
-
-    posts = Paginator(posts, num_each_page)
-
-    posts = get_paginated_object_list(posts, page_number)
-
-    for index, post in enumerate(posts):
-        # View count
-        posts[index].view_count = int(post.view_count)
+        posts = Post.objects.with_engagement().filter(user=request_user, status=1)
 
-        # Bookmark count
-        posts[index].bookmark_count = Bookmark.objects.filter(post=post).count()
-
-        # Comment count
-        posts[index].comment_count = Comment.objects.filter(post=post).count()
-
-        # Calculate reaction point with feedback_value
-        posts[index].reaction_point = 0
-        reactions = PostReaction.objects.filter(post=post)
-        for reaction in reactions:
-            posts[index].reaction_point += reaction.feedback_value
+    posts = CursorPaginator(posts, num_each_page).page(page_number)
 
     return posts
 
 def _get_bookmark_posts(request, request_user, num_each_page=10):
-    # Get page number
+    # Get page cursor
     page_number = request.GET.get('page_bookmark')
 
     # Get bookmark posts of request user
     bookmark_posts = Bookmark.objects.filter(user=request_user)
 
     # Order by created_at in model Post
-    bookmark_posts = Post.objects.filter(id__in=bookmark_posts.values('post_id')).order_by('-created_at')
-
-    bookmark_posts = Paginator(bookmark_posts, num_each_page)
-
-    bookmark_posts = get_paginated_object_list(bookmark_posts, page_number)
-
-    for index, bookmark_post in enumerate(bookmark_posts):
-        # View count
-        bookmark_posts[index].view_count = int(bookmark_post.view_count)
-
-        # Bookmark count
-        bookmark_posts[index].bookmark_count = Bookmark.objects.filter(post=bookmark_post).count()
-
-        # Comment count
-        bookmark_posts[index].comment_count = Comment.objects.filter(post=bookmark_post).count()
+    bookmark_posts = Post.objects.with_engagement().filter(id__in=bookmark_posts.values('post_id'))
 
-        # Calculate reaction point with feedback_value
-        bookmark_posts[index].reaction_point = 0
-        reactions = PostReaction.objects.filter(post=bookmark_post)
-        for reaction in reactions:
-            bookmark_posts[index].reaction_point += reaction.feedback_value
+    bookmark_posts = CursorPaginator(bookmark_posts, num_each_page).page(page_number)
 
     return bookmark_posts
 
@@ -382,15 +346,8 @@ def voted_up(request, username):
         messages.error(request, _('Không tìm thấy tài khoản này!'))
         return redirect('home')
     else:
-        upvoted_posts = PostReaction.objects.filter(user=request_user, feedback_value=1).order_by('-time')
-        upvoted_posts = [ upvoted_post.post for upvoted_post in upvoted_posts ]
-        for post in upvoted_posts:
-            reactions = PostReaction.objects.filter(post=post)
-            post.feedback_value = sum([reaction.feedback_value for reaction in reactions])
-            # count bookmark
-            post.bookmark_count = Bookmark.objects.filter(post=post).count()
-            # count comment
-            post.comment_count = Comment.objects.filter(post=post).count()
+        upvoted_posts = Post.objects.with_engagement().filter(
+            postreaction__user=request_user, postreaction__feedback_value=1).order_by('-postreaction__time')
 
     paginator = Paginator(upvoted_posts, 2)
     page = request.GET.get('page')
@@ -5,3 +5,7 @@ class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
     verbose_name = 'Quản lý'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import checks  # noqa: F401
@@ -0,0 +1,269 @@
+import bisect
+import heapq
+import logging
+import threading
+import time
+
+from django.db import connections
+from django.db.models import Count
+
+from .models import Category, CustomUser, HashTag
+from .search.text import fold
+
+# Kinds of suggestions, each answered from its own in-process index
+KINDS = ('hashtag', 'author', 'category')
+
+# Seconds after which the indexes are rebuilt in the background, so changes made by other processes show up
+REFRESH_INTERVAL = 300
+
+# Number of suggestions kept for each common prefix, the largest limit of the API
+TOP_SIZE = 20
+
+# Number of names under which the suggestions of a prefix are found by scanning its names instead of being kept
+SCAN_LIMIT = 256
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """
+    Sorted array of accent folded names: a prefix is a contiguous range found by binary search.
+    The heaviest names of every prefix with more than scan_limit names are computed once when the index
+    is built and kept up to date on changes, the ranges of the other prefixes are small enough to be scanned.
+    """
+
+    def __init__(self, items=(), size=TOP_SIZE, scan_limit=SCAN_LIMIT):
+        """
+        Build the index from (item_id, name, weight) tuples
+        """
+        self._size = size
+        self._scan_limit = scan_limit
+        self._entries = {item_id: (fold(name), name, weight) for item_id, name, weight in items}
+        self._keys = sorted((key, item_id) for item_id, (key, name, weight) in self._entries.items())
+        self._top = {}
+        self._build('', 0, len(self._keys))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set(self, item_id, name, weight=None):
+        """
+        Add an item or rename it, keeping its weight when none is given
+        """
+        with self._lock:
+            old = self._entries.get(item_id)
+            if weight is None:
+                weight = old[2] if old else 0
+            key = fold(name)
+            if old is not None and old[0] != key:
+                self._remove(item_id)
+                old = None
+            if old is None:
+                bisect.insort(self._keys, (key, item_id))
+            self._entries[item_id] = (key, name, weight)
+            if old is not None and weight < old[2]:
+                self._demote(item_id, key)
+            else:
+                self._promote(item_id, key)
+
+    def add_weight(self, item_id, delta):
+        with self._lock:
+            entry = self._entries.get(item_id)
+            if entry is not None:
+                self._entries[item_id] = (entry[0], entry[1], entry[2] + delta)
+                if delta > 0:
+                    self._promote(item_id, entry[0])
+                elif delta < 0:
+                    self._demote(item_id, entry[0])
+
+    def remove(self, item_id):
+        with self._lock:
+            if item_id in self._entries:
+                self._remove(item_id)
+
+    def complete(self, prefix, limit=10):
+        """
+        Return the (name, weight) of the heaviest names starting with the prefix, ties broken by name
+        """
+        prefix = fold(prefix)
+        with self._lock:
+            best = self._top.get(prefix) if limit <= self._size else None
+            if best is None:
+                best = self._scan(*self._range(prefix), limit)
+            return [self._entries[item_id][1:] for item_id in best[:limit]]
+
+    def _rank(self, item_id):
+        key, name, weight = self._entries[item_id]
+        return -weight, key, item_id
+
+    def _best(self, item_ids, limit=None):
+        return heapq.nsmallest(limit or self._size, item_ids, key=self._rank)
+
+    def _scan(self, lo, hi, limit=None):
+        return self._best((item_id for key, item_id in self._keys[lo:hi]), limit)
+
+    def _range(self, prefix):
+        return (bisect.bisect_left(self._keys, (prefix,)),
+                bisect.bisect_left(self._keys, (prefix + '\U0010ffff',)))
+
+    def _children(self, prefix, lo, hi):
+        """
+        Split the range of a prefix into the names equal to it (child None) and one range per next character
+        """
+        end = bisect.bisect_left(self._keys, (prefix + '\0',), lo, hi)
+        if end > lo:
+            yield None, lo, end
+        while end < hi:
+            child = self._keys[end][0][:len(prefix) + 1]
+            start, end = end, bisect.bisect_left(self._keys, (child + '\U0010ffff',), end, hi)
+            yield child, start, end
+
+    def _build(self, prefix, lo, hi):
+        # Each name is ranked once in the range it ends in, a prefix merges the kept names of its children
+        if hi - lo <= self._scan_limit:
+            return self._scan(lo, hi)
+        candidates = []
+        for child, start, end in self._children(prefix, lo, hi):
+            candidates.extend(self._scan(start, end) if child is None else self._build(child, start, end))
+        top = self._top[prefix] = self._best(candidates)
+        return top
+
+    def _promote(self, item_id, key):
+        # The kept prefixes of a name are its shortest ones, a heavier name can only enter their lists
+        for length in range(len(key) + 1):
+            top = self._top.get(key[:length])
+            if top is None:
+                break
+            if item_id not in top:
+                top.append(item_id)
+            top.sort(key=self._rank)
+            del top[self._size:]
+
+    def _demote(self, item_id, key):
+        # A lighter or removed name leaves room for a name of the range, recomputed from the children deepest first
+        for length in range(len(key), -1, -1):
+            prefix = key[:length]
+            if item_id in self._top.get(prefix, ()):
+                candidates = []
+                for child, start, end in self._children(prefix, *self._range(prefix)):
+                    top = self._top.get(child) if child is not None else None
+                    candidates.extend(top if top is not None else self._scan(start, end))
+                self._top[prefix] = self._best(candidates)
+
+    def _remove(self, item_id):
+        key = self._entries.pop(item_id)[0]
+        self._keys.pop(bisect.bisect_left(self._keys, (key, item_id)))
+        self._demote(item_id, key)
+
+
+_indexes = {}
+_loaded_at = None
+_load_lock = threading.Lock()
+
+# Changes applied while new indexes are built in the background, replayed on them before they are swapped in
+_changes = None
+_changes_lock = threading.Lock()
+
+
+def _load():
+    return {
+        'hashtag': PrefixIndex(HashTag.objects.annotate(posts=Count('post')).values_list('pk', 'name', 'posts')),
+        'category': PrefixIndex(Category.objects.annotate(posts=Count('post')).values_list('pk', 'name', 'posts')),
+        'author': PrefixIndex(CustomUser.objects.filter(is_active=True).values_list('pk', 'username', 'post_count')),
+    }
+
+
+def get_indexes():
+    """
+    Return the suggestion indexes, loaded from the database on first use.
+    Every REFRESH_INTERVAL seconds new indexes are built by a background thread, requests keep using
+    the current ones until they are swapped.
+    """
+    global _indexes, _loaded_at
+    if _loaded_at is None:
+        with _load_lock:
+            if _loaded_at is None:
+                _indexes = _load()
+                _loaded_at = time.monotonic()
+    elif time.monotonic() - _loaded_at > REFRESH_INTERVAL:
+        _start_refresh()
+    return _indexes
+
+
+def _start_refresh():
+    global _changes
+    with _changes_lock:
+        if _changes is not None:
+            return
+        changes = _changes = []
+    threading.Thread(target=_refresh, args=(changes,), daemon=True).start()
+
+
+def _refresh(changes):
+    global _indexes, _loaded_at, _changes
+    indexes = None
+    try:
+        indexes = _load()
+    except Exception:
+        logger.exception('Could not rebuild the suggestion indexes, the current ones are kept')
+    finally:
+        # The connections of the refresh thread are not closed by the request cycle
+        connections.close_all()
+    with _changes_lock:
+        if _changes is not changes:
+            # Reset meanwhile
+            return
+        if indexes is not None:
+            for change in changes:
+                _apply(indexes, *change)
+            _indexes = indexes
+        # A failed rebuild is retried after the interval
+        _loaded_at = time.monotonic()
+        _changes = None
+
+
+def reset():
+    """
+    Drop the indexes so the next request reloads them
+    """
+    global _indexes, _loaded_at, _changes
+    with _changes_lock:
+        _indexes, _loaded_at, _changes = {}, None, None
+
+
+def _apply(indexes, kind, item_id, name=None, delta=0, removed=False):
+    index = indexes.get(kind)
+    if index is None:
+        return
+    if removed:
+        index.remove(item_id)
+        return
+    if name is not None:
+        index.set(item_id, name)
+    if delta:
+        index.add_weight(item_id, delta)
+
+
+def _change(*change):
+    with _changes_lock:
+        _apply(_indexes, *change)
+        if _changes is not None:
+            _changes.append(change)
+
+
+def record(kind, item_id, name=None, delta=0):
+    """
+    Apply a change to the loaded index of a kind: a new or renamed item when name is given, a usage change otherwise.
+    Nothing is done before the first load, which reads the current state from the database.
+    """
+    _change(kind, item_id, name, delta)
+
+
+def forget(kind, item_id):
+    _change(kind, item_id, None, 0, True)
+
+
+def complete(prefix, kinds=KINDS, limit=10):
+    indexes = get_indexes()
+    return {kind: indexes[kind].complete(prefix, limit) for kind in kinds}
@@ -0,0 +1,292 @@
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.test import Client
+from django.test.utils import (CaptureQueriesContext, override_settings, setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+
+from .comments import COMMENT_FIELDS
+from .content import derive_content
+from .models import Category, Comment, CustomUser, HashTag, Post, PostReaction
+from .search.indexing import rebuild_index
+from .search.text import WORDLIST_PATH, fold
+
+# Words that are not Vietnamese, mixed into the generated posts like in real technical posts
+LATIN_WORDS = ('python', 'django', 'mysql', 'docker', 'linux', 'api', 'git', 'react', 'java', 'cache')
+
+# Searches replayed by the search benchmark: name, keyword source and extra GET parameters.
+# The keyword is a frequent word of the corpus, or a hashtag name for the hashtag searches.
+QUERY_MIX = (
+    ('keyword', 'word', {}),
+    ('title only', 'word', {'only_by[]': ['title']}),
+    ('hashtag', 'hashtag', {'only_by[]': ['hashtag']}),
+    ('one category', 'word', {'list_category': 1}),
+    ('two categories', 'word', {'list_category': 2}),
+    ('point bucket', 'word', {'point': '100-499'}),
+    ('date range', 'word', {'from_date': 90, 'to_date': 0}),
+    ('deep page', 'word', {'pages': 10}),
+)
+
+
+class SyntheticText:
+    """
+    Random Vietnamese-ish text: words of the bundled search wordlist and a few Latin words,
+    drawn with a Zipf distribution like the words of natural text
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.words = [line.strip() for line in WORDLIST_PATH.read_text(encoding='utf-8').splitlines()
+                      if line.strip() and not line.startswith('#')]
+        self.vocabulary = self.words + list(LATIN_WORDS)
+        rng.shuffle(self.vocabulary)
+        self.cum_weights = list(accumulate(1 / rank for rank in range(1, len(self.vocabulary) + 1)))
+
+    def text(self, count):
+        return ' '.join(self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count))
+
+    def frequent(self, count):
+        """
+        Return the most frequent words of the generated texts
+        """
+        return self.vocabulary[:count]
+
+
+def percentiles(values):
+    """
+    Return the p50, p95 and p99 of a list of measures
+    """
+    if len(values) < 2:
+        return (values[0],) * 3 if values else (0, 0, 0)
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return cuts[49], cuts[94], cuts[98]
+
+
+@contextmanager
+def benchmark_database(keepdb=False, **overrides):
+    """
+    Run a benchmark on a test database created next to the configured one like the test runner does,
+    on SQLite or on a MySQL server such as the docker-compose one, with the search index in a temporary file.
+    The settings given as overrides are changed during the benchmark.
+    """
+    old_name = connection.settings_dict['NAME']
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+                SEARCH_INDEX_PATH=Path(directory) / 'search_index.sqlite3', **overrides):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+@contextmanager
+def _explicit_dates(*models):
+    """
+    Let bulk_create keep the generated dates of the rows instead of the current time
+    """
+    fields = [field for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _next_pk(model):
+    # Primary keys are set explicitly, bulk_create does not return them on MySQL
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def seed_corpus(count, rng=None, text=None, batch_size=1000, days=365):
+    """
+    Add `count` generated posts to the database with their categories, hashtags and reactions,
+    then rebuild the search index. The rows are bulk created: no signal is sent, so the counter
+    columns and derived content fields are filled in directly.
+    Authors, categories and hashtags are created on the first call and reused by the next ones.
+    """
+    rng = rng or random.Random(0)
+    text = text or SyntheticText(rng)
+    now = timezone.now()
+
+    users = list(CustomUser.objects.filter(username__startswith='bench_').values_list('pk', flat=True))
+    if not users:
+        first = _next_pk(CustomUser)
+        CustomUser.objects.bulk_create(
+            [CustomUser(pk=first + i, username=f'bench_{i}', password='!') for i in range(2000)], batch_size=batch_size)
+        Category.objects.bulk_create([Category(name=word.capitalize()) for word in text.words[:20]])
+        HashTag.objects.bulk_create([HashTag(name=fold(word).replace(' ', '')) for word in text.vocabulary[:500]])
+        users = list(CustomUser.objects.filter(username__startswith='bench_').values_list('pk', flat=True))
+    categories = list(Category.objects.values_list('pk', flat=True))
+    hashtags = list(HashTag.objects.values_list('pk', flat=True))
+
+    next_post = _next_pk(Post)
+    next_reaction = _next_pk(PostReaction)
+    for start in range(0, count, batch_size):
+        posts, post_categories, post_hashtags, reactions = [], [], [], []
+        for pk in range(next_post + start, next_post + min(start + batch_size, count)):
+            created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+            content = f'<p>{text.text(rng.randint(80, 300))}</p>'
+            post = Post(pk=pk, user_id=rng.choice(users), title=text.text(rng.randint(4, 10)).capitalize(),
+                        content=content, status=1 if rng.random() < 0.95 else 0, created_at=created_at,
+                        updated_at=created_at, **derive_content(content))
+            # Reactions per post follow a long tail, a few posts get most of them
+            for user_id in rng.sample(users, min(int(rng.paretovariate(1.2)) - 1, len(users))):
+                value = 1 if rng.random() < 0.8 else -1
+                reactions.append(PostReaction(pk=next_reaction, user_id=user_id, post_id=pk, feedback_value=value,
+                                              time=created_at))
+                next_reaction += 1
+                post.score += value
+                post.upvotes += value == 1
+                post.downvotes += value == -1
+            posts.append(post)
+            post_categories += [Post.categories.through(post_id=pk, category_id=category_id)
+                                for category_id in rng.sample(categories, rng.randint(1, 2))]
+            post_hashtags += [Post.hashtags.through(post_id=pk, hashtag_id=hashtag_id)
+                              for hashtag_id in rng.sample(hashtags, rng.randint(0, 3))]
+
+        with transaction.atomic(), _explicit_dates(Post, PostReaction):
+            Post.objects.bulk_create(posts)
+            Post.categories.through.objects.bulk_create(post_categories)
+            Post.hashtags.through.objects.bulk_create(post_hashtags)
+            PostReaction.objects.bulk_create(reactions, batch_size=batch_size)
+
+    rebuild_index()
+    return text
+
+
+def seed_comments(post, count, rng=None, text=None, reply_rate=0.7, batch_size=1000):
+    """
+    Add `count` generated comments to a post: each one replies to a random earlier comment
+    with probability reply_rate, so threads of any depth appear. The reply counts are filled in directly.
+    """
+    rng = rng or random.Random(0)
+    text = text or SyntheticText(rng)
+    users = list(CustomUser.objects.values_list('pk', flat=True)[:2000])
+    first = _next_pk(Comment)
+    start = timezone.now() - timedelta(seconds=count)
+
+    comments = []
+    for i in range(count):
+        parent_id = first + rng.randrange(i) if i and rng.random() < reply_rate else None
+        if parent_id is not None:
+            comments[parent_id - first].reply_count += 1
+        comments.append(Comment(pk=first + i, post=post, user_id=rng.choice(users), parent_id=parent_id,
+                                content=text.text(rng.randint(5, 40)), updated_at=start + timedelta(seconds=i)))
+    with transaction.atomic(), _explicit_dates(Comment):
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+        Post.objects.filter(pk=post.pk).update(comment_count=F('comment_count') + count)
+    return comments
+
+
+def build_comment_tree(comments):
+    """
+    Nest comment dicts into threads of any depth in linear time: comments are indexed by id,
+    then each one is appended to the replies of its parent, or to the roots when its parent is not
+    one of the comments (no parent, the legacy placeholder comment -1, or a comment of another post).
+    Roots and replies keep the order of the comments given.
+    """
+    nodes = {}
+    for comment in comments:
+        comment['replies'] = []
+        nodes[comment['id']] = comment
+
+    roots = []
+    for comment in nodes.values():
+        parent = nodes.get(comment['parent_id'])
+        (roots if parent is None else parent['replies']).append(comment)
+    return roots
+
+
+def get_comment_tree(post):
+    """
+    Load the comments of a post with their authors in one query and return their threads, newest first,
+    to compare the whole thread with the comment pages in benchmark_comment_tree
+    """
+    comments = (
+        Comment.objects.filter(post=post)
+        .order_by('-updated_at', '-id')
+        .values(*COMMENT_FIELDS, username=F('user__username'), avatar_link=F('user__avatar_link'))
+    )
+    return build_comment_tree(comments)
+
+
+def _search_params(source, extra, keyword, hashtag, categories):
+    params = {'search_keyword': hashtag if source == 'hashtag' else keyword, 'choices_single_default': 'Post'}
+    for key, value in extra.items():
+        if key == 'list_category':
+            params[key] = categories[:value]
+        elif key in ('from_date', 'to_date'):
+            params[key] = (timezone.localdate() - timedelta(days=value)).strftime('%m/%d/%Y')
+        elif key != 'pages':
+            params[key] = value
+    return params
+
+
+def _get(client, params, pages):
+    """
+    Request a search page, following the pagination links to the requested page.
+    Return the response of the last page requested.
+    """
+    response = client.get('/search', params)
+    for page in range(1, pages):
+        page_list = response.context['object_list'] if response.context else None
+        if not page_list or not getattr(page_list, 'next_cursor', None):
+            break
+        response = client.get('/search', {**params, 'page': page_list.next_cursor})
+    return response
+
+
+def replay_searches(text, repeat=20, rng=None):
+    """
+    Replay QUERY_MIX through the search view and return one report row per kind of search:
+    (name, p50, p95, p99 in milliseconds, mean number of SQL queries, peak traced memory in KiB).
+    The search cache is cleared before every search, deep pages are timed from the first page.
+    """
+    rng = rng or random.Random(0)
+    client = Client()
+    keywords = text.frequent(30)
+    hashtags = list(HashTag.objects.values_list('name', flat=True)[:30])
+    categories = list(Category.objects.values_list('pk', flat=True))
+
+    rows = []
+    for name, source, extra in QUERY_MIX:
+        pages = extra.get('pages', 1)
+        runs = [_search_params(source, extra, rng.choice(keywords), rng.choice(hashtags),
+                               rng.sample(categories, len(categories)))
+                for _ in range(repeat)]
+        latencies, query_counts = [], []
+        for params in runs:
+            caches['search'].clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                _get(client, params, pages)
+                latencies.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+
+        # Memory is traced on a separate run, tracing slows down the timed ones
+        caches['search'].clear()
+        tracemalloc.start()
+        try:
+            _get(client, runs[0], pages)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        rows.append((name, *percentiles(latencies), statistics.mean(query_counts), peak / 1024))
+    return rows
@@ -0,0 +1,40 @@
+from .models import Comment
+from .pagination import CursorPaginator
+
+# Root comments shown at once on the post detail page and by the comments API, and replies loaded at once
+COMMENTS_PER_PAGE = 20
+REPLIES_PER_PAGE = 10
+
+# Columns of a comment shown in a thread
+COMMENT_FIELDS = ('id', 'parent_id', 'content', 'is_edited', 'updated_at')
+
+
+def root_comments(post):
+    return Comment.objects.filter(post=post, parent__isnull=True)
+
+
+def replies(comment):
+    return Comment.objects.filter(parent=comment)
+
+
+def comment_page(queryset, cursor=None, per_page=COMMENTS_PER_PAGE):
+    """
+    Return a page of comments with their authors, newest first. The cursor seeks on (updated_at, id),
+    and the replies are not loaded: each comment carries its precomputed reply_count.
+    """
+    queryset = queryset.select_related('user').only(
+        *COMMENT_FIELDS, 'post_id', 'user_id', 'reply_count', 'user__username', 'user__avatar_link')
+    return CursorPaginator(queryset, per_page, ordering=('-updated_at', '-pk')).page(cursor)
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'parent_id': comment.parent_id,
+        'content': comment.content,
+        'is_edited': comment.is_edited,
+        'updated_at': comment.updated_at.isoformat(),
+        'reply_count': comment.reply_count,
+        'username': comment.user.username,
+        'avatar_link': comment.user.avatar_link,
+    }
@@ -0,0 +1,67 @@
+import math
+from html.parser import HTMLParser
+
+from django.utils.text import Truncator
+
+# Share of the text of a private post shown to users who did not pay, and its upper bound in characters
+EXCERPT_RATIO = 0.1
+EXCERPT_MAX_CHARS = 1000
+
+# Reading speed used for the estimated reading time
+WORDS_PER_MINUTE = 200
+
+# Tags that separate words in the plain text, inline tags such as <strong> do not
+BLOCK_TAGS = {'address', 'article', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'h1', 'h2',
+              'h3', 'h4', 'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'}
+
+
+class _ContentParser(HTMLParser):
+    """
+    Collect the text and the first image source of CKEditor HTML in one pass
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.first_image = ''
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+        if tag == 'img' and not self.first_image:
+            self.first_image = dict(attrs).get('src') or ''
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def derive_content(html):
+    """
+    Compute the values derived from the HTML content of a post, stored with it so requests do not
+    reprocess the HTML: plain text, paywall excerpt with closed tags, word count, reading time and first image
+    """
+    html = html or ''
+    parser = _ContentParser()
+    parser.feed(html)
+    parser.close()
+
+    plain_text = ' '.join(''.join(parser.parts).split())
+    word_count = len(plain_text.split())
+    excerpt_chars = min(EXCERPT_MAX_CHARS, int(len(plain_text) * EXCERPT_RATIO))
+    return {
+        'plain_text': plain_text,
+        'excerpt': Truncator(html).chars(excerpt_chars, truncate='...', html=True),
+        'word_count': word_count,
+        'reading_time': math.ceil(word_count / WORDS_PER_MINUTE),
+        'first_image': parser.first_image[:500],
+    }
@@ -0,0 +1,144 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from . import autocomplete
+from .models import Bookmark, Comment, CustomUser, Follow, Post, PostReaction
+
+
+def _change(instance, **deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        instance.__class__.objects.filter(pk=instance.pk).update(**changes)
+
+
+def update_reaction_counters(post, old_value, new_value):
+    """
+    Apply one reaction change to the post score and vote counters.
+    old_value/new_value are the feedback values before/after the change, None when there is no reaction.
+    """
+    upvotes = int(new_value == 1) - int(old_value == 1)
+    downvotes = int(new_value == -1) - int(old_value == -1)
+    if upvotes or downvotes:
+        _change(post, score=upvotes - downvotes, upvotes=upvotes, downvotes=downvotes)
+
+
+def update_comment_count(post, delta=1):
+    _change(post, comment_count=delta)
+
+
+def update_reply_count(comment, delta=1):
+    _change(comment, reply_count=delta)
+
+
+def update_bookmark_count(post, delta=1):
+    _change(post, bookmark_count=delta)
+
+
+def update_follow_counts(follower, followed, delta=1):
+    _change(follower, following_count=delta)
+    _change(followed, follower_count=delta)
+
+
+def update_post_count(user, old_status, new_status):
+    """
+    Apply a post status transition to the published post count of its author, old_status is None for a new post
+    """
+    delta = int(new_status == 1) - int(old_status == 1)
+    _change(user, post_count=delta)
+    autocomplete.record('author', user.pk, delta=delta)
+
+
+def _count(queryset, field='post'):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def exact_post_counters():
+    """
+    Return subquery expressions computing every post counter from the source tables
+    """
+    upvotes = _count(PostReaction.objects.filter(feedback_value=1))
+    downvotes = _count(PostReaction.objects.filter(feedback_value=-1))
+    return {
+        'score': upvotes - downvotes,
+        'upvotes': upvotes,
+        'downvotes': downvotes,
+        'comment_count': _count(Comment.objects.all()),
+        'bookmark_count': _count(Bookmark.objects.all()),
+    }
+
+
+def exact_user_counters():
+    """
+    Return subquery expressions computing every user counter from the source tables
+    """
+    return {
+        'follower_count': _count(Follow.objects.all(), 'followed'),
+        'following_count': _count(Follow.objects.all(), 'follower'),
+        'post_count': _count(Post.objects.filter(status=1), 'user'),
+    }
+
+
+def _reconcile(model, counters, batch_size):
+    drift = Q()
+    for field in counters:
+        drift |= ~Q(**{field: F('exact_' + field)})
+
+    repaired = 0
+    last_pk = 0
+    while True:
+        pks = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return repaired
+        last_pk = pks[-1]
+        drifted = list(
+            model.objects.filter(pk__in=pks)
+            .annotate(**{'exact_' + field: expression for field, expression in counters.items()})
+            .filter(drift)
+            .values_list('pk', flat=True)
+        )
+        if drifted:
+            repaired += model.objects.filter(pk__in=drifted).update(**counters)
+
+
+def reconcile_post_counters(batch_size=1000):
+    """
+    Recompute the counters of every post in primary key batches, return the number of drifted posts repaired
+    """
+    return _reconcile(Post, exact_post_counters(), batch_size)
+
+
+def reconcile_user_counters(batch_size=1000):
+    """
+    Recompute the counters of every user in primary key batches, return the number of drifted users repaired
+    """
+    return _reconcile(CustomUser, exact_user_counters(), batch_size)
+
+
+def reconcile_comment_counters(batch_size=1000):
+    """
+    Recompute the reply counts of every comment in primary key batches, return the number of drifted comments repaired.
+    MySQL cannot update a table from a subquery of the same table, so the counts are compared in Python
+    and the drifted comments are updated grouped by their exact count.
+    """
+    repaired = 0
+    last_pk = 0
+    while True:
+        stored = dict(
+            Comment.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'reply_count')[:batch_size])
+        if not stored:
+            return repaired
+        last_pk = max(stored)
+        exact = dict(
+            Comment.objects.filter(parent__in=list(stored)).order_by().values('parent')
+            .annotate(count=Count('pk')).values_list('parent', 'count')
+        )
+        by_count = defaultdict(list)
+        for pk, reply_count in stored.items():
+            if exact.get(pk, 0) != reply_count:
+                by_count[exact.get(pk, 0)].append(pk)
+        for count, pks in by_count.items():
+            repaired += Comment.objects.filter(pk__in=pks).update(reply_count=count)
@@ -128,10 +128,16 @@ class CustomUserForm(forms.ModelForm):
         if commit:
             user.save()
         return user
-    
+
+
+def _category_choices():
+    return [(category.id, category.name) for category in Category.objects.all()]
+
+
 class FilterForm(forms.Form):
+    # Read on every form so the categories created since the start of the process are listed
     list_category = forms.MultipleChoiceField(
-        choices=[(category.id, category.name) for category in Category.objects.all()],
+        choices=_category_choices,
         widget=forms.CheckboxSelectMultiple,
         required=False
     )
@@ -147,3 +153,17 @@ class FilterForm(forms.Form):
         ],
         required=False,
     )
+
+    def __init__(self, *args, facets=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if facets is None:
+            return
+        # Every choice shows the number of current results it would keep
+        self.fields['list_category'].choices = [
+            (pk, f'{name} ({facets["categories"].get(int(pk), 0)})')
+            for pk, name in self.fields['list_category'].choices
+        ]
+        self.fields['point'].choices = [
+            (value, f'{label} ({facets["points"].get(value, 0)})' if value != '----' else label)
+            for value, label in self.fields['point'].choices
+        ]
@@ -0,0 +1,252 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AuthorLiker, FamousAuthor, HashTagSketch, PostReaction, TrendingPost
+from .rollups import window_totals
+from .sketches import SpaceSaving
+
+# Time windows (in days) of the leaderboards shown on home and trending pages
+WINDOWS = (7, 30, 365)
+
+# Number of hashtags tracked by each heavy hitters summary
+HASHTAG_CAPACITY = 200
+
+
+def _window_start(days, now=None):
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def get_trending_posts(days, limit=5):
+    """
+    Read the top posts of a window from the precomputed leaderboard
+    """
+    entries = (
+        TrendingPost.objects.filter(days=days, r_count__gt=0, post__status=1)
+        .select_related('post__user')
+        .prefetch_related('post__categories')
+        .defer('post__content')
+        .order_by('-r_count', '-post_id')[:limit]
+    )
+
+    posts = []
+    for entry in entries:
+        post = entry.post
+        post.r_count = entry.r_count
+        post.list_categories = ', '.join(category.name for category in post.categories.all())
+        posts.append(post)
+    return posts
+
+
+def record_post_reaction(post, reaction_time, old_value, new_value):
+    """
+    Apply one reaction change to the trending post leaderboards.
+    old_value/new_value are the feedback values before/after the change, None when there is no reaction.
+    """
+    delta = int(new_value == 1) - int(old_value == 1)
+    if delta == 0:
+        return
+
+    now = timezone.now()
+    for days in WINDOWS:
+        # A reaction only counts in the windows its time falls into
+        if reaction_time <= _window_start(days, now):
+            continue
+        updated = TrendingPost.objects.filter(days=days, post=post).update(r_count=F('r_count') + delta)
+        if not updated and delta > 0:
+            entry, created = TrendingPost.objects.get_or_create(days=days, post=post, defaults={'r_count': delta})
+            if not created:
+                TrendingPost.objects.filter(pk=entry.pk).update(r_count=F('r_count') + delta)
+
+
+def refresh_trending_posts(days):
+    """
+    Rebuild a trending window from the reaction rollups so reactions older than the window expire
+    """
+    counts = window_totals(_window_start(days)).filter(post__status=1, total_upvotes__gt=0)
+
+    with transaction.atomic():
+        TrendingPost.objects.filter(days=days).delete()
+        TrendingPost.objects.bulk_create(
+            [TrendingPost(days=days, post_id=row['post'], r_count=row['total_upvotes']) for row in counts],
+            batch_size=1000)
+
+
+def get_famous_authors(days, limit=5):
+    """
+    Read the top authors of a window from the precomputed leaderboard
+    """
+    entries = (
+        FamousAuthor.objects.filter(days=days, liked_people__gt=0)
+        .select_related('author')
+        .order_by('-liked_people', 'author_id')[:limit]
+    )
+
+    authors = []
+    for entry in entries:
+        author = entry.author
+        author.liked_people = entry.liked_people
+        author.full_name = author.last_name + ' ' + author.first_name
+        authors.append(author)
+    return authors
+
+
+def _add_famous_author(days, author_id, delta):
+    updated = FamousAuthor.objects.filter(days=days, author_id=author_id).update(liked_people=F('liked_people') + delta)
+    if not updated and delta > 0:
+        entry, created = FamousAuthor.objects.get_or_create(days=days, author_id=author_id, defaults={'liked_people': delta})
+        if not created:
+            FamousAuthor.objects.filter(pk=entry.pk).update(liked_people=F('liked_people') + delta)
+
+
+def record_author_like(post, liker, reaction_time, old_value, new_value):
+    """
+    Keep the per-day set of users who upvoted an author and the distinct liker counts of each window.
+    Must be called after the reaction itself has been saved or deleted.
+    """
+    delta = int(new_value == 1) - int(old_value == 1)
+    if delta == 0 or post.status != 1:
+        return
+
+    today = timezone.localdate()
+    day = timezone.localdate(reaction_time)
+    likers = AuthorLiker.objects.filter(author_id=post.user_id, liker=liker)
+
+    if delta < 0:
+        # The liker is still counted on that day if another upvote of the same author remains
+        if PostReaction.objects.filter(user=liker, post__user_id=post.user_id, post__status=1, feedback_value=1,
+                                       time__date=day).exists():
+            return
+        if not likers.filter(day=day).delete()[0]:
+            return
+    elif likers.filter(day=day).exists():
+        return
+
+    other_days = list(likers.filter(day__gt=today - timedelta(days=max(WINDOWS))).values_list('day', flat=True))
+    if delta > 0:
+        AuthorLiker.objects.get_or_create(author_id=post.user_id, liker=liker, day=day)
+
+    for days in WINDOWS:
+        start = today - timedelta(days=days)
+        # Only count the liker in a window once, whatever the number of days they liked the author
+        if day > start and not any(other_day > start for other_day in other_days):
+            _add_famous_author(days, post.user_id, delta)
+
+
+def refresh_famous_authors(days):
+    """
+    Rebuild a famous author window from the per-day liker sets so likes older than the window expire
+    """
+    start = timezone.localdate() - timedelta(days=days)
+    counts = (
+        AuthorLiker.objects.filter(day__gt=start)
+        .values('author')
+        .annotate(liked_people=Count('liker', distinct=True))
+    )
+
+    with transaction.atomic():
+        FamousAuthor.objects.filter(days=days).delete()
+        FamousAuthor.objects.bulk_create(
+            [FamousAuthor(days=days, author_id=row['author'], liked_people=row['liked_people']) for row in counts],
+            batch_size=1000)
+
+
+def rebuild_author_likers(batch_size=1000):
+    """
+    Rebuild the per-day liker sets from the upvotes of the published posts of the largest window,
+    so the likes of posts unpublished or deleted since they were recorded stop counting
+    and the sets older than the window are dropped. Return the number of liker sets.
+    """
+    likers = (
+        PostReaction.objects.filter(feedback_value=1, post__status=1,
+                                    time__date__gt=timezone.localdate() - timedelta(days=max(WINDOWS)))
+        .annotate(day=TruncDate('time'))
+        .values_list('post__user', 'user', 'day')
+        .distinct()
+        .order_by()
+    )
+    rebuilt = 0
+    with transaction.atomic():
+        AuthorLiker.objects.all().delete()
+        batch = []
+        for author_id, liker_id, day in likers.iterator(chunk_size=batch_size):
+            batch.append(AuthorLiker(author_id=author_id, liker_id=liker_id, day=day))
+            if len(batch) == batch_size:
+                AuthorLiker.objects.bulk_create(batch)
+                rebuilt += len(batch)
+                batch = []
+        AuthorLiker.objects.bulk_create(batch)
+    return rebuilt + len(batch)
+
+
+def record_hashtags(hashtags, time=None):
+    """
+    Feed the hashtags of a newly published post into the summary of its day
+    """
+    time = time or timezone.now()
+    with transaction.atomic():
+        sketch, created = HashTagSketch.objects.select_for_update().get_or_create(window=0, day=timezone.localdate(time))
+        summary = SpaceSaving.from_dict(sketch.counters, HASHTAG_CAPACITY)
+        for hashtag in hashtags:
+            summary.offer(hashtag.name, time=time)
+        sketch.counters = summary.to_dict()
+        sketch.save()
+    checkpoint_hashtag_windows()
+
+
+def _merge_window_days(days, today):
+    summary = SpaceSaving(HASHTAG_CAPACITY)
+    for daily in HashTagSketch.objects.filter(window=0, day__gt=today - timedelta(days=days), day__lt=today):
+        summary.merge(SpaceSaving.from_dict(daily.counters))
+    return summary
+
+
+def _hashtag_window_prefix(days, today):
+    """
+    Return the merged summary of the days of a window before today, from today's checkpoint when it exists
+    """
+    sketch = HashTagSketch.objects.filter(window=days, day=today).first()
+    if sketch is not None:
+        return SpaceSaving.from_dict(sketch.counters, HASHTAG_CAPACITY)
+    return _merge_window_days(days, today)
+
+
+def checkpoint_hashtag_windows(today=None):
+    """
+    Store the merged summary of the days before today of every window that has no checkpoint for today yet.
+    Called by the writes and the hourly refresh, reading the trending hashtags never writes.
+    """
+    today = today or timezone.localdate()
+    checkpointed = set(HashTagSketch.objects.filter(day=today).exclude(window=0).values_list('window', flat=True))
+    for days in WINDOWS:
+        if days not in checkpointed:
+            HashTagSketch.objects.get_or_create(
+                window=days, day=today, defaults={'counters': _merge_window_days(days, today).to_dict()})
+
+
+def get_trending_hashtags(days, limit=10):
+    """
+    Answer the top hashtags of a window from the window checkpoint merged with today's live summary
+    """
+    today = timezone.localdate()
+    summary = _hashtag_window_prefix(days, today)
+    live = HashTagSketch.objects.filter(window=0, day=today).first()
+    if live is not None:
+        summary.merge(SpaceSaving.from_dict(live.counters))
+    return [{'name': name, 'posts': count, 'last_post': last_post}
+            for name, count, last_post in summary.top(limit)]
+
+
+def refresh_hashtag_sketches():
+    """
+    Checkpoint today's window summaries and drop the ones that are no longer needed
+    """
+    today = timezone.localdate()
+    checkpoint_hashtag_windows(today)
+    return (
+        HashTagSketch.objects.filter(window=0, day__lte=today - timedelta(days=max(WINDOWS))).delete()[0]
+        + HashTagSketch.objects.exclude(window=0).filter(day__lt=today).delete()[0]
+    )
@@ -0,0 +1,77 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app.benchmarks import (SyntheticText, benchmark_database, build_comment_tree, get_comment_tree, percentiles,
+                            seed_comments, seed_corpus)
+from app.models import Post
+
+
+def _legacy_tree(comments):
+    """
+    Two-level tree built like the post detail page used to: every root rescans all the comments for its replies
+    """
+    roots = [comment for comment in comments if comment['parent_id'] is None]
+    for root in roots:
+        root['child'] = [comment for comment in comments if comment['parent_id'] == root['id']]
+    return roots
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway copy of the database with a post with many comments and report the time '
+            'to load and nest its comments, to render the post detail page and to load the next comments')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=10000, help='Number of comments of the post')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generated comments')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark database after the run')
+
+    def handle(self, *args, **options):
+        with benchmark_database(options['keepdb']):
+            self._run(options)
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        text = SyntheticText(rng)
+        seed_corpus(1, rng, text)
+        post = Post.objects.order_by('-pk').first()
+        Post.objects.filter(pk=post.pk).update(status=1)
+        seed_comments(post, options['comments'], rng, text)
+
+        rows = []
+
+        def timed(name, function):
+            latencies = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                function()
+                latencies.append((time.perf_counter() - started) * 1000)
+            rows.append((name, *percentiles(latencies)))
+
+        loaded = list(post.comment_set.order_by('-updated_at', '-id').values('id', 'parent_id'))
+        timed('load and nest', lambda: get_comment_tree(post))
+        timed('nest only', lambda: build_comment_tree([dict(comment) for comment in loaded]))
+        timed('legacy nest only', lambda: _legacy_tree([dict(comment) for comment in loaded]))
+
+        client = Client()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/post/{post.pk}')
+        query_count = len(queries)
+        timed('detail page', lambda: client.get(f'/post/{post.pk}'))
+        # The next page of root comments, and the replies of the most replied comment
+        cursor = response.context['comments'].next_cursor
+        timed('comments page', lambda: client.get(reverse('post_comments', args=[post.pk]), {'cursor': cursor}))
+        replied = post.comment_set.order_by('-reply_count').first()
+        timed('replies page', lambda: client.get(reverse('comment_replies', args=[replied.pk])))
+
+        self.stdout.write(f'{options["comments"]} comments, {connection.vendor} database, '
+                          f'detail page in {query_count} queries')
+        self.stdout.write(f'{"step":<18}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+        for name, p50, p95, p99 in rows:
+            self.stdout.write(f'{name:<18}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}')
@@ -0,0 +1,44 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from app.benchmarks import SyntheticText, benchmark_database, replay_searches, seed_corpus
+from app.models import Post
+from app.search.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway copy of the database with generated posts and report the latency, SQL queries '
+            'and peak memory of a fixed mix of searches at each corpus size')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, nargs='+', default=[10000],
+                            help='Corpus sizes, e.g. 10000 100000 1000000; posts are added between the sizes')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of timed runs of each kind of search')
+        parser.add_argument('--backend', help='Search backend to benchmark instead of the SEARCH_BACKEND setting')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generated corpus and searches')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark database after the run')
+
+    def handle(self, *args, **options):
+        with benchmark_database(options['keepdb'],
+                                SEARCH_BACKEND=options['backend'] or getattr(settings, 'SEARCH_BACKEND', None)):
+            self._run(options)
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        text = SyntheticText(rng)
+        # A kept database already holds the posts of a previous run
+        seeded = Post.objects.count()
+        self.stdout.write(f'{connection.vendor} database, {get_backend().__class__.__name__}')
+        for size in sorted(options['posts']):
+            started = time.perf_counter()
+            seed_corpus(max(size - seeded, 0), rng, text)
+            seeded = max(size, seeded)
+            self.stdout.write(f'\n{size} posts (seeded and indexed in {time.perf_counter() - started:.1f}s)')
+            self.stdout.write(f'{"search":<16}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>10}'
+                              f'{"peak KiB":>10}')
+            for name, p50, p95, p99, queries, peak in replay_searches(text, options['repeat'], rng):
+                self.stdout.write(f'{name:<16}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{queries:>10.1f}{peak:>10.0f}')
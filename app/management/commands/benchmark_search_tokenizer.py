@@ -0,0 +1,73 @@
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from app.benchmarks import LATIN_WORDS, SyntheticText, percentiles
+from app.search.backends import SQLiteFTSBackend
+from app.search.text import VietnameseTokenizer, WordTokenizer, fold
+
+
+class Command(BaseCommand):
+    help = ('Compare the index size, query latency and phrase precision of the naive and the Vietnamese tokenizer '
+            'on a generated corpus')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000, help='Number of generated posts')
+        parser.add_argument('--words', type=int, default=150, help='Number of words of a generated post')
+        parser.add_argument('--queries', type=int, default=200, help='Number of timed queries')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generated corpus and queries')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        text = SyntheticText(rng)
+        documents = [{
+            'id': post_id,
+            'title': text.text(rng.randint(3, 8)),
+            'content': text.text(options['words']),
+            'hashtags': ' '.join(rng.sample(LATIN_WORDS, 2)),
+        } for post_id in range(1, options['posts'] + 1)]
+        phrases = [word for word in text.words if ' ' in word]
+        queries = rng.sample(phrases, min(options['queries'], len(phrases)))
+        relevant = self._phrase_matches(documents, queries)
+
+        self.stdout.write(f'{len(documents)} posts, {len(queries)} multi-syllable word queries')
+        for name, tokenizer in (('naive', WordTokenizer()), ('vietnamese', VietnameseTokenizer())):
+            with tempfile.TemporaryDirectory() as directory:
+                backend = SQLiteFTSBackend(Path(directory) / 'index.sqlite3', tokenizer)
+                started = time.perf_counter()
+                for start in range(0, len(documents), 200):
+                    backend.index(documents[start:start + 200])
+                indexing = time.perf_counter() - started
+                stats = backend.statistics()
+
+                latencies = []
+                found = correct = 0
+                for query in queries:
+                    started = time.perf_counter()
+                    hits = backend.search(query, limit=len(documents))
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    found += len(hits)
+                    correct += len(relevant[query].intersection(hits))
+
+            expected = sum(len(ids) for ids in relevant.values())
+            precision = correct / found if found else 1
+            recall = correct / expected if expected else 1
+            p50, p95, p99 = percentiles(latencies)
+            self.stdout.write(
+                f'{name}: {stats["terms"]} terms, {stats["postings"]} postings, {stats["bytes"] / 1024:.0f} KiB, '
+                f'indexed in {indexing:.2f}s; query p50 {p50:.2f}ms p95 {p95:.2f}ms; '
+                f'phrase precision {precision:.0%} recall {recall:.0%}')
+
+    def _phrase_matches(self, documents, queries):
+        """
+        Return the ids of the documents containing each query as a phrase, the results a search should give
+        """
+        texts = {}
+        for document in documents:
+            words = re.findall(r'\w+', fold(document['title'] + ' ' + document['content']))
+            texts[document['id']] = ' ' + ' '.join(words) + ' '
+        return {query: {post_id for post_id, text in texts.items() if f' {fold(query)} ' in text} for query in queries}
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.rollups import compact_rollups
+
+
+class Command(BaseCommand):
+    help = 'Fold old hourly reaction buckets into daily buckets'
+
+    def handle(self, *args, **options):
+        folded = compact_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Folded {folded} hourly buckets'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.search.indexing import BATCH_SIZE, index_lag, process_queue
+
+
+class Command(BaseCommand):
+    help = 'Apply the queued post changes to the search index, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Number of posts indexed per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep waiting for new changes instead of exiting')
+        parser.add_argument('--interval', type=float, default=1, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            lag = index_lag()
+            count = process_queue(options['batch_size'])
+            processed += count
+            if count:
+                self.stdout.write(f'Indexed {count} posts, lag {lag.total_seconds():.1f}s')
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {processed} posts'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app.search.indexing import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index from all published posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of posts read per query')
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} posts'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app.counters import reconcile_comment_counters, reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = ('Recompute the denormalized engagement counters of posts and the reply counts of their comments '
+            'and repair the ones that drifted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of posts or comments checked per query')
+
+    def handle(self, *args, **options):
+        repaired = reconcile_post_counters(options['batch_size'])
+        repaired_comments = reconcile_comment_counters(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired {repaired} posts and {repaired_comments} comments'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app.counters import reconcile_user_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the followers, followings and published posts of users and repair the ones that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of users checked per query')
+
+    def handle(self, *args, **options):
+        repaired = reconcile_user_counters(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired {repaired} users'))
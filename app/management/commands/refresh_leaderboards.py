@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app.leaderboards import (WINDOWS, rebuild_author_likers, refresh_famous_authors, refresh_hashtag_sketches,
+                              refresh_trending_posts)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed leaderboards so entries older than their time window expire'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_author_likers()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} author likers from the published posts'))
+        for days in WINDOWS:
+            refresh_trending_posts(days)
+            self.stdout.write(self.style.SUCCESS(f'Refreshed trending posts of {days} days'))
+            refresh_famous_authors(days)
+            self.stdout.write(self.style.SUCCESS(f'Refreshed famous authors of {days} days'))
+        pruned = refresh_hashtag_sketches()
+        self.stdout.write(self.style.SUCCESS(f'Checkpointed hashtag sketches, pruned {pruned} expired ones'))
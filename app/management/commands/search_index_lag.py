@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.models import SearchIndexTask
+from app.search.indexing import index_lag
+
+
+class Command(BaseCommand):
+    help = 'Show how many post changes wait for the search index worker and the age of the oldest one'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{SearchIndexTask.objects.count()} queued, lag {index_lag().total_seconds():.1f}s')
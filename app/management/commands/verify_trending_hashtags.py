@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from app.leaderboards import HASHTAG_CAPACITY, WINDOWS, get_trending_hashtags
+from app.models import HashTag, HashTagSketch, Post
+from app.sketches import SpaceSaving
+
+
+class Command(BaseCommand):
+    help = 'Compare the trending hashtag sketches with an exact recount of the published posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='Number of top hashtags to compare')
+        parser.add_argument('--repair', action='store_true', help='Rebuild the daily sketches from the exact data')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        if options['repair']:
+            self._repair()
+
+        for days in WINDOWS:
+            exact = [hashtag.name for hashtag in self._exact(days, limit)]
+            estimated = [hashtag['name'] for hashtag in get_trending_hashtags(days, limit)]
+            recall = len(set(exact) & set(estimated)) / len(exact) if exact else 1
+            self.stdout.write(f'{days} days: recall {recall:.0%}')
+            self.stdout.write(f'  exact:     {", ".join(exact)}')
+            self.stdout.write(f'  estimated: {", ".join(estimated)}')
+
+    def _exact(self, days, limit):
+        return (
+            HashTag.objects.filter(post__status=1, post__created_at__gt=timezone.now() - timedelta(days=days))
+            .annotate(posts=Count('post', distinct=True), last_post=Max('post__created_at'))
+            .order_by('-posts', '-last_post', 'name')[:limit]
+        )
+
+    def _repair(self):
+        summaries = {}
+        posts = (
+            Post.objects.filter(status=1, created_at__gt=timezone.now() - timedelta(days=max(WINDOWS)))
+            .prefetch_related('hashtags')
+            .only('created_at')
+            .order_by('created_at')
+        )
+        for post in posts.iterator(chunk_size=1000):
+            summary = summaries.setdefault(timezone.localdate(post.created_at), SpaceSaving(HASHTAG_CAPACITY))
+            for hashtag in post.hashtags.all():
+                summary.offer(hashtag.name, time=post.created_at)
+
+        HashTagSketch.objects.all().delete()
+        HashTagSketch.objects.bulk_create(
+            [HashTagSketch(window=0, day=day, counters=summary.to_dict()) for day, summary in summaries.items()],
+            batch_size=100)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(summaries)} daily hashtag sketches'))
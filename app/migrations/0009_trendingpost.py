@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:15
+
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+from django.utils import timezone
+
+# Copy of app.leaderboards.WINDOWS at the time of this migration
+WINDOWS = (7, 30, 365)
+
+
+def backfill_trending_posts(apps, schema_editor):
+    # The home page reads the leaderboards from the first request, before refresh_leaderboards first runs
+    PostReaction = apps.get_model('app', 'PostReaction')
+    TrendingPost = apps.get_model('app', 'TrendingPost')
+    now = timezone.now()
+    for days in WINDOWS:
+        counts = (
+            PostReaction.objects.filter(feedback_value=1, post__status=1, time__gt=now - timedelta(days=days))
+            .values('post')
+            .annotate(r_count=Count('id'))
+            .order_by()
+        )
+        TrendingPost.objects.bulk_create(
+            [TrendingPost(days=days, post_id=row['post'], r_count=row['r_count']) for row in counts.iterator()],
+            batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_alter_post_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.IntegerField(verbose_name='Khoảng thời gian (ngày)')),
+                ('r_count', models.IntegerField(default=0, verbose_name='Số lượt upvote')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.post', verbose_name='Bài viết')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['days', '-r_count'], name='app_trendin_days_87b538_idx')],
+                'unique_together': {('days', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_trending_posts, migrations.RunPython.noop),
+    ]
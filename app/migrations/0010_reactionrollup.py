@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDay
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    PostReaction = apps.get_model('app', 'PostReaction')
+    ReactionRollup = apps.get_model('app', 'ReactionRollup')
+    days = (
+        PostReaction.objects.annotate(day=TruncDay('time'))
+        .values('post', 'post__user', 'day')
+        .annotate(upvotes=Count('id', filter=Q(feedback_value=1)),
+                  downvotes=Count('id', filter=Q(feedback_value=-1)))
+        .order_by()
+    )
+    ReactionRollup.objects.bulk_create(
+        [ReactionRollup(post_id=row['post'], author_id=row['post__user'], granularity=1, bucket=row['day'],
+                        upvotes=row['upvotes'], downvotes=row['downvotes']) for row in days.iterator()],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_trendingpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.IntegerField(choices=[(0, 'Hour'), (1, 'Day')], verbose_name='Độ chi tiết')),
+                ('bucket', models.DateTimeField(verbose_name='Thời điểm bắt đầu')),
+                ('upvotes', models.IntegerField(default=0, verbose_name='Số lượt upvote')),
+                ('downvotes', models.IntegerField(default=0, verbose_name='Số lượt downvote')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_rollups', to=settings.AUTH_USER_MODEL, verbose_name='Tác giả')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.post', verbose_name='Bài viết')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='app_reactio_bucket_1ba054_idx'), models.Index(fields=['author', 'bucket'], name='app_reactio_author__a1f317_idx')],
+                'unique_together': {('post', 'granularity', 'bucket')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:17
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Copy of app.leaderboards.WINDOWS at the time of this migration
+WINDOWS = (7, 30, 365)
+
+
+def backfill_author_likers(apps, schema_editor):
+    PostReaction = apps.get_model('app', 'PostReaction')
+    AuthorLiker = apps.get_model('app', 'AuthorLiker')
+    likers = (
+        PostReaction.objects.filter(feedback_value=1, post__status=1)
+        .annotate(day=TruncDate('time'))
+        .values('post__user', 'user', 'day')
+        .distinct()
+        .order_by()
+    )
+    AuthorLiker.objects.bulk_create(
+        [AuthorLiker(author_id=row['post__user'], liker_id=row['user'], day=row['day']) for row in likers.iterator()],
+        batch_size=1000)
+
+
+def backfill_famous_authors(apps, schema_editor):
+    # Same as app.leaderboards.refresh_famous_authors, so the home page ranks authors before cron first runs
+    AuthorLiker = apps.get_model('app', 'AuthorLiker')
+    FamousAuthor = apps.get_model('app', 'FamousAuthor')
+    today = timezone.localdate()
+    for days in WINDOWS:
+        counts = (
+            AuthorLiker.objects.filter(day__gt=today - timedelta(days=days))
+            .values('author')
+            .annotate(liked_people=Count('liker', distinct=True))
+            .order_by()
+        )
+        FamousAuthor.objects.bulk_create(
+            [FamousAuthor(days=days, author_id=row['author'], liked_people=row['liked_people'])
+             for row in counts.iterator()],
+            batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_reactionrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FamousAuthor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.IntegerField(verbose_name='Khoảng thời gian (ngày)')),
+                ('liked_people', models.IntegerField(default=0, verbose_name='Số người upvote')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Tác giả')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['days', '-liked_people'], name='app_famousa_days_8b41e2_idx')],
+                'unique_together': {('days', 'author')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AuthorLiker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='liked_by_days', to=settings.AUTH_USER_MODEL, verbose_name='Tác giả')),
+                ('liker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='liked_author_days', to=settings.AUTH_USER_MODEL, verbose_name='Người upvote')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='app_authorl_day_f15193_idx')],
+                'unique_together': {('author', 'liker', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_author_likers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_famous_authors, migrations.RunPython.noop),
+    ]
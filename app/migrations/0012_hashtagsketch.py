@@ -0,0 +1,72 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:18
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Copies of app.leaderboards.WINDOWS and HASHTAG_CAPACITY at the time of this migration
+WINDOWS = (7, 30, 365)
+HASHTAG_CAPACITY = 200
+
+
+def offer(counters, item, time):
+    # Copy of app.sketches.SpaceSaving.offer at the time of this migration, counting one occurrence
+    time = time.isoformat()
+    counter = counters.get(item)
+    if counter is not None:
+        counter[0] += 1
+        counter[2] = max(counter[2] or '', time) or None
+        return
+    if len(counters) < HASHTAG_CAPACITY:
+        counters[item] = [1, 0, time]
+        return
+    smallest = min(counters, key=lambda key: counters[key][0])
+    minimum = counters.pop(smallest)[0]
+    counters[item] = [minimum + 1, minimum, time]
+
+
+def backfill_daily_sketches(apps, schema_editor):
+    # Same as verify_trending_hashtags --repair: the hashtags of the posts published in the largest window,
+    # one summary per day, so trending hashtags are served before new posts are published
+    Post = apps.get_model('app', 'Post')
+    HashTagSketch = apps.get_model('app', 'HashTagSketch')
+
+    summaries = {}
+    posts = (
+        Post.objects.filter(status=1, created_at__gt=timezone.now() - timedelta(days=max(WINDOWS)))
+        .prefetch_related('hashtags')
+        .only('created_at')
+        .order_by('created_at')
+    )
+    for post in posts.iterator(chunk_size=1000):
+        counters = summaries.setdefault(timezone.localdate(post.created_at), {})
+        for hashtag in post.hashtags.all():
+            offer(counters, hashtag.name, post.created_at)
+
+    HashTagSketch.objects.bulk_create(
+        [HashTagSketch(window=0, day=day, counters=counters) for day, counters in summaries.items()],
+        batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_authorliker_famousauthor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashTagSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.IntegerField(default=0, verbose_name='Khoảng thời gian (ngày)')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('counters', models.JSONField(default=dict, verbose_name='Bộ đếm')),
+            ],
+            options={
+                'unique_together': {('window', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_post_counters(apps, schema_editor):
+    Post = apps.get_model('app', 'Post')
+    PostReaction = apps.get_model('app', 'PostReaction')
+    Comment = apps.get_model('app', 'Comment')
+    Bookmark = apps.get_model('app', 'Bookmark')
+
+    def count(queryset):
+        return Coalesce(Subquery(
+            queryset.filter(post=OuterRef('pk')).order_by().values('post').annotate(count=Count('pk')).values('count')
+        ), 0)
+
+    upvotes = count(PostReaction.objects.filter(feedback_value=1))
+    downvotes = count(PostReaction.objects.filter(feedback_value=-1))
+    Post.objects.update(
+        score=upvotes - downvotes,
+        upvotes=upvotes,
+        downvotes=downvotes,
+        comment_count=count(Comment.objects.all()),
+        bookmark_count=count(Bookmark.objects.all()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_hashtagsketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='bookmark_count',
+            field=models.IntegerField(default=0, verbose_name='Số lượng Bookmark'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0, verbose_name='Số lượng bình luận'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='downvotes',
+            field=models.IntegerField(default=0, verbose_name='Số lượt downvote'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.IntegerField(default=0, verbose_name='Tổng đánh giá'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='upvotes',
+            field=models.IntegerField(default=0, verbose_name='Số lượt upvote'),
+        ),
+        migrations.RunPython(backfill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:21
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_user_counters(apps, schema_editor):
+    CustomUser = apps.get_model('app', 'CustomUser')
+    Follow = apps.get_model('app', 'Follow')
+    Post = apps.get_model('app', 'Post')
+
+    def count(queryset, field):
+        return Coalesce(Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk')).values('count')
+        ), 0)
+
+    CustomUser.objects.update(
+        follower_count=count(Follow.objects.all(), 'followed'),
+        following_count=count(Follow.objects.all(), 'follower'),
+        post_count=count(Post.objects.filter(status=1), 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='follower_count',
+            field=models.IntegerField(default=0, verbose_name='Số người theo dõi'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following_count',
+            field=models.IntegerField(default=0, verbose_name='Số người đang theo dõi'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='post_count',
+            field=models.IntegerField(default=0, verbose_name='Số bài viết'),
+        ),
+        migrations.RunPython(backfill_user_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:26
+
+from html import unescape
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.html import strip_tags
+
+# Column sets the post search can match, each needs its own FULLTEXT index
+FULLTEXT_INDEXES = {
+    'app_searchdocument_ft_title': 'title',
+    'app_searchdocument_ft_content': 'content',
+    'app_searchdocument_ft_title_content': 'title, content',
+    'app_searchdocument_ft_all': 'title, content, hashtags',
+}
+
+# Number of documents written per INSERT
+BATCH_SIZE = 500
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name, columns in FULLTEXT_INDEXES.items():
+        schema_editor.execute(f'CREATE FULLTEXT INDEX {name} ON app_searchdocument ({columns})')
+
+
+def backfill_search_documents(apps, schema_editor):
+    Post = apps.get_model('app', 'Post')
+    SearchDocument = apps.get_model('app', 'SearchDocument')
+
+    # Written a batch at a time, so memory does not grow with the number of posts
+    documents = []
+    for post in Post.objects.filter(status=1).prefetch_related('hashtags').iterator(chunk_size=BATCH_SIZE):
+        documents.append(SearchDocument(
+            post_id=post.pk,
+            title=post.title,
+            content=unescape(strip_tags(post.content)),
+            hashtags=' '.join(hashtag.name for hashtag in post.hashtags.all()),
+        ))
+        if len(documents) == BATCH_SIZE:
+            SearchDocument.objects.bulk_create(documents)
+            documents = []
+    SearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_post_status_score_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='app.post', verbose_name='Bài viết')),
+                ('title', models.CharField(max_length=255, verbose_name='Tiêu đề')),
+                ('content', models.TextField(verbose_name='Nội dung')),
+                ('hashtags', models.TextField(blank=True, verbose_name='Hashtag')),
+            ],
+        ),
+        migrations.RunPython(add_fulltext_indexes, migrations.RunPython.noop),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.BigIntegerField(unique=True, verbose_name='Bài viết')),
+                ('queued_at', models.DateTimeField(auto_now_add=True, verbose_name='Thời điểm thêm vào hàng đợi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Ngày cập nhật')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['queued_at'], name='app_searchi_queued__740b4b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:29
+
+import math
+from html.parser import HTMLParser
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+# Copies of app.content.derive_content and its settings at the time of this migration,
+# so that it replays the same derivation
+
+# Share of the text of a private post shown to users who did not pay, and its upper bound in characters
+EXCERPT_RATIO = 0.1
+EXCERPT_MAX_CHARS = 1000
+
+# Reading speed used for the estimated reading time
+WORDS_PER_MINUTE = 200
+
+# Tags that separate words in the plain text, inline tags such as <strong> do not
+BLOCK_TAGS = {'address', 'article', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'h1', 'h2',
+              'h3', 'h4', 'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'}
+
+
+class ContentParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.first_image = ''
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+        if tag == 'img' and not self.first_image:
+            self.first_image = dict(attrs).get('src') or ''
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def derive_content(html):
+    html = html or ''
+    parser = ContentParser()
+    parser.feed(html)
+    parser.close()
+
+    plain_text = ' '.join(''.join(parser.parts).split())
+    word_count = len(plain_text.split())
+    excerpt_chars = min(EXCERPT_MAX_CHARS, int(len(plain_text) * EXCERPT_RATIO))
+    return {
+        'plain_text': plain_text,
+        'excerpt': Truncator(html).chars(excerpt_chars, truncate='...', html=True),
+        'word_count': word_count,
+        'reading_time': math.ceil(word_count / WORDS_PER_MINUTE),
+        'first_image': parser.first_image[:500],
+    }
+
+
+def backfill_derived_content(apps, schema_editor):
+    Post = apps.get_model('app', 'Post')
+
+    posts = []
+    for post in Post.objects.only('content').iterator(chunk_size=500):
+        for name, value in derive_content(post.content).items():
+            setattr(post, name, value)
+        posts.append(post)
+        if len(posts) == 500:
+            Post.objects.bulk_update(posts, ['plain_text', 'excerpt', 'word_count', 'reading_time', 'first_image'])
+            posts = []
+    Post.objects.bulk_update(posts, ['plain_text', 'excerpt', 'word_count', 'reading_time', 'first_image'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_searchindextask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Trích đoạn'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='first_image',
+            field=models.CharField(blank=True, editable=False, max_length=500, verbose_name='Ảnh đầu tiên'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='plain_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='Nội dung văn bản'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Thời gian đọc (phút)'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Số từ'),
+        ),
+        migrations.RunPython(backfill_derived_content, migrations.RunPython.noop),
+    ]
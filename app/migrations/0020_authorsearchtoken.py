@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:37
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Copy of app.search.authors.name_tokens at the time of this migration, so that it replays the same tokens
+def name_tokens(user):
+    tokens = set()
+    for field in ('username', 'first_name', 'last_name'):
+        for word in re.findall(r'\w+', (getattr(user, field) or '').lower()):
+            tokens.update(word[i:][:150] for i in range(len(word)))
+    return tokens
+
+
+def backfill_author_tokens(apps, schema_editor):
+    CustomUser = apps.get_model('app', 'CustomUser')
+    AuthorSearchToken = apps.get_model('app', 'AuthorSearchToken')
+
+    tokens = []
+    for user in CustomUser.objects.only('username', 'first_name', 'last_name').iterator(chunk_size=500):
+        tokens.extend(AuthorSearchToken(user_id=user.pk, token=token) for token in name_tokens(user))
+    AuthorSearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_post_status_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=150, verbose_name='Từ khóa')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL, verbose_name='Người dùng')),
+            ],
+            options={
+                'unique_together': {('user', 'token')},
+            },
+        ),
+        migrations.RunPython(backfill_author_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+def add_hashtags_fulltext_index(apps, schema_editor):
+    # The relevance of a search is computed per column, so hashtags need a FULLTEXT index of their own
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('CREATE FULLTEXT INDEX app_searchdocument_ft_hashtags ON app_searchdocument (hashtags)')
+
+
+def remove_hashtags_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX app_searchdocument_ft_hashtags ON app_searchdocument')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_authorsearchtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_hashtags_fulltext_index, remove_hashtags_fulltext_index),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:10
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Number of rows written per query
+BATCH_SIZE = 500
+
+# Copies of app.search.text.fold and app.search.authors.name_tokens at the time of this migration,
+# so that it replays the same folding
+def fold(text):
+    decomposed = unicodedata.normalize('NFD', text.translate(str.maketrans({'đ': 'd', 'Đ': 'D'})))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def name_tokens(user):
+    tokens = set()
+    for field in ('username', 'first_name', 'last_name'):
+        for word in re.findall(r'\w+', fold(getattr(user, field) or '')):
+            tokens.update(word[i:][:150] for i in range(len(word)))
+    return tokens
+
+
+def fold_search_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('app', 'SearchDocument')
+
+    # Written a batch at a time, so memory does not grow with the number of documents
+    documents = []
+    for document in SearchDocument.objects.iterator(chunk_size=BATCH_SIZE):
+        document.title = fold(document.title)
+        document.content = fold(document.content)
+        document.hashtags = fold(document.hashtags)
+        documents.append(document)
+        if len(documents) == BATCH_SIZE:
+            SearchDocument.objects.bulk_update(documents, ['title', 'content', 'hashtags'])
+            documents = []
+    SearchDocument.objects.bulk_update(documents, ['title', 'content', 'hashtags'])
+
+
+def fold_author_tokens(apps, schema_editor):
+    CustomUser = apps.get_model('app', 'CustomUser')
+    AuthorSearchToken = apps.get_model('app', 'AuthorSearchToken')
+
+    AuthorSearchToken.objects.all().delete()
+    tokens = []
+    for user in CustomUser.objects.only('username', 'first_name', 'last_name').iterator(chunk_size=BATCH_SIZE):
+        tokens.extend(AuthorSearchToken(user_id=user.pk, token=token) for token in name_tokens(user))
+        if len(tokens) >= BATCH_SIZE:
+            AuthorSearchToken.objects.bulk_create(tokens)
+            tokens = []
+    AuthorSearchToken.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_searchdocument_hashtags_fulltext'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(fold_author_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:47
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations
+
+# Number of documents written per query
+BATCH_SIZE = 500
+
+# Copy of the bundled wordlist at the time of this migration, words separated by commas
+WORDS = """
+ai, anh, ba, bài, bạn, bao, bên, biết, bỏ, bởi, các, cách, cái, cần, cao, cho, chỉ, chị, chúng, có, con,
+còn, của, cũng, cùng, cứ, dài, dần, do, dù, đã, đang, đây, để, đến, đi, điều, đó, đổi, đông, được, em,
+gì, giờ, hay, hãy, hết, hơn, hỏi, khi, không, là, lại, làm, lên, lần, lớn, lúc, mà, mới, mình, một, mỗi,
+muốn, năm, nào, này, nên, nếu, ngày, người, nhà, nhanh, nhiều, nhỏ, nhưng, những, nói, nữa, ở, phải, qua,
+quá, ra, rất, rồi, sau, sẽ, số, sự, tại, tất, thì, thế, theo, thêm, thường, tốt, trên, trong, trước, từ,
+và, vào, vẫn, về, vì, việc, với, vừa, xem, xong, an toàn, ảnh hưởng, âm nhạc, bài báo, bài học, bài tập,
+bài viết, bán hàng, bản đồ, bảo mật, bảo trì, bảo vệ, bắt đầu, bằng cấp, bất động sản, bệnh viện,
+biến đổi, biến số, biểu đồ, biểu thức, bình luận, bình thường, bộ nhớ, bộ nhớ đệm, bộ phận, bóng đá,
+bởi vì, bức ảnh, ca sĩ, các bạn, cài đặt, cá nhân, cảm ơn, cảm xúc, cạnh tranh, cao cấp, cập nhật,
+cấu hình, cấu trúc, cấu trúc dữ liệu, câu hỏi, câu trả lời, chất lượng, chỉnh sửa, chiến lược, chính phủ,
+chính sách, chính xác, chuyên gia, chuyên môn, chuyên ngành, chức năng, chứng khoán, chương trình,
+có thể, công cụ, công dân, công nghệ, công nghệ thông tin, công nghiệp, công thức, công ty, công việc,
+cộng đồng, cơ bản, cơ hội, cơ sở, cơ sở dữ liệu, cuộc sống, cửa hàng, của mình, dân số, dễ dàng, dịch vụ,
+doanh nghiệp, doanh thu, du lịch, dự án, dự báo, dữ liệu, dữ liệu lớn, dung lượng, đa dạng, đại học,
+đánh giá, đăng ký, đăng nhập, đăng xuất, đào tạo, đặc biệt, đặc điểm, điện thoại, điện thoại di động,
+điện toán đám mây, điều kiện, điều khiển, định dạng, định nghĩa, đóng góp, đối tượng, đồ án, đồ họa,
+độc giả, đội ngũ, đơn giản, đơn vị, đường dẫn, gia đình, giá trị, giải pháp, giải quyết, giải thích,
+giải thuật, giảng viên, giao diện, giao dịch, giáo dục, giáo trình, giáo viên, giới thiệu, gửi bài,
+hạ tầng, hàm số, hàng đợi, hành động, hành vi, hệ điều hành, hệ thống, hiệu năng, hiệu quả, hình ảnh,
+hình thức, hỏi đáp, học bổng, học máy, học sâu, học sinh, học tập, học viên, hoạt động, hoàn thành,
+hỗ trợ, hợp đồng, hướng dẫn, hướng đối tượng, khách hàng, khách sạn, khái niệm, khả năng, khám phá,
+khó khăn, khoa học, khoa học máy tính, khởi nghiệp, khởi tạo, kết nối, kết quả, kiểm thử, kiểm tra,
+kiến thức, kiến trúc, kinh doanh, kinh nghiệm, kinh tế, kỹ năng, kỹ sư, kỹ thuật, lãnh đạo, lập trình,
+lập trình viên, lịch sử, liên kết, liên quan, loại bỏ, lối sống, lỗi, lựa chọn, lượt xem, lưu trữ,
+mã hóa, mã nguồn, mã nguồn mở, mạng máy tính, mạng nơ ron, mạng xã hội, máy bay, máy chủ, máy học,
+máy khách, máy tính, máy tính bảng, mật khẩu, mô hình, mô tả, môi trường, mục tiêu, nâng cao, năng lượng,
+nền tảng, nghề nghiệp, nghiên cứu, ngoại ngữ, ngôn ngữ, ngôn ngữ lập trình, người dùng, nguyên lý,
+nhà hàng, nhà phát triển, nhân viên, nhận dạng, nhận xét, nhiệm vụ, nội dung, nông nghiệp, phần cứng,
+phần mềm, phần tử, phân tích, phân loại, phát triển, phỏng vấn, phổ biến, phụ huynh, phương pháp,
+phương thức, quan hệ, quan trọng, quản lý, quản trị, quốc gia, quốc tế, quy trình, sản phẩm, sản xuất,
+sáng tạo, sinh viên, sở thích, sức khỏe, sự kiện, tác giả, tác vụ, tài khoản, tài liệu, tài chính,
+tải lên, tải xuống, tăng trưởng, tập tin, thành công, thành phần, thành phố, thành viên, thay đổi,
+thảo luận, thể thao, thị trường, thiết bị, thiết kế, thiết lập, thông báo, thông tin, thông số,
+thời gian, thời tiết, thuật toán, thư viện, thực hành, thực phẩm, thực tế, thực tập, thương mại,
+thương mại điện tử, tiếng anh, tiếng việt, tiêu chuẩn, tìm kiếm, tin học, tin tức, tính năng, tổ chức,
+tối ưu, tối ưu hóa, tổng hợp, trả lời, trải nghiệm, trang chủ, trang web, trí tuệ, trí tuệ nhân tạo,
+triển khai, trình duyệt, trình biên dịch, trực tuyến, trường học, truy cập, truy vấn, truyền thông,
+từ khóa, tuyển dụng, tư duy, tương lai, tương tác, ứng dụng, ứng viên, ưu điểm, văn bản, văn hóa,
+văn phòng, vấn đề, vật lý, việt nam, việc làm, viết bài, xã hội, xác thực, xây dựng, xe máy, xử lý,
+xử lý ảnh, xử lý ngôn ngữ tự nhiên, y tế, yêu cầu, hà nội, hồ chí minh, đà nẵng
+"""
+
+
+# Copy of app.search.text.VietnameseTokenizer at the time of this migration, so that it replays the same segmentation
+def fold(text):
+    decomposed = unicodedata.normalize('NFD', text.translate(str.maketrans({'đ': 'd', 'Đ': 'D'})))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def query_terms(text):
+    return re.findall(r'\w+', fold(text))
+
+
+class VietnameseTokenizer:
+    def __init__(self):
+        self.words = set()
+        self.syllables = set()
+        self.max_length = 1
+        for word in WORDS.split(','):
+            syllables = query_terms(word)
+            if not syllables:
+                continue
+            self.syllables.update(syllables)
+            if len(syllables) > 1:
+                self.words.add('_'.join(syllables))
+                self.max_length = max(self.max_length, len(syllables))
+
+    def _word_at(self, syllables, start):
+        for length in range(min(self.max_length, len(syllables) - start), 1, -1):
+            if '_'.join(syllables[start:start + length]) in self.words:
+                return length
+        return 0
+
+    def tokens(self, text):
+        syllables = query_terms(text)
+        tokens = []
+        run = []
+        position = 0
+        while position < len(syllables):
+            length = self._word_at(syllables, position)
+            syllable = syllables[position]
+            if length or syllable not in self.syllables:
+                tokens.extend(self._bigrams(run))
+                run = []
+                tokens.append('_'.join(syllables[position:position + length]) if length else syllable)
+                position += length or 1
+            else:
+                run.append(syllable)
+                position += 1
+        tokens.extend(self._bigrams(run))
+        return tokens
+
+    def _bigrams(self, run):
+        return ['_'.join(run[i:i + 2]) for i in range(len(run) - 1)] + run[-1:]
+
+
+def segment_search_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('app', 'SearchDocument')
+
+    # Another tokenizer is applied by rebuild_search_index, the documents are left as they are
+    if getattr(settings, 'SEARCH_TOKENIZER', None) not in (None, '', 'app.search.text.VietnameseTokenizer'):
+        return
+    tokenizer = VietnameseTokenizer()
+    # Written a batch at a time, so memory does not grow with the number of documents
+    documents = []
+    for document in SearchDocument.objects.iterator(chunk_size=BATCH_SIZE):
+        for field in ('title', 'content', 'hashtags'):
+            setattr(document, field, ' '.join(tokenizer.tokens(getattr(document, field))))
+        documents.append(document)
+        if len(documents) == BATCH_SIZE:
+            SearchDocument.objects.bulk_update(documents, ['title', 'content', 'hashtags'])
+            documents = []
+    SearchDocument.objects.bulk_update(documents, ['title', 'content', 'hashtags'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_fold_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(segment_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_segment_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewerSketch',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='viewer_sketch', serialize=False, to='app.post', verbose_name='Bài viết')),
+                ('registers', models.BinaryField(verbose_name='Thanh ghi')),
+                ('unique_viewers', models.IntegerField(default=0, verbose_name='Số người xem')),
+            ],
+        ),
+    ]
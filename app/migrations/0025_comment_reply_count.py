@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:04
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def backfill_reply_counts(apps, schema_editor):
+    Comment = apps.get_model('app', 'Comment')
+    Post = apps.get_model('app', 'Post')
+
+    # Root comments used to reply to the placeholder comment -1, they have no parent now
+    placeholder = Comment.objects.filter(pk=-1).first()
+    if placeholder is not None:
+        Comment.objects.filter(parent_id=-1).update(parent=None)
+        Post.objects.filter(pk=placeholder.post_id).update(comment_count=F('comment_count') - 1)
+        placeholder.delete()
+
+    # MySQL cannot update a table from a subquery of the same table: the counts are grouped in Python
+    by_count = defaultdict(list)
+    for parent_id, count in (Comment.objects.filter(parent__isnull=False).order_by().values('parent')
+                             .annotate(count=Count('pk')).values_list('parent', 'count')):
+        by_count[count].append(parent_id)
+    for count, parent_ids in by_count.items():
+        for start in range(0, len(parent_ids), 1000):
+            Comment.objects.filter(pk__in=parent_ids[start:start + 1000]).update(reply_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_postviewersketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.IntegerField(default=0, verbose_name='Số lượng trả lời'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'parent', '-updated_at', '-id'], name='app_comment_post_id_084426_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent', '-updated_at', '-id'], name='app_comment_parent__64e57d_idx'),
+        ),
+        migrations.RunPython(backfill_reply_counts, migrations.RunPython.noop),
+    ]
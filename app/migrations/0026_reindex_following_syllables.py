@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:18
+
+from django.db import migrations
+
+# Number of tasks written per INSERT
+BATCH_SIZE = 1000
+
+
+def queue_published_posts(apps, schema_editor):
+    # The documents are indexed under new terms: every published post is queued for the index worker,
+    # which also refreshes the SQLite index that a migration cannot reach
+    Post = apps.get_model('app', 'Post')
+    SearchIndexTask = apps.get_model('app', 'SearchIndexTask')
+
+    post_ids = Post.objects.filter(status=1).order_by('pk').values_list('pk', flat=True)
+    tasks = []
+    for post_id in post_ids.iterator(chunk_size=BATCH_SIZE):
+        tasks.append(SearchIndexTask(post_id=post_id))
+        if len(tasks) == BATCH_SIZE:
+            SearchIndexTask.objects.bulk_create(tasks, ignore_conflicts=True)
+            tasks = []
+    SearchIndexTask.objects.bulk_create(tasks, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_comment_reply_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_published_posts, migrations.RunPython.noop),
+    ]
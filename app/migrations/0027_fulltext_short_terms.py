@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:10
+
+from django.db import migrations
+
+# Every FULLTEXT index of the search documents, created by 0016 and 0021
+FULLTEXT_INDEXES = {
+    'app_searchdocument_ft_title': 'title',
+    'app_searchdocument_ft_content': 'content',
+    'app_searchdocument_ft_title_content': 'title, content',
+    'app_searchdocument_ft_all': 'title, content, hashtags',
+    'app_searchdocument_ft_hashtags': 'hashtags',
+}
+
+
+def _recreate_fulltext_indexes(schema_editor, stopwords):
+    # InnoDB reads the token size of the server and the stopword setting of the session when an index is created.
+    # The default stopwords hold folded Vietnamese syllables (an, la, de, ...), so they are turned off,
+    # and the indexes pick up an innodb_ft_min_token_size lowered since they were created.
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'SET SESSION innodb_ft_enable_stopword = {"ON" if stopwords else "OFF"}')
+    for name, columns in FULLTEXT_INDEXES.items():
+        schema_editor.execute(f'DROP INDEX {name} ON app_searchdocument')
+        schema_editor.execute(f'CREATE FULLTEXT INDEX {name} ON app_searchdocument ({columns})')
+    schema_editor.execute('SET SESSION innodb_ft_enable_stopword = DEFAULT')
+
+
+def index_without_stopwords(apps, schema_editor):
+    _recreate_fulltext_indexes(schema_editor, stopwords=False)
+
+
+def index_with_stopwords(apps, schema_editor):
+    _recreate_fulltext_indexes(schema_editor, stopwords=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_reindex_following_syllables'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_without_stopwords, index_with_stopwords),
+    ]
@@ -4,7 +4,34 @@ from ckeditor.fields import RichTextField
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 
-class CustomUser(AbstractUser):
+from .content import derive_content
+
+
+class CounterFieldsMixin:
+    """
+    Model whose COUNTER_FIELDS are maintained with F() expressions by app.counters or app.viewcounts:
+    saving a loaded instance writes every other field, so a stale instance does not overwrite the counters.
+    Deferred fields are not written either, they would be loaded again one query each.
+    """
+    COUNTER_FIELDS = ()
+
+    def saved_fields(self, update_fields=None):
+        """
+        Return the update_fields of a save: the given ones, or the loaded fields but the counters
+        for an instance loaded from the database
+        """
+        if update_fields is not None or self._state.adding:
+            return update_fields
+        skipped = set(self.COUNTER_FIELDS) | self.get_deferred_fields()
+        return [field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped]
+
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = self.saved_fields(kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
+
+
+class CustomUser(CounterFieldsMixin, AbstractUser):
     """
     Model custom more information for user
     """
@@ -37,6 +64,41 @@ class CustomUser(AbstractUser):
     is_deleted = models.BooleanField(
         verbose_name=_('Trạng thái xóa'),
         default=False)
+    follower_count = models.IntegerField(
+        verbose_name=_('Số người theo dõi'),
+        default=0)
+    following_count = models.IntegerField(
+        verbose_name=_('Số người đang theo dõi'),
+        default=0)
+    post_count = models.IntegerField(
+        verbose_name=_('Số bài viết'),
+        default=0)
+
+    COUNTER_FIELDS = ('follower_count', 'following_count', 'post_count')
+
+    # Fields of the author search and suggestions, compared with their loaded values
+    # so that the other saves (last login, counters, profile) do not reindex the user
+    SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_search_values = instance._search_values()
+        return instance
+
+    def _search_values(self):
+        # Deferred fields are not loaded by the comparison
+        return {name: self.__dict__.get(name) for name in self.SEARCH_FIELDS}
+
+    def changed_search_fields(self):
+        """
+        Return the search fields changed since the user was loaded or saved, all of them for a new user
+        """
+        saved = getattr(self, '_saved_search_values', None)
+        if saved is None:
+            return set(self.SEARCH_FIELDS)
+        current = self._search_values()
+        return {name for name in self.SEARCH_FIELDS if current[name] != saved[name]}
 
     def __str__(self):
         """
@@ -44,6 +106,13 @@ class CustomUser(AbstractUser):
         """
         return self.username
 
+    def save(self, *args, **kwargs):
+        """
+        Override save method so the next changes of the search fields are compared with the saved values
+        """
+        super().save(*args, **kwargs)
+        self._saved_search_values = self._search_values()
+
     def delete(self, using=None, keep_parents=False):
         """
         Override delete method
@@ -110,10 +179,21 @@ class Follow(models.Model):
         return self.follower.username + " followed " + self.followed.username
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def with_engagement(self):
+        """
+        Queryset for post listings: the author comes in the same query, the hashtags in one more,
+        and the engagement counters are read from the columns kept in sync by app.counters
+        """
+        return self.select_related('user').prefetch_related('hashtags').defer('content', 'plain_text', 'excerpt')
+
+
+class Post(CounterFieldsMixin, models.Model):
     """
     Model representing a post
     """
+    objects = PostQuerySet.as_manager()
+
     user = models.ForeignKey(
         verbose_name=_('Người đăng'),
         to=CustomUser,
@@ -159,9 +239,61 @@ class Post(models.Model):
         verbose_name=_('Đã xóa'),
         default=False
     )
+    score = models.IntegerField(
+        verbose_name=_('Tổng đánh giá'),
+        default=0
+    )
+    upvotes = models.IntegerField(
+        verbose_name=_('Số lượt upvote'),
+        default=0
+    )
+    downvotes = models.IntegerField(
+        verbose_name=_('Số lượt downvote'),
+        default=0
+    )
+    comment_count = models.IntegerField(
+        verbose_name=_('Số lượng bình luận'),
+        default=0
+    )
+    bookmark_count = models.IntegerField(
+        verbose_name=_('Số lượng Bookmark'),
+        default=0
+    )
+    plain_text = models.TextField(
+        verbose_name=_('Nội dung văn bản'),
+        blank=True,
+        editable=False
+    )
+    excerpt = models.TextField(
+        verbose_name=_('Trích đoạn'),
+        blank=True,
+        editable=False
+    )
+    word_count = models.IntegerField(
+        verbose_name=_('Số từ'),
+        default=0,
+        editable=False
+    )
+    reading_time = models.IntegerField(
+        verbose_name=_('Thời gian đọc (phút)'),
+        default=0,
+        editable=False
+    )
+    first_image = models.CharField(
+        verbose_name=_('Ảnh đầu tiên'),
+        max_length=500,
+        blank=True,
+        editable=False
+    )
+
+    COUNTER_FIELDS = ('score', 'upvotes', 'downvotes', 'comment_count', 'bookmark_count', 'view_count')
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-score']),
+            models.Index(fields=['status', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         """
@@ -169,6 +301,20 @@ class Post(models.Model):
         """
         return self.user.username + " posted " + self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Override save method so the values derived from the content are refreshed with it
+        """
+        update_fields = self.saved_fields(kwargs.get('update_fields'))
+        if update_fields is None or 'content' in update_fields:
+            derived = derive_content(self.content)
+            for name, value in derived.items():
+                setattr(self, name, value)
+            if update_fields is not None:
+                update_fields = set(update_fields) | set(derived)
+        kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
 
 class Category(models.Model):
     """
@@ -287,7 +433,7 @@ class ReportPost(models.Model):
         return self.reporter.username + " reported " + self.reported_post.title + " for " + self.reason
 
 
-class Comment(models.Model):
+class Comment(CounterFieldsMixin, models.Model):
     """
     Model representing a comment
     """
@@ -314,6 +460,18 @@ class Comment(models.Model):
     updated_at = models.DateTimeField(
         verbose_name=_('Ngày chỉnh sửa'),
         auto_now=True)
+    reply_count = models.IntegerField(
+        verbose_name=_('Số lượng trả lời'),
+        default=0)
+
+    COUNTER_FIELDS = ('reply_count',)
+
+    class Meta:
+        indexes = [
+            # Root comments of a post and replies of a comment, a page at a time
+            models.Index(fields=['post', 'parent', '-updated_at', '-id']),
+            models.Index(fields=['parent', '-updated_at', '-id']),
+        ]
 
     def __str__(self):
         """
@@ -381,3 +539,253 @@ class Notification(models.Model):
         String for representing the Model object.
         """
         return self.user.username + " got notification " + self.content
+
+
+class TrendingPost(models.Model):
+    """
+    Model representing a precomputed trending post leaderboard entry
+    """
+    days = models.IntegerField(
+        verbose_name=_('Khoảng thời gian (ngày)'))
+    post = models.ForeignKey(
+        verbose_name=_('Bài viết'),
+        to=Post,
+        on_delete=models.CASCADE)
+    r_count = models.IntegerField(
+        verbose_name=_('Số lượt upvote'),
+        default=0)
+
+    class Meta:
+        unique_together = ('days', 'post')
+        indexes = [
+            models.Index(fields=['days', '-r_count']),
+        ]
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return self.post.title + " trending in " + str(self.days) + " days"
+
+
+class AuthorLiker(models.Model):
+    """
+    Model representing a user who upvoted an author's posts on a day
+    """
+    author = models.ForeignKey(
+        verbose_name=_('Tác giả'),
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name='liked_by_days')
+    liker = models.ForeignKey(
+        verbose_name=_('Người upvote'),
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name='liked_author_days')
+    day = models.DateField(
+        verbose_name=_('Ngày'))
+
+    class Meta:
+        unique_together = ('author', 'liker', 'day')
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return self.liker.username + " liked " + self.author.username + " on " + str(self.day)
+
+
+class FamousAuthor(models.Model):
+    """
+    Model representing a precomputed famous author leaderboard entry
+    """
+    days = models.IntegerField(
+        verbose_name=_('Khoảng thời gian (ngày)'))
+    author = models.ForeignKey(
+        verbose_name=_('Tác giả'),
+        to=CustomUser,
+        on_delete=models.CASCADE)
+    liked_people = models.IntegerField(
+        verbose_name=_('Số người upvote'),
+        default=0)
+
+    class Meta:
+        unique_together = ('days', 'author')
+        indexes = [
+            models.Index(fields=['days', '-liked_people']),
+        ]
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return self.author.username + " famous in " + str(self.days) + " days"
+
+
+class HashTagSketch(models.Model):
+    """
+    Model representing a checkpoint of the trending hashtag heavy hitters summary.
+    window = 0 holds the hashtags published on `day`, window = N the merge of the N - 1 days before `day`
+    """
+    window = models.IntegerField(
+        verbose_name=_('Khoảng thời gian (ngày)'),
+        default=0)
+    day = models.DateField(
+        verbose_name=_('Ngày'))
+    counters = models.JSONField(
+        verbose_name=_('Bộ đếm'),
+        default=dict)
+
+    class Meta:
+        unique_together = ('window', 'day')
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return "Hashtag sketch of " + str(self.window) + " days on " + str(self.day)
+
+
+class PostViewerSketch(models.Model):
+    """
+    Model representing the HyperLogLog sketch of the distinct viewers of a post
+    and the unique viewer count estimated from it
+    """
+    post = models.OneToOneField(
+        verbose_name=_('Bài viết'),
+        to=Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='viewer_sketch')
+    registers = models.BinaryField(
+        verbose_name=_('Thanh ghi'))
+    unique_viewers = models.IntegerField(
+        verbose_name=_('Số người xem'),
+        default=0)
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return "Viewers of post " + str(self.post_id)
+
+
+class ReactionRollup(models.Model):
+    """
+    Model representing the reactions of a post within one hour/day bucket
+    """
+    HOUR = 0
+    DAY = 1
+
+    post = models.ForeignKey(
+        verbose_name=_('Bài viết'),
+        to=Post,
+        on_delete=models.CASCADE)
+    author = models.ForeignKey(
+        verbose_name=_('Tác giả'),
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name='reaction_rollups')
+    granularity = models.IntegerField(
+        verbose_name=_('Độ chi tiết'),
+        choices=((HOUR, _('Hour')), (DAY, _('Day'))))
+    bucket = models.DateTimeField(
+        verbose_name=_('Thời điểm bắt đầu'))
+    upvotes = models.IntegerField(
+        verbose_name=_('Số lượt upvote'),
+        default=0)
+    downvotes = models.IntegerField(
+        verbose_name=_('Số lượt downvote'),
+        default=0)
+
+    class Meta:
+        unique_together = ('post', 'granularity', 'bucket')
+        indexes = [
+            models.Index(fields=['bucket']),
+            models.Index(fields=['author', 'bucket']),
+        ]
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return self.post.title + " reactions at " + str(self.bucket)
+
+
+class SearchDocument(models.Model):
+    """
+    Model representing the indexed text of a published post, searched through FULLTEXT indexes on MySQL
+    """
+    post = models.OneToOneField(
+        verbose_name=_('Bài viết'),
+        to=Post,
+        on_delete=models.CASCADE,
+        primary_key=True)
+    title = models.CharField(
+        verbose_name=_('Tiêu đề'),
+        max_length=255)
+    content = models.TextField(
+        verbose_name=_('Nội dung'))
+    hashtags = models.TextField(
+        verbose_name=_('Hashtag'),
+        blank=True)
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return self.title
+
+
+class SearchIndexTask(models.Model):
+    """
+    Model representing a post waiting to be (re)indexed or removed by the search index worker
+    """
+    post_id = models.BigIntegerField(
+        verbose_name=_('Bài viết'),
+        unique=True)
+    queued_at = models.DateTimeField(
+        verbose_name=_('Thời điểm thêm vào hàng đợi'),
+        auto_now_add=True)
+    updated_at = models.DateTimeField(
+        verbose_name=_('Ngày cập nhật'),
+        auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['queued_at']),
+        ]
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return "Index post " + str(self.post_id)
+
+
+class AuthorSearchToken(models.Model):
+    """
+    Model representing a suffix of a word of the username or full name of a user,
+    so author search is a prefix lookup on an index instead of a scan of every name
+    """
+    user = models.ForeignKey(
+        verbose_name=_('Người dùng'),
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name='search_tokens')
+    token = models.CharField(
+        verbose_name=_('Từ khóa'),
+        max_length=150,
+        db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'token')
+
+    def __str__(self):
+        """
+        String for representing the Model object.
+        """
+        return self.user.username + " " + self.token
@@ -0,0 +1,164 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Cursor that starts from the end of a listing
+LAST = 'last'
+
+
+def encode_cursor(direction, values=None):
+    """
+    Build an opaque cursor token: the direction to read ('n'ext or 'p'revious) and the sort key to seek from
+    """
+    values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values or []]
+    data = json.dumps({'d': direction, 'v': values}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Return the direction and the sort key of a cursor token, (None, None) when it is missing or invalid
+    """
+    if not token:
+        return None, None
+    if token == LAST:
+        return 'p', None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        direction, values = data['d'], data['v']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None, None
+    if direction not in ('n', 'p') or not isinstance(values, list):
+        return None, None
+    return direction, values
+
+
+class CursorPage:
+    """
+    Page of a cursor paginated listing, with the tokens of its neighbour pages
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.last_cursor = LAST
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator of a queryset: a page seeks past the sort key of the previous one instead of counting rows
+    and using OFFSET, so every page costs the same. The ordering must end with a unique field.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-pk')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    def _field(self, name):
+        meta = self.queryset.model._meta
+        return meta.pk if name == 'pk' else meta.get_field(name)
+
+    def _key(self, obj):
+        return [getattr(obj, name) for name, descending in self.ordering]
+
+    def _seek(self, values, forward):
+        """
+        Filter the rows after (forward) or before the given sort key, in the paginator ordering
+        """
+        query = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            query |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return query
+
+    def _order_by(self, forward):
+        return [('-' if descending == forward else '') + name for name, descending in self.ordering]
+
+    def page(self, cursor=None):
+        direction, values = decode_cursor(cursor)
+        if values is not None and len(values) != len(self.ordering):
+            direction = values = None
+        if values is not None:
+            try:
+                values = [self._field(name).to_python(value)
+                          for (name, descending), value in zip(self.ordering, values)]
+            except (ValidationError, TypeError, ValueError):
+                # A forged cursor can hold values of any JSON type
+                direction = values = None
+            if values is not None and None in values:
+                direction = values = None
+
+        forward = direction != 'p'
+        queryset = self.queryset
+        if values:
+            queryset = queryset.filter(self._seek(values, forward))
+        rows = list(queryset.order_by(*self._order_by(forward))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return self.page() if direction else CursorPage([])
+
+        came_from = direction is not None and values is not None
+        next_cursor = previous_cursor = None
+        if (has_more if forward else came_from):
+            next_cursor = encode_cursor('n', self._key(rows[-1]))
+        if (came_from if forward else has_more):
+            previous_cursor = encode_cursor('p', self._key(rows[0]))
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+class ListCursorPaginator:
+    """
+    Cursor paginator of an ordered list of ids, such as cached search results.
+    The cursor holds the id the page starts after (or ends before).
+    """
+
+    def __init__(self, ids, per_page):
+        self.ids = ids
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        direction, values = decode_cursor(cursor)
+        if direction == 'p' and values is None:
+            start = max(0, len(self.ids) - self.per_page)
+        elif direction is not None and values and values[0] in self.ids:
+            position = self.ids.index(values[0])
+            start = position + 1 if direction == 'n' else max(0, position - self.per_page)
+        else:
+            start = 0
+
+        ids = self.ids[start:start + self.per_page]
+        next_cursor = previous_cursor = None
+        if start + self.per_page < len(self.ids):
+            next_cursor = encode_cursor('n', [ids[-1]])
+        if start > 0:
+            previous_cursor = encode_cursor('p', [ids[0]])
+        return CursorPage(ids, next_cursor, previous_cursor)
@@ -0,0 +1,56 @@
+from django.db.models import BooleanField, Exists, OuterRef, Subquery, Value, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+
+from .models import Bookmark, Follow, Post, PostPaid, PostReaction, PostViewerSketch
+
+
+def viewer_state(viewer):
+    """
+    Annotations of a post queryset with the relation of the viewer to each post and its author,
+    computed by subqueries of the post query itself
+    """
+    if not viewer.is_authenticated:
+        return {
+            'is_bookmarked': Value(False, output_field=BooleanField()),
+            'is_following': Value(False, output_field=BooleanField()),
+            'is_paid': Value(False, output_field=BooleanField()),
+            'reacted_value': Value(None, output_field=PostReaction._meta.get_field('feedback_value')),
+        }
+    return {
+        'is_bookmarked': Exists(Bookmark.objects.filter(user=viewer, post=OuterRef('pk'))),
+        'is_following': Exists(Follow.objects.filter(follower=viewer, followed=OuterRef('user'))),
+        'is_paid': Exists(PostPaid.objects.filter(user=viewer, post=OuterRef('pk'))),
+        'reacted_value': Subquery(
+            PostReaction.objects.filter(user=viewer, post=OuterRef('pk')).values('feedback_value')[:1]),
+    }
+
+
+def get_post_detail(primary_key, viewer):
+    """
+    Load a post with its author, its unique viewer estimate and the state of the viewer in one query,
+    or raise Http404
+    """
+    unique_viewers = PostViewerSketch.objects.filter(post=OuterRef('pk')).values('unique_viewers')[:1]
+    return get_object_or_404(
+        Post.objects.select_related('user').defer('plain_text')
+        .annotate(unique_viewers=Coalesce(Subquery(unique_viewers), 0), **viewer_state(viewer)),
+        pk=primary_key,
+    )
+
+
+def is_visible(post, viewer):
+    """
+    Return whether the viewer may read a post: published posts are public, drafts and pending posts
+    are shown to their author, and superusers see every post
+    """
+    if post.status == 1 or viewer.is_superuser:
+        return True
+    return post.status in [0, 4] and post.user_id == viewer.pk
+
+
+def prefetch_post_detail(post):
+    """
+    Load the categories and hashtags of a post shown in full, one query each
+    """
+    prefetch_related_objects([post], 'categories', 'hashtags')
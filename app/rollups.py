@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from .models import ReactionRollup
+
+HOUR = ReactionRollup.HOUR
+DAY = ReactionRollup.DAY
+
+# Hourly buckets older than this are folded into daily buckets by compact_rollups
+HOURLY_RETENTION = timedelta(days=2)
+
+
+def truncate(time, granularity):
+    """
+    Return the start of the hour/day bucket that time falls into
+    """
+    time = time.replace(minute=0, second=0, microsecond=0)
+    if granularity == DAY:
+        time = time.replace(hour=0)
+    return time
+
+
+def _add(post_id, author_id, granularity, bucket, upvotes, downvotes):
+    rollups = ReactionRollup.objects.filter(post_id=post_id, granularity=granularity, bucket=bucket)
+    if rollups.update(upvotes=F('upvotes') + upvotes, downvotes=F('downvotes') + downvotes):
+        return
+    rollup, created = ReactionRollup.objects.get_or_create(
+        post_id=post_id, granularity=granularity, bucket=bucket,
+        defaults={'author_id': author_id, 'upvotes': upvotes, 'downvotes': downvotes})
+    if not created:
+        rollups.update(upvotes=F('upvotes') + upvotes, downvotes=F('downvotes') + downvotes)
+
+
+def record_reaction(post, reaction_time, old_value, new_value):
+    """
+    Apply one reaction change to the bucket its reaction time falls into.
+    old_value/new_value are the feedback values before/after the change, None when there is no reaction.
+    """
+    upvotes = int(new_value == 1) - int(old_value == 1)
+    downvotes = int(new_value == -1) - int(old_value == -1)
+    if upvotes == 0 and downvotes == 0:
+        return
+
+    # Reactions older than the hourly retention go straight to their daily bucket
+    if reaction_time < timezone.now() - HOURLY_RETENTION:
+        granularity = DAY
+    else:
+        granularity = HOUR
+    _add(post.pk, post.user_id, granularity, truncate(reaction_time, granularity), upvotes, downvotes)
+
+
+def window_totals(start, group_by='post'):
+    """
+    Sum the upvotes/downvotes of every bucket since start, grouped by post or author.
+    Each bucket is compared with start truncated to its own granularity, so the daily bucket
+    of the first day, compacted or not, is counted.
+    """
+    return (
+        ReactionRollup.objects.filter(Q(granularity=HOUR, bucket__gte=truncate(start, HOUR))
+                                      | Q(granularity=DAY, bucket__gte=truncate(start, DAY)))
+        .values(group_by)
+        .annotate(total_upvotes=Sum('upvotes'), total_downvotes=Sum('downvotes'))
+    )
+
+
+@transaction.atomic
+def compact_rollups(now=None):
+    """
+    Fold hourly buckets older than HOURLY_RETENTION into daily buckets, return the number of folded buckets
+    """
+    cutoff = truncate((now or timezone.now()) - HOURLY_RETENTION, DAY)
+    hourly = ReactionRollup.objects.filter(granularity=HOUR, bucket__lt=cutoff)
+    days = list(
+        hourly.annotate(day=TruncDay('bucket'))
+        .values('post', 'author', 'day')
+        .annotate(total_upvotes=Sum('upvotes'), total_downvotes=Sum('downvotes'))
+        .order_by()
+    )
+    for row in days:
+        _add(row['post'], row['author'], DAY, row['day'], row['total_upvotes'], row['total_downvotes'])
+    return hourly.delete()[0]
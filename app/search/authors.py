@@ -0,0 +1,50 @@
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from ..models import AuthorSearchToken, CustomUser, Follow
+from .text import query_terms
+
+# User fields an author can be found by
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def name_tokens(user):
+    """
+    Return every suffix of the accent folded words of the names of a user: a prefix of a suffix is any part
+    of a word, so the lookups behave like the former icontains while using the token index
+    """
+    tokens = set()
+    for field in NAME_FIELDS:
+        for word in query_terms(getattr(user, field) or ''):
+            tokens.update(word[i:][:150] for i in range(len(word)))
+    return tokens
+
+
+def index_author(user):
+    """
+    Replace the search tokens of a user after a change of their names
+    """
+    tokens = name_tokens(user)
+    AuthorSearchToken.objects.filter(user=user).exclude(token__in=tokens).delete()
+    existing = set(AuthorSearchToken.objects.filter(user=user).values_list('token', flat=True))
+    AuthorSearchToken.objects.bulk_create(
+        [AuthorSearchToken(user=user, token=token) for token in tokens - existing], ignore_conflicts=True)
+
+
+def search_authors(keyword, viewer=None):
+    """
+    Build the queryset of the users whose names contain every word of the keyword,
+    with the post and follower counts and whether the viewer follows them read in the same query
+    """
+    terms = query_terms(keyword)
+    if not terms:
+        return CustomUser.objects.none()
+
+    authors = CustomUser.objects.all()
+    for term in terms:
+        authors = authors.filter(pk__in=AuthorSearchToken.objects.filter(token__startswith=term).values('user'))
+
+    if viewer is not None and viewer.is_authenticated:
+        is_following = Exists(Follow.objects.filter(follower=viewer, followed=OuterRef('pk')))
+    else:
+        is_following = Value(False, output_field=BooleanField())
+    return authors.annotate(is_following=is_following)
@@ -0,0 +1,259 @@
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .text import get_tokenizer
+
+# Columns of an indexed post document
+FIELDS = ('title', 'content', 'hashtags')
+
+# Number of best text matches of a query returned by the backends at once: a search ranks this many matches
+# passing its filters (plus the exact hashtag matches) and every one of them can be paged through,
+# weaker matches are not reachable
+MAX_RESULTS = 1000
+
+# Number of stale documents removed at once at the end of a rebuild
+REMOVE_BATCH_SIZE = 1000
+
+# Weight of a match in each column in the relevance of a post
+FIELD_BOOSTS = {'title': 3.0, 'content': 1.0, 'hashtags': 2.0}
+
+
+class SearchBackend:
+    """
+    Interface of the full-text indexes used for post search.
+    Documents are dicts with an id and the FIELDS columns, which the tokenizer turns into the indexed terms.
+    """
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def tokenize(self, document):
+        """
+        Return the columns of a document as space separated index terms
+        """
+        return {field: ' '.join(self.tokenizer.index_tokens(document[field])) for field in FIELDS}
+
+    def index(self, documents):
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def indexed_ids(self):
+        """
+        Return the ids of the indexed posts
+        """
+        raise NotImplementedError
+
+    def rebuild(self, batches):
+        """
+        Replace the indexed documents by the given batches of documents, return the number of documents indexed.
+        Searches keep finding the current documents meanwhile: each batch replaces its own documents,
+        then the documents indexed before the rebuild that were in no batch are removed.
+        The ones indexed meanwhile by the index worker are kept.
+        """
+        previous = set(self.indexed_ids())
+        indexed = set()
+        for documents in batches:
+            self.index(documents)
+            indexed.update(document['id'] for document in documents)
+        stale = list(previous - indexed)
+        for start in range(0, len(stale), REMOVE_BATCH_SIZE):
+            self.remove(stale[start:start + REMOVE_BATCH_SIZE])
+        return len(indexed)
+
+    def search(self, query, fields=FIELDS, limit=MAX_RESULTS):
+        """
+        Return the ids of the posts matching every term of the query in one of the fields, best match first
+        """
+        return [post_id for post_id, relevance in self.search_scored(query, fields, limit)]
+
+    def search_scored(self, query, fields=FIELDS, limit=MAX_RESULTS, boosts=FIELD_BOOSTS, offset=0):
+        """
+        Return (post id, relevance) pairs of the matching posts, best match first, skipping the first offset ones.
+        The relevance is positive, with the matches in each column weighted by its boost.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    Sidecar SQLite FTS5 index stored next to the database, usable without a search server
+    """
+
+    def __init__(self, path=None, tokenizer=None):
+        super().__init__(tokenizer)
+        self.path = str(path or getattr(settings, 'SEARCH_INDEX_PATH', settings.BASE_DIR / 'search_index.sqlite3'))
+        self._local = threading.local()
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._create_table(db)
+            self._local.db = db
+        return db
+
+    def _create_table(self, db, table='post_fts'):
+        # Underscores join the syllables of segmented words and must not split terms
+        db.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(title, content, hashtags, '
+                   'tokenize="unicode61 tokenchars \'_\'")')
+
+    def _tables(self, db):
+        # A table being rebuilt gets the changes made meanwhile too
+        return ['post_fts'] + [row[0] for row in db.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'post_fts_rebuild'")]
+
+    def _write(self, db, table, documents):
+        db.executemany(f'DELETE FROM {table} WHERE rowid = ?', [(document['id'],) for document in documents])
+        db.executemany(f'INSERT INTO {table} (rowid, title, content, hashtags) VALUES (?, ?, ?, ?)',
+                       [(document['id'], *self.tokenize(document).values()) for document in documents])
+
+    def index(self, documents):
+        db = self._connect()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            for table in self._tables(db):
+                self._write(db, table, documents)
+
+    def remove(self, post_ids):
+        db = self._connect()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            for table in self._tables(db):
+                db.executemany(f'DELETE FROM {table} WHERE rowid = ?', [(post_id,) for post_id in post_ids])
+
+    def indexed_ids(self):
+        return [row[0] for row in self._connect().execute('SELECT rowid FROM post_fts')]
+
+    def rebuild(self, batches):
+        """
+        Build the documents into a new table swapped in at the end, which also applies a change of the tokenizer
+        options of the table. Searches read the current table until then.
+        """
+        db = self._connect()
+        with db:
+            db.execute('DROP TABLE IF EXISTS post_fts_rebuild')
+            self._create_table(db, 'post_fts_rebuild')
+        indexed = 0
+        try:
+            for documents in batches:
+                with db:
+                    db.execute('BEGIN IMMEDIATE')
+                    self._write(db, 'post_fts_rebuild', documents)
+                indexed += len(documents)
+        except BaseException:
+            with db:
+                db.execute('DROP TABLE IF EXISTS post_fts_rebuild')
+            raise
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute('DROP TABLE IF EXISTS post_fts')
+            db.execute('ALTER TABLE post_fts_rebuild RENAME TO post_fts')
+        return indexed
+
+    def search_scored(self, query, fields=FIELDS, limit=MAX_RESULTS, boosts=FIELD_BOOSTS, offset=0):
+        terms = self.tokenizer.tokens(query)
+        if not terms:
+            return []
+        # Every term is matched as a prefix, restricted to the requested columns
+        match = '{%s}: (%s)' % (' '.join(fields), ' '.join(f'"{term}"*' for term in terms))
+        # bm25() takes one weight per column and is lower for better matches
+        weights = [boosts.get(field, 1.0) for field in FIELDS]
+        rows = self._connect().execute(
+            'SELECT rowid, -bm25(post_fts, ?, ?, ?) AS relevance FROM post_fts WHERE post_fts MATCH ? '
+            'ORDER BY relevance DESC, rowid LIMIT ? OFFSET ?', (*weights, match, limit, offset))
+        return [(row[0], row[1]) for row in rows]
+
+    def statistics(self):
+        """
+        Return the number of distinct terms and of postings of the index and the size of its file in bytes
+        """
+        db = self._connect()
+        db.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp.post_fts_terms USING fts5vocab(main, post_fts, row)')
+        terms, postings = db.execute('SELECT COUNT(*), COALESCE(SUM(doc), 0) FROM temp.post_fts_terms').fetchone()
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        page_count = db.execute('PRAGMA page_count').fetchone()[0]
+        page_size = db.execute('PRAGMA page_size').fetchone()[0]
+        return {'terms': terms, 'postings': postings, 'bytes': page_count * page_size}
+
+    def clear(self):
+        # The table is recreated so that a rebuild also applies a change of its tokenizer options
+        db = self._connect()
+        with db:
+            db.execute('DROP TABLE IF EXISTS post_fts')
+            self._create_table(db)
+
+
+class MySQLFullTextBackend(SearchBackend):
+    """
+    InnoDB FULLTEXT indexes on the SearchDocument table, kept in the main database
+    """
+
+    def index(self, documents):
+        from ..models import SearchDocument
+
+        SearchDocument.objects.filter(post_id__in=[document['id'] for document in documents]).delete()
+        SearchDocument.objects.bulk_create([
+            SearchDocument(post_id=document['id'], **self.tokenize(document))
+            for document in documents
+        ])
+
+    def remove(self, post_ids):
+        from ..models import SearchDocument
+
+        SearchDocument.objects.filter(post_id__in=post_ids).delete()
+
+    def indexed_ids(self):
+        from ..models import SearchDocument
+
+        return SearchDocument.objects.values_list('post_id', flat=True).iterator()
+
+    def search_scored(self, query, fields=FIELDS, limit=MAX_RESULTS, boosts=FIELD_BOOSTS, offset=0):
+        terms = self.tokenizer.tokens(query)
+        if not terms:
+            return []
+        # A FULLTEXT index exists for each column set the search form can ask for and for each column,
+        # the relevance is the boosted sum of the InnoDB relevance of every column
+        match = 'MATCH(%s) AGAINST (%%s IN BOOLEAN MODE)' % ', '.join(fields)
+        relevance = ' + '.join('%%s * MATCH(%s) AGAINST (%%s IN BOOLEAN MODE)' % field for field in fields)
+        against = ' '.join(f'+{term}*' for term in terms)
+        params = []
+        for field in fields:
+            params += [boosts.get(field, 1.0), against]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, {relevance} AS relevance FROM app_searchdocument WHERE {match} '
+                f'ORDER BY relevance DESC, post_id LIMIT %s OFFSET %s',
+                params + [against, limit, offset])
+            return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+    def clear(self):
+        from ..models import SearchDocument
+
+        SearchDocument.objects.all().delete()
+
+
+_backends = {}
+
+
+def get_backend():
+    """
+    Return the backend named by the SEARCH_BACKEND setting,
+    the MySQL FULLTEXT one on MySQL and the SQLite sidecar otherwise
+    """
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    if path is None:
+        path = 'app.search.backends.' + ('MySQLFullTextBackend' if connection.vendor == 'mysql' else 'SQLiteFTSBackend')
+    key = (path, str(getattr(settings, 'SEARCH_INDEX_PATH', '')), getattr(settings, 'SEARCH_TOKENIZER', None))
+    if key not in _backends:
+        _backends[key] = import_string(path)()
+    return _backends[key]
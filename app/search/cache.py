@@ -0,0 +1,45 @@
+import time
+
+from django.core.cache import caches
+
+# Generation of the cached results, replaced whenever posts change so every older entry is ignored
+GENERATION_KEY = 'search:generation'
+
+
+def _cache():
+    return caches['search']
+
+
+def _generation():
+    generation = _cache().get(GENERATION_KEY)
+    if generation is None:
+        # A new generation, an evicted one must not bring older results back
+        generation = time.time_ns()
+        _cache().add(GENERATION_KEY, generation, None)
+        generation = _cache().get(GENERATION_KEY, generation)
+    return generation
+
+
+def get_cached(query, compute, kind='ids'):
+    """
+    Return a result of a search from the cache, computing and storing it on a miss.
+    kind tells the results of the same search apart, e.g. its ordered ids and its facet counts.
+    Entries expire after the TIMEOUT of the "search" cache and the least recently used are evicted first.
+    """
+    key = f'{query.cache_key}:{kind}:{_generation()}'
+    result = _cache().get(key)
+    if result is None:
+        result = compute()
+        _cache().set(key, result)
+    return result
+
+
+def get_cached_ids(query, compute):
+    """
+    Return the ordered ids of a search from the cache
+    """
+    return get_cached(query, lambda: list(compute()))
+
+
+def invalidate_search_cache():
+    _cache().set(GENERATION_KEY, time.time_ns(), None)
@@ -0,0 +1,26 @@
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+
+# Shortest InnoDB FULLTEXT token that holds the two letter Vietnamese syllables (an, đi, ở, ...)
+MIN_TOKEN_SIZE = 1
+
+
+@register(Tags.database)
+def check_fulltext_token_size(app_configs, databases=None, **kwargs):
+    """
+    Warn when InnoDB skips the short words of the posts: innodb_ft_min_token_size is a server option,
+    the migrations cannot change it
+    """
+    if not databases or 'default' not in databases or connections['default'].vendor != 'mysql':
+        return []
+    with connections['default'].cursor() as cursor:
+        cursor.execute('SELECT @@innodb_ft_min_token_size')
+        token_size = cursor.fetchone()[0]
+    if token_size <= MIN_TOKEN_SIZE:
+        return []
+    return [Warning(
+        f'innodb_ft_min_token_size is {token_size}, shorter words are not indexed by the post search.',
+        hint=f'Start MySQL with --innodb-ft-min-token-size={MIN_TOKEN_SIZE} (see docker-compose.yml), then recreate '
+             'the FULLTEXT indexes: python manage.py migrate app 0026 && python manage.py migrate app',
+        id='app.W001',
+    )]
@@ -0,0 +1,56 @@
+from collections import Counter
+
+from django.utils import timezone
+
+from ..models import Post
+from .cache import get_cached
+from .posts import POINT_BUCKETS, search_post_ids
+
+
+def _point_bucket(score):
+    for bucket, (low, high) in POINT_BUCKETS.items():
+        if (low is None or score >= low) and (high is None or score <= high):
+            return bucket
+    return None
+
+
+def compute_facets(query):
+    """
+    Count the posts matching a SearchQuery per category, per creation month and per point bucket.
+    The posts counted are the ranked results of the search, the ones that can be paged through.
+    They are read once with their categories, one row per post and category,
+    and every facet is counted in the same pass over the rows.
+    """
+    rows = (
+        Post.objects.filter(pk__in=search_post_ids(query), status=1)
+        .order_by().values_list('pk', 'created_at', 'score', 'categories')
+    )
+
+    categories = Counter()
+    months = Counter()
+    points = Counter()
+    seen = set()
+    for pk, created_at, score, category in rows:
+        if category is not None:
+            categories[category] += 1
+        if pk in seen:
+            continue
+        seen.add(pk)
+        months[timezone.localtime(created_at).date().replace(day=1)] += 1
+        bucket = _point_bucket(score)
+        if bucket is not None:
+            points[bucket] += 1
+
+    return {
+        'total': len(seen),
+        'categories': dict(categories),
+        'months': sorted(months.items()),
+        'points': dict(points),
+    }
+
+
+def search_facets(query):
+    """
+    Return the facet counts of a SearchQuery, from the search cache when possible
+    """
+    return get_cached(query, lambda: compute_facets(query), kind='facets')
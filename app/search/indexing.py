@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import Post, SearchIndexTask
+from .backends import get_backend
+from .cache import invalidate_search_cache
+from .text import fold
+
+# Post fields a save must touch for the indexed document to change
+INDEXED_FIELDS = {'title', 'content', 'status'}
+
+# Number of queued posts indexed per backend write
+BATCH_SIZE = 200
+
+
+def build_document(post):
+    """
+    Build the indexed document of a post: title, plain text content and hashtag names, accent folded
+    """
+    return {
+        'id': post.pk,
+        'title': fold(post.title),
+        'content': fold(post.plain_text),
+        'hashtags': fold(' '.join(hashtag.name for hashtag in post.hashtags.all())),
+    }
+
+
+def enqueue_post(post_id):
+    """
+    Queue a post for the index worker, a post already waiting keeps its place in the queue
+    """
+    # Touching a waiting task tells a worker that already read it that the post changed again
+    if not SearchIndexTask.objects.filter(post_id=post_id).update(updated_at=timezone.now()):
+        SearchIndexTask.objects.get_or_create(post_id=post_id)
+
+
+def index_posts(posts):
+    """
+    Index the published posts of a batch and remove the other ones from the index
+    """
+    posts = list(posts)
+    published = [post for post in posts if post.status == 1]
+    if published:
+        get_backend().index([build_document(post) for post in published])
+    hidden = [post.pk for post in posts if post.status != 1]
+    if hidden:
+        get_backend().remove(hidden)
+
+
+def process_queue(batch_size=BATCH_SIZE):
+    """
+    Apply one batch of queued posts to the index, oldest first. Return the number of posts processed.
+    """
+    tasks = list(SearchIndexTask.objects.order_by('queued_at', 'pk')[:batch_size])
+    if not tasks:
+        return 0
+
+    post_ids = [task.post_id for task in tasks]
+    posts = Post.objects.filter(pk__in=post_ids).only('title', 'status', 'plain_text').prefetch_related('hashtags')
+    index_posts(posts)
+    deleted = set(post_ids) - {post.pk for post in posts}
+    if deleted:
+        get_backend().remove(deleted)
+
+    # A post saved again while the batch was indexed stays queued
+    for task in tasks:
+        SearchIndexTask.objects.filter(pk=task.pk, updated_at=task.updated_at).delete()
+    invalidate_search_cache()
+    return len(tasks)
+
+
+def index_lag(now=None):
+    """
+    Return how stale search is: the age of the oldest queued change, zero when the queue is empty
+    """
+    oldest = SearchIndexTask.objects.order_by('queued_at').values_list('queued_at', flat=True).first()
+    if oldest is None:
+        return timedelta(0)
+    return (now or timezone.now()) - oldest
+
+
+def published_documents(chunk_size=1000):
+    """
+    Yield the documents of every published post, a list per primary key chunk of posts to bound memory
+    """
+    last_pk = 0
+    while True:
+        chunk = list(Post.objects.filter(status=1, pk__gt=last_pk).order_by('pk')
+                     .only('title', 'status', 'plain_text').prefetch_related('hashtags')[:chunk_size])
+        if not chunk:
+            return
+        yield [build_document(post) for post in chunk]
+        last_pk = chunk[-1].pk
+
+
+def rebuild_index(chunk_size=1000):
+    """
+    Rebuild the index from every published post, searches keep using the current documents until it is done.
+    Return the number of posts indexed.
+    """
+    SearchIndexTask.objects.all().delete()
+    indexed = get_backend().rebuild(published_documents(chunk_size))
+    invalidate_search_cache()
+    return indexed
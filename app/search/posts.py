@@ -0,0 +1,140 @@
+from django.db.models import Count, Q
+
+from ..models import Post
+from .backends import FIELDS, MAX_RESULTS, get_backend
+from .cache import get_cached_ids
+from .ranking import rank_posts
+
+# Number of pages of MAX_RESULTS text matches read from the backend at most by a filtered search:
+# each page reruns the text query further down, so the matches beyond them are left out
+# rather than making a selective filter scan the whole index
+MAX_PAGES = 10
+
+# Score ranges of the search filter form as inclusive (lowest, highest) bounds, None when unbounded
+POINT_BUCKETS = {
+    '<100': (None, 99),
+    '100-499': (100, 499),
+    '500-999': (500, 999),
+    '>1000': (1001, None),
+}
+
+# The same ranges applied on the score column kept in sync by app.counters
+POINT_RANGES = {
+    bucket: Q(**{key: value for key, value in (('score__gte', low), ('score__lte', high)) if value is not None})
+    for bucket, (low, high) in POINT_BUCKETS.items()
+}
+
+
+def text_fields(only_by):
+    """
+    Return the indexed columns matched by a search: the "only by" choices of the search form restrict them
+    """
+    return tuple(field for field in only_by if field in ('title', 'content')) if only_by else FIELDS
+
+
+def posts_in_categories(categories):
+    """
+    Subquery of the ids of the posts in every one of the categories: one grouped pass over the category links
+    whatever the number of categories, instead of one join per category
+    """
+    categories = set(categories)
+    return (
+        Post.categories.through.objects.filter(category_id__in=categories)
+        .values('post_id')
+        .annotate(matched=Count('category_id'))
+        .filter(matched=len(categories))
+        .values('post_id')
+    )
+
+
+def filter_query(categories=None, from_date=None, to_date=None, point=None):
+    """
+    Build the condition of the filters of a search, an empty Q when there is none
+    """
+    query = Q()
+    if from_date:
+        query &= Q(created_at__date__gte=from_date)
+    if to_date:
+        query &= Q(created_at__date__lte=to_date)
+    if point in POINT_RANGES:
+        query &= POINT_RANGES[point]
+    if categories:
+        query &= Q(pk__in=posts_in_categories(categories))
+    return query
+
+
+def text_matches(keyword, fields, filters=Q()):
+    """
+    Return the relevance of the best MAX_RESULTS text matches of a keyword passing the filters, by post id.
+    The backend only knows the text of the posts: with filters, its matches are read MAX_RESULTS at a time
+    and filtered in the database until enough of them pass, none is left or MAX_PAGES were read,
+    so a selective filter does not lose the posts it keeps among weaker matches.
+    """
+    relevance = {}
+    for page in range(MAX_PAGES):
+        if len(relevance) >= MAX_RESULTS:
+            break
+        offset = page * MAX_RESULTS
+        matches = get_backend().search_scored(keyword, fields, MAX_RESULTS, offset=offset)
+        passing = matches
+        if filters and matches:
+            kept = set(Post.objects.filter(filters, pk__in=[pk for pk, score in matches], status=1)
+                       .values_list('pk', flat=True))
+            passing = [(pk, score) for pk, score in matches if pk in kept]
+        relevance.update(passing[:MAX_RESULTS - len(relevance)])
+        if len(matches) < MAX_RESULTS:
+            break
+    return relevance
+
+
+def search_posts(keyword, only_by=None, categories=None, from_date=None, to_date=None, point=None, matches=None):
+    """
+    Build the queryset of published posts matching a search, filtered and sorted by score in the database
+    so only the requested page is loaded by the paginator.
+    matches are the post ids found by the search backend when they are already known.
+    """
+    fields = text_fields(only_by)
+    filters = filter_query(categories, from_date, to_date, point)
+
+    query = Q()
+    if fields:
+        query |= Q(pk__in=list(text_matches(keyword, fields, filters)) if matches is None else matches)
+    # Hashtags are also matched exactly, whatever characters they contain, the best MAX_RESULTS of them
+    # like the text matches
+    if not only_by or 'hashtag' in only_by:
+        tagged = (Post.objects.filter(filters, hashtags__name=keyword, status=1)
+                  .order_by('-score', '-id').values_list('pk', flat=True))
+        query |= Q(pk__in=list(tagged[:MAX_RESULTS]))
+
+    object_list = Post.objects.with_engagement().filter(query & filters, status=1)
+    return object_list.order_by('-score', '-id')
+
+
+def rank_search(query):
+    """
+    Return the ids of the best posts matching a SearchQuery, ranked by relevance blended with freshness and score.
+    Only the ids, dates and scores of the candidates are read from the database.
+    """
+    fields = text_fields(query.only_by)
+    filters = filter_query(query.categories, query.from_date, query.to_date, query.point)
+    relevance = text_matches(query.keyword, fields, filters) if fields else {}
+    candidates = search_posts(
+        query.keyword, query.only_by, query.categories, query.from_date, query.to_date, query.point,
+        matches=list(relevance),
+    ).values_list('pk', 'created_at', 'score')
+    return rank_posts(relevance, candidates)
+
+
+def search_post_ids(query):
+    """
+    Return the ranked ids of the posts matching a SearchQuery, from the search cache when possible
+    """
+    return get_cached_ids(query, lambda: rank_search(query))
+
+
+def posts_in_order(ids):
+    """
+    Load the listed posts in one query, in the order of the ids, skipping the ones unpublished since
+    """
+    posts = Post.objects.with_engagement().filter(status=1).in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,115 @@
+import hashlib
+import re
+from datetime import datetime
+
+from django.http import QueryDict
+
+from .posts import POINT_RANGES
+
+SEARCH_TYPES = ('Post', 'Author')
+ONLY_BY_FIELDS = ('content', 'hashtag', 'title')
+
+# Date formats of the filter form (datepicker) and of older links
+DATE_FORMATS = ('%m/%d/%Y', '%Y-%m-%d')
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class SearchQuery:
+    """
+    Canonical form of the search parameters: values are validated and normalized so the same search
+    always gives the same cache key and the same pagination links
+    """
+
+    def __init__(self, keyword='', search_type=None, only_by=(), categories=(), from_date=None, to_date=None,
+                 point=None):
+        self.keyword = ' '.join(keyword.split())
+        self.search_type = search_type if search_type in SEARCH_TYPES else None
+        self.only_by = tuple(sorted(set(only_by) & set(ONLY_BY_FIELDS)))
+        self.categories = tuple(sorted(set(categories)))
+        self.from_date = from_date
+        self.to_date = to_date
+        self.point = point if point in POINT_RANGES else None
+
+    @classmethod
+    def from_querydict(cls, params):
+        """
+        Parse the GET parameters of the search page, including the ones of links built by older versions
+        (a stringified category list and "False" for missing values)
+        """
+        categories = set()
+        for value in params.getlist('list_category'):
+            categories.update(int(pk) for pk in re.findall(r'\d+', value))
+
+        return cls(
+            keyword=params.get('search_keyword', ''),
+            search_type=params.get('choices_single_default'),
+            only_by=params.getlist('only_by[]'),
+            categories=categories,
+            from_date=_parse_date(params.get('from_date')),
+            to_date=_parse_date(params.get('to_date')),
+            point=params.get('point'),
+        )
+
+    def __bool__(self):
+        return bool(self.keyword and self.search_type)
+
+    def __eq__(self, other):
+        return isinstance(other, SearchQuery) and self.urlencode() == other.urlencode()
+
+    def __hash__(self):
+        return hash(self.urlencode())
+
+    def replace(self, **changes):
+        """
+        Return a copy of the search with some parameters changed, e.g. for the links narrowing it
+        """
+        params = {
+            'keyword': self.keyword, 'search_type': self.search_type, 'only_by': self.only_by,
+            'categories': self.categories, 'from_date': self.from_date, 'to_date': self.to_date, 'point': self.point,
+        }
+        params.update(changes)
+        return SearchQuery(**params)
+
+    @property
+    def has_filters(self):
+        return bool(self.categories or self.from_date or self.to_date or self.point)
+
+    def urlencode(self):
+        """
+        Return the canonical query string of the search, used by the pagination links
+        """
+        params = QueryDict(mutable=True)
+        params['search_keyword'] = self.keyword
+        params['choices_single_default'] = self.search_type or ''
+        params.setlist('only_by[]', self.only_by)
+        params.setlist('list_category', [str(pk) for pk in self.categories])
+        if self.from_date:
+            params['from_date'] = self.from_date.strftime(DATE_FORMATS[0])
+        if self.to_date:
+            params['to_date'] = self.to_date.strftime(DATE_FORMATS[0])
+        if self.point:
+            params['point'] = self.point
+        return params.urlencode()
+
+    @property
+    def cache_key(self):
+        return 'search:' + hashlib.sha1(self.urlencode().encode()).hexdigest()
+
+    def filter_initial(self):
+        """
+        Initial values of the search filter form
+        """
+        return {
+            'list_category': [str(pk) for pk in self.categories],
+            'from_date': self.from_date.strftime(DATE_FORMATS[0]) if self.from_date else None,
+            'to_date': self.to_date.strftime(DATE_FORMATS[0]) if self.to_date else None,
+            'point': self.point,
+        }
@@ -0,0 +1,53 @@
+import math
+
+from django.utils import timezone
+
+# Weights of the blend: relevance counts fully, freshness and post score nudge close matches
+FRESHNESS_WEIGHT = 0.3
+SCORE_WEIGHT = 0.2
+
+# Age in days at which the freshness of a post is halved
+FRESHNESS_HALF_LIFE = 30
+
+
+def freshness(created_at, now):
+    """
+    Exponential decay of the age of a post, 1 for a new post and 0.5 after FRESHNESS_HALF_LIFE days
+    """
+    age_days = max((now - created_at).total_seconds(), 0) / 86400
+    return 0.5 ** (age_days / FRESHNESS_HALF_LIFE)
+
+
+def blend(relevance, max_relevance, created_at, score, max_score, now, use_freshness=True, use_score=True):
+    """
+    Rank of a post: its relevance relative to the best match, plus the optional freshness and score terms
+    which are both in [0, 1]
+    """
+    rank = relevance / max_relevance if max_relevance > 0 else 0
+    if use_freshness:
+        rank += FRESHNESS_WEIGHT * freshness(created_at, now)
+    if use_score and max_score > 0:
+        rank += SCORE_WEIGHT * math.log1p(max(score, 0)) / math.log1p(max_score)
+    return rank
+
+
+def rank_posts(relevance, candidates, now=None, use_freshness=True, use_score=True):
+    """
+    Return the ids of the candidates best first, every one of them so that all the results can be paged through.
+    relevance maps post ids to their full-text relevance (BM25 with field boosts) from the search backend,
+    candidates are the (post id, created_at, score) rows of the posts passing the filters.
+    """
+    now = now or timezone.now()
+    candidates = list(candidates)
+    if not candidates:
+        return []
+    max_relevance = max(relevance.values(), default=0)
+    max_score = max(score for pk, created_at, score in candidates)
+
+    def rank(row):
+        return (
+            blend(relevance.get(row[0], 0), max_relevance, row[1], row[2], max_score, now, use_freshness, use_score),
+            row[0],
+        )
+
+    return [pk for pk, created_at, score in sorted(candidates, key=rank, reverse=True)]
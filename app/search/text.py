@@ -0,0 +1,126 @@
+import re
+import unicodedata
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Letters that are not a base letter plus combining marks in Unicode
+FOLDED_LETTERS = str.maketrans({'đ': 'd', 'Đ': 'D'})
+
+# Bundled list of Vietnamese words, one per line with their syllables separated by spaces
+WORDLIST_PATH = Path(__file__).resolve().parent / 'data' / 'vi_words.txt'
+
+# Separator of the syllables of a segmented word, a word character for both FTS5 and InnoDB
+JOINER = '_'
+
+
+def fold(text):
+    """
+    Lowercase a text and remove its Vietnamese diacritics: "Lập trình Đà Nẵng" gives "lap trinh da nang",
+    so accented and unaccented spellings share the same index entries
+    """
+    decomposed = unicodedata.normalize('NFD', text.translate(FOLDED_LETTERS))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def query_terms(query):
+    """
+    Split a text into the folded word terms stored in and looked up from every search index
+    """
+    return re.findall(r'\w+', fold(query))
+
+
+class WordTokenizer:
+    """
+    Naive tokenizer of the post index: every folded word is a term
+    """
+
+    def tokens(self, text):
+        return query_terms(text)
+
+    def index_tokens(self, text):
+        """
+        Return the terms a document is indexed under, queries are looked up with tokens()
+        """
+        return self.tokens(text)
+
+
+class VietnameseTokenizer(WordTokenizer):
+    """
+    Segment the Vietnamese words of a text so multi-syllable words are single terms: "Học máy cơ bản" gives
+    hoc_may, co_ban. Words of the wordlist are matched longest first, the other runs of Vietnamese syllables
+    are indexed as overlapping bigrams followed by their last syllable, other words are kept as they are.
+    Documents are also indexed under the following syllables of their words, so "bản" finds "cơ bản".
+    """
+
+    def __init__(self, path=WORDLIST_PATH):
+        self.words = set()
+        self.syllables = set()
+        self.max_length = 1
+        with open(path, encoding='utf-8') as wordlist:
+            for line in wordlist:
+                if line.startswith('#'):
+                    continue
+                syllables = query_terms(line)
+                if not syllables:
+                    continue
+                self.syllables.update(syllables)
+                if len(syllables) > 1:
+                    self.words.add(JOINER.join(syllables))
+                    self.max_length = max(self.max_length, len(syllables))
+
+    def _word_at(self, syllables, start):
+        """
+        Return the number of syllables of the longest word of the wordlist starting at a position, 0 when none
+        """
+        for length in range(min(self.max_length, len(syllables) - start), 1, -1):
+            if JOINER.join(syllables[start:start + length]) in self.words:
+                return length
+        return 0
+
+    def tokens(self, text):
+        syllables = query_terms(text)
+        tokens = []
+        run = []
+        position = 0
+        while position < len(syllables):
+            length = self._word_at(syllables, position)
+            syllable = syllables[position]
+            if length or syllable not in self.syllables:
+                tokens.extend(self._bigrams(run))
+                run = []
+                tokens.append(JOINER.join(syllables[position:position + length]) if length else syllable)
+                position += length or 1
+            else:
+                run.append(syllable)
+                position += 1
+        tokens.extend(self._bigrams(run))
+        return tokens
+
+    def index_tokens(self, text):
+        tokens = []
+        for token in self.tokens(text):
+            tokens.append(token)
+            # A term prefix search already finds the first syllable of a word, and every syllable
+            # of a bigram run starts a bigram or is the last one
+            if token in self.words:
+                tokens.extend(token.split(JOINER)[1:])
+        return tokens
+
+    def _bigrams(self, run):
+        # The last syllable is kept alone so a search for any syllable of the run finds it as a term prefix
+        return [JOINER.join(run[i:i + 2]) for i in range(len(run) - 1)] + run[-1:]
+
+
+_tokenizers = {}
+
+
+def get_tokenizer():
+    """
+    Return the tokenizer of the post index named by the SEARCH_TOKENIZER setting, the Vietnamese one by default
+    """
+    path = getattr(settings, 'SEARCH_TOKENIZER', None) or 'app.search.text.VietnameseTokenizer'
+    if path not in _tokenizers:
+        _tokenizers[path] = import_string(path)()
+    return _tokenizers[path]
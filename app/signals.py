@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import autocomplete
+from .models import Category, CustomUser, HashTag, Post
+from .search.authors import NAME_FIELDS, index_author
+from .search.cache import invalidate_search_cache
+from .search.indexing import INDEXED_FIELDS, enqueue_post
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or INDEXED_FIELDS & set(update_fields):
+        enqueue_post(instance.pk)
+        invalidate_search_cache()
+
+
+@receiver(post_delete, sender=Post)
+def remove_deleted_post(sender, instance, **kwargs):
+    enqueue_post(instance.pk)
+    invalidate_search_cache()
+
+
+def _record_usage(kind, action, pk_set, related=None):
+    """
+    Apply a change of the relations of a post to the usage counts of the suggestions.
+    A clear sends no pk_set, the cleared pks are read from the related manager before the clear.
+    """
+    if action == 'pre_clear':
+        action, pk_set = 'post_remove', set(related.values_list('pk', flat=True))
+    delta = {'post_add': 1, 'post_remove': -1}.get(action)
+    if delta:
+        for pk in pk_set or ():
+            autocomplete.record(kind, pk, delta=delta)
+
+
+@receiver(m2m_changed, sender=Post.hashtags.through)
+def index_post_hashtags(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        enqueue_post(instance.pk)
+        invalidate_search_cache()
+    if not reverse and action in ('post_add', 'post_remove', 'pre_clear'):
+        _record_usage('hashtag', action, pk_set, instance.hashtags)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def invalidate_post_categories(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_search_cache()
+    if not reverse and action in ('post_add', 'post_remove', 'pre_clear'):
+        _record_usage('category', action, pk_set, instance.categories)
+
+
+@receiver(post_save, sender=HashTag)
+def suggest_hashtag(sender, instance, **kwargs):
+    autocomplete.record('hashtag', instance.pk, instance.name)
+
+
+@receiver(post_save, sender=Category)
+def suggest_category(sender, instance, **kwargs):
+    autocomplete.record('category', instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=HashTag)
+@receiver(post_delete, sender=Category)
+def forget_suggestion(sender, instance, **kwargs):
+    autocomplete.forget('hashtag' if sender is HashTag else 'category', instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def index_author_names(sender, instance, update_fields=None, **kwargs):
+    changed = instance.changed_search_fields()
+    if update_fields is not None:
+        changed &= set(update_fields)
+    if changed & set(NAME_FIELDS):
+        index_author(instance)
+    if changed:
+        if instance.is_active:
+            autocomplete.record('author', instance.pk, instance.username)
+        else:
+            autocomplete.forget('author', instance.pk)
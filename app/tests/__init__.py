@@ -0,0 +1,16 @@
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+
+from app import viewcounts
+
+# Search index of the tests in a temporary directory, so the tests never clear or fill the index
+# of settings.SEARCH_INDEX_PATH. The directory is removed when the test run exits.
+_search_index_directory = tempfile.TemporaryDirectory()
+temporary_search_index = override_settings(
+    SEARCH_INDEX_PATH=Path(_search_index_directory.name) / 'search_index.sqlite3')
+
+# The idle flush timer would write the views buffered by a test from another thread, during the transactions
+# of the next tests. The tests of the timer turn it on.
+viewcounts.IDLE_FLUSH = False
@@ -0,0 +1,149 @@
+import random
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from app import autocomplete
+from app.autocomplete import PrefixIndex
+from app.models import Category, CustomUser, HashTag, Post
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.set(1, 'Django', 5)
+        self.index.set(2, 'django-rest', 9)
+        self.index.set(3, 'docker', 7)
+        self.index.set(4, 'python', 1)
+
+    def test_complete_by_weight(self):
+        self.assertEqual(self.index.complete('d'), [('django-rest', 9), ('docker', 7), ('Django', 5)])
+        self.assertEqual(self.index.complete('DJ', limit=1), [('django-rest', 9)])
+        self.assertEqual(self.index.complete('x'), [])
+
+    def test_accent_folding(self):
+        self.index.set(5, 'Đà Nẵng', 2)
+        self.assertEqual(self.index.complete('da n'), [('Đà Nẵng', 2)])
+        self.assertEqual(self.index.complete('Đà'), [('Đà Nẵng', 2)])
+
+    def test_incremental_changes(self):
+        self.index.add_weight(1, 10)
+        self.index.set(4, 'dart')
+        self.index.remove(2)
+        self.assertEqual(self.index.complete('d'), [('Django', 15), ('docker', 7), ('dart', 1)])
+        self.assertEqual(self.index.complete('p'), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_kept_suggestions_follow_changes(self):
+        # A small scan limit keeps the suggestions of most prefixes, which must match a full scan after every change
+        rng = random.Random(0)
+        names = {item_id: [''.join(rng.choice('ab') for _ in range(rng.randint(0, 4))), rng.randint(0, 5)]
+                 for item_id in range(200)}
+        index = PrefixIndex([(item_id, name, weight) for item_id, (name, weight) in names.items()],
+                            size=3, scan_limit=2)
+
+        def expected(prefix):
+            ranked = sorted(names.items(), key=lambda item: (-item[1][1], item[1][0], item[0]))
+            return [(name, weight) for item_id, (name, weight) in ranked if name.startswith(prefix)][:3]
+
+        for step in range(500):
+            item_id = rng.choice(list(names))
+            action = rng.randrange(3)
+            if action == 0:
+                delta = rng.randint(-3, 3)
+                index.add_weight(item_id, delta)
+                names[item_id][1] += delta
+            elif action == 1:
+                name = ''.join(rng.choice('ab') for _ in range(rng.randint(0, 4)))
+                index.set(item_id, name)
+                names[item_id][0] = name
+            else:
+                index.remove(item_id)
+                del names[item_id]
+                index.set(step + 1000, 'ab', 2)
+                names[step + 1000] = ['ab', 2]
+            for prefix in ('', 'a', 'ab', 'ba', 'abb'):
+                self.assertEqual(index.complete(prefix, 3), expected(prefix))
+
+
+class AutocompleteApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='django_fan', password='12345')
+        cls.category = Category.objects.create(name='Django')
+        cls.hashtags = [HashTag.objects.create(name=name) for name in ('django', 'djangorest', 'docker')]
+        post = Post.objects.create(user=cls.author, title='Post', content='content', status=1)
+        post.hashtags.add(cls.hashtags[1])
+
+    def setUp(self):
+        autocomplete.reset()
+
+    def test_suggestions(self):
+        response = self.client.get('/api/autocomplete', {'q': 'Dj'})
+        self.assertEqual(response.json(), {
+            'hashtag': [{'name': 'djangorest', 'count': 1}, {'name': 'django', 'count': 0}],
+            'author': [{'name': 'django_fan', 'count': 0}],
+            'category': [{'name': 'Django', 'count': 0}],
+        })
+        response = self.client.get('/api/autocomplete', {'q': 'do', 'type': 'hashtag', 'limit': 'x'})
+        self.assertEqual(response.json(), {'hashtag': [{'name': 'docker', 'count': 0}]})
+
+    def test_no_query_after_load(self):
+        autocomplete.complete('d')
+        with self.assertNumQueries(0):
+            autocomplete.complete('dja')
+
+    def test_refreshed_in_the_background(self):
+        indexes = autocomplete.get_indexes()
+        building = threading.Event()
+        release = threading.Event()
+        swapped = threading.Event()
+
+        def load():
+            building.set()
+            release.wait(5)
+            return {kind: PrefixIndex([(1, 'djangocon', 3)]) for kind in autocomplete.KINDS}
+
+        def refresh(changes):
+            refresh.original(changes)
+            swapped.set()
+        refresh.original = autocomplete._refresh
+
+        with mock.patch.object(autocomplete, '_load', load), mock.patch.object(autocomplete, '_refresh', refresh), \
+                mock.patch.object(autocomplete, 'REFRESH_INTERVAL', -1):
+            self.assertIs(autocomplete.get_indexes(), indexes)
+            self.assertTrue(building.wait(5))
+            # Changes made during the rebuild are applied to the current and the new indexes
+            autocomplete.record('hashtag', 1, delta=1)
+            autocomplete.record('hashtag', 2, 'djangocms', 0)
+            self.assertIs(autocomplete.get_indexes(), indexes)
+            release.set()
+            self.assertTrue(swapped.wait(5))
+        self.assertEqual(autocomplete.complete('djangoc', ['hashtag'])['hashtag'], [('djangocon', 4), ('djangocms', 0)])
+
+    def test_refreshed_incrementally(self):
+        autocomplete.complete('d')
+        post = Post.objects.create(user=self.author, title='Post', content='content', status=1)
+        post.hashtags.add(self.hashtags[0], HashTag.objects.create(name='djangocon'))
+        post.categories.add(self.category)
+        with self.assertNumQueries(0):
+            suggestions = autocomplete.complete('django', ['hashtag', 'category'])
+        self.assertEqual(suggestions['hashtag'], [('django', 1), ('djangocon', 1), ('djangorest', 1)])
+        self.assertEqual(suggestions['category'], [('Django', 1)])
+
+    def test_edits_and_clears_keep_counts(self):
+        self.client.login(username='django_fan', password='12345')
+        post = Post.objects.create(user=self.author, title='Post', content='content', status=1)
+        autocomplete.complete('d')
+        for _ in range(3):
+            self.client.post(f'/post/{post.pk}/edit', {
+                'title': 'Post', 'content': 'content', 'categories': [self.category.pk],
+                'hashtags': 'docker', 'mode': 0})
+        self.assertEqual(autocomplete.complete('do', ['hashtag'])['hashtag'], [('docker', 1)])
+        self.assertEqual(autocomplete.complete('dj', ['category'])['category'], [('Django', 1)])
+
+        post.hashtags.clear()
+        post.categories.clear()
+        self.assertEqual(autocomplete.complete('do', ['hashtag'])['hashtag'], [('docker', 0)])
+        self.assertEqual(autocomplete.complete('dj', ['category'])['category'], [('Django', 0)])
@@ -0,0 +1,42 @@
+import random
+
+from django.db.models import Sum
+from django.test import TestCase
+
+from app.benchmarks import QUERY_MIX, percentiles, replay_searches, seed_corpus
+from app.models import Post, PostReaction
+from app.search.backends import get_backend
+from app.tests import temporary_search_index
+
+
+@temporary_search_index
+class SearchBenchmarkTest(TestCase):
+    def setUp(self):
+        get_backend().clear()
+
+    def test_seed_corpus(self):
+        text = seed_corpus(40, random.Random(1), batch_size=15)
+        seed_corpus(10, random.Random(2), text)
+        self.assertEqual(Post.objects.count(), 50)
+
+        for post in Post.objects.annotate(total=Sum('postreaction__feedback_value')):
+            self.assertEqual(post.score, post.total or 0)
+            self.assertEqual(post.upvotes + post.downvotes, post.postreaction_set.count())
+            self.assertGreater(post.word_count, 0)
+            self.assertTrue(post.categories.exists())
+        self.assertGreater(Post.objects.dates('created_at', 'month').count(), 1)
+        self.assertEqual(PostReaction.objects.filter(time__isnull=True).count(), 0)
+        self.assertTrue(get_backend().search(text.frequent(1)[0]))
+
+    def test_replay_searches(self):
+        text = seed_corpus(30, random.Random(1))
+        rows = replay_searches(text, repeat=2)
+        self.assertEqual([row[0] for row in rows], [name for name, source, extra in QUERY_MIX])
+        for name, p50, p95, p99, queries, peak in rows:
+            self.assertTrue(0 < p50 <= p95 <= p99)
+            self.assertGreater(queries, 0)
+            self.assertGreater(peak, 0)
+
+    def test_percentiles(self):
+        self.assertEqual(percentiles(list(range(1, 102))), (51, 96, 100))
+        self.assertEqual(percentiles([3]), (3, 3, 3))
@@ -0,0 +1,154 @@
+import random
+
+from django.test import TestCase
+from django.urls import reverse
+
+from app import viewcounts
+from app.benchmarks import build_comment_tree, get_comment_tree, seed_comments, seed_corpus
+from app.comments import COMMENTS_PER_PAGE, REPLIES_PER_PAGE
+from app.counters import reconcile_comment_counters
+from app.models import Comment, CustomUser, Post
+from app.tests import temporary_search_index
+
+
+@temporary_search_index
+class CommentTreeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.post = Post.objects.create(user=cls.author, title='Python', content='content', status=1)
+
+    def setUp(self):
+        viewcounts.reset()
+
+    def _comment(self, content, parent=None):
+        return Comment.objects.create(user=self.author, post=self.post, parent=parent, content=content)
+
+    def test_build_comment_tree(self):
+        comments = [
+            {'id': 5, 'parent_id': 2},
+            {'id': 4, 'parent_id': 3},
+            {'id': 3, 'parent_id': 1},
+            {'id': 2, 'parent_id': None},
+            {'id': 1, 'parent_id': -1},
+            {'id': 6, 'parent_id': 99},
+        ]
+        roots = build_comment_tree(comments)
+        # Replies may come before their parents, orphans and legacy roots are roots, the order is kept
+        self.assertEqual([root['id'] for root in roots], [2, 1, 6])
+        self.assertEqual([reply['id'] for reply in roots[0]['replies']], [5])
+        self.assertEqual(roots[1]['replies'][0]['replies'][0]['id'], 4)
+        self.assertEqual(build_comment_tree([]), [])
+
+    def test_get_comment_tree_in_one_query(self):
+        first = self._comment('first')
+        reply = self._comment('reply', first)
+        self._comment('nested reply', reply)
+        self._comment('second')
+        with self.assertNumQueries(1):
+            roots = get_comment_tree(self.post)
+        self.assertEqual([root['content'] for root in roots], ['second', 'first'])
+        self.assertEqual(roots[1]['replies'][0]['replies'][0]['content'], 'nested reply')
+        self.assertEqual(roots[1]['username'], 'author')
+
+    def test_root_comment_has_no_parent(self):
+        self.client.login(username='author', password='12345')
+        self.client.post(reverse('comment'), {'post_id': self.post.pk, 'parent_id': '-1', 'comment_content': 'root'})
+        root = Comment.objects.get(content='root')
+        self.assertIsNone(root.parent)
+        self.client.post(reverse('comment'), {'post_id': self.post.pk, 'parent_id': root.pk, 'comment_content': 'reply'})
+        self.assertEqual(Comment.objects.get(content='reply').parent, root)
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
+
+    def test_reconcile_repairs_reply_counts(self):
+        root = self._comment('root')
+        self._comment('reply', root)
+        Comment.objects.filter(pk=root.pk).update(reply_count=5)
+        self.assertEqual(reconcile_comment_counters(batch_size=1), 1)
+        self.assertEqual(list(Comment.objects.order_by('pk').values_list('reply_count', flat=True)), [1, 0])
+        self.assertEqual(reconcile_comment_counters(), 0)
+
+    def test_seed_comments(self):
+        seed_corpus(1, random.Random(1))
+        post = Post.objects.get(user__username__startswith='bench_')
+        seed_comments(post, 200, random.Random(1))
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 200)
+        roots = get_comment_tree(post)
+
+        def count(comments):
+            return sum(1 + count(comment['replies']) for comment in comments)
+
+        def depth(comments):
+            return max((1 + depth(comment['replies']) for comment in comments), default=0)
+
+        self.assertEqual(count(roots), 200)
+        self.assertGreater(depth(roots), 2)
+
+
+@temporary_search_index
+class CommentApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.post = Post.objects.create(user=cls.author, title='Python', content='content', status=1)
+
+    def setUp(self):
+        viewcounts.reset()
+        self.client.login(username='author', password='12345')
+
+    def _comment(self, content, parent=None):
+        self.client.post(reverse('comment'), {'post_id': self.post.pk, 'parent_id': parent.pk if parent else '-1',
+                                              'comment_content': content})
+        return Comment.objects.get(content=content)
+
+    def test_root_comments_by_page(self):
+        for i in range(COMMENTS_PER_PAGE + 2):
+            self._comment(f'comment {i}')
+        response = self.client.get(f'/post/{self.post.pk}')
+        page = response.context['comments']
+        self.assertEqual(len(page), COMMENTS_PER_PAGE)
+        self.assertEqual(page[0].content, f'comment {COMMENTS_PER_PAGE + 1}')
+        self.assertContains(response, page.next_cursor)
+        self.assertNotContains(response, 'comment 1<')
+
+        with self.assertNumQueries(4):
+            # The post, the page of comments with their authors, the session and the user
+            data = self.client.get(reverse('post_comments', args=[self.post.pk]), {'cursor': page.next_cursor}).json()
+        self.assertEqual([comment['content'] for comment in data['comments']], ['comment 1', 'comment 0'])
+        self.assertEqual(data['comments'][0]['username'], 'author')
+        self.assertIn('comment 0', data['html'])
+        self.assertIn('csrfmiddlewaretoken', data['html'])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_replies_on_demand(self):
+        root = self._comment('root')
+        for i in range(REPLIES_PER_PAGE + 1):
+            reply = self._comment(f'reply {i}', root)
+        self._comment('nested reply', reply)
+        response = self.client.get(f'/post/{self.post.pk}')
+        self.assertNotContains(response, 'reply 0')
+        self.assertContains(response, reverse('comment_replies', args=[root.pk]))
+        # The texts of the button after a page and on an error are translated by the template, not the script
+        self.assertContains(response, 'data-more="Show more replies"')
+        self.assertContains(response, 'data-error="Could not load the comments"')
+
+        data = self.client.get(reverse('comment_replies', args=[root.pk])).json()
+        self.assertEqual(len(data['comments']), REPLIES_PER_PAGE)
+        self.assertEqual(data['comments'][0]['content'], f'reply {REPLIES_PER_PAGE}')
+        self.assertEqual(data['comments'][0]['reply_count'], 1)
+        self.assertIn(reverse('comment_replies', args=[reply.pk]), data['html'])
+        data = self.client.get(reverse('comment_replies', args=[root.pk]), {'cursor': data['next_cursor']}).json()
+        self.assertEqual([comment['content'] for comment in data['comments']], ['reply 0'])
+
+        data = self.client.get(reverse('comment_replies', args=[reply.pk])).json()
+        self.assertEqual([comment['content'] for comment in data['comments']], ['nested reply'])
+
+    def test_hidden_post(self):
+        root = self._comment('root')
+        Post.objects.filter(pk=self.post.pk).update(status=0)
+        self.assertEqual(self.client.get(reverse('post_comments', args=[self.post.pk])).status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('post_comments', args=[self.post.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('comment_replies', args=[root.pk])).status_code, 404)
@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase, TestCase
+
+from app.content import derive_content
+from app.models import CustomUser, Post
+
+
+class DeriveContentTest(SimpleTestCase):
+    def test_plain_text_and_reading_time(self):
+        derived = derive_content('<p>Xin  ch&agrave;o</p><ul><li>one</li><li>two</li></ul>')
+        self.assertEqual(derived['plain_text'], 'Xin chào one two')
+        self.assertEqual(derived['word_count'], 4)
+        self.assertEqual(derived['reading_time'], 1)
+        self.assertEqual(derive_content('<p>' + 'word ' * 401 + '</p>')['reading_time'], 3)
+        self.assertEqual(derive_content('')['reading_time'], 0)
+
+    def test_excerpt_closes_tags(self):
+        html = '<p><strong>' + 'a' * 500 + '</strong> ' + 'b' * 500 + '</p>'
+        excerpt = derive_content(html)['excerpt']
+        self.assertTrue(excerpt.startswith('<p><strong>' + 'a' * 97))
+        self.assertTrue(excerpt.endswith('...</strong></p>'))
+
+    def test_excerpt_is_bounded(self):
+        excerpt = derive_content('<p>' + 'word ' * 5000 + '</p>')['excerpt']
+        self.assertLessEqual(len(excerpt), 1000 + len('<p></p>'))
+
+    def test_first_image(self):
+        html = '<p>text</p><img alt="x"><img src="https://i.imgur.com/a.png"><img src="b.png">'
+        self.assertEqual(derive_content(html)['first_image'], 'https://i.imgur.com/a.png')
+        self.assertEqual(derive_content('<p>text</p>')['first_image'], '')
+
+
+class PostDerivedContentTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.reader = CustomUser.objects.create_user(username='reader', password='12345')
+
+    def test_derived_on_save(self):
+        post = Post.objects.create(user=self.author, title='Post', content='<p>one two</p>', status=1)
+        self.assertEqual(Post.objects.get(pk=post.pk).word_count, 2)
+
+        post.content = '<p>one two three</p><img src="a.png">'
+        post.save(update_fields=['content'])
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual((post.plain_text, post.word_count, post.first_image), ('one two three', 3, 'a.png'))
+
+    def test_paywall_shows_excerpt(self):
+        content = '<p><em>' + 'x' * 2000 + '</em></p>'
+        post = Post.objects.create(user=self.author, title='Paid', content=content, status=1, mode=1)
+        self.client.login(username='reader', password='12345')
+        response = self.client.get(f'/post/{post.pk}')
+        self.assertEqual(response.context['post'].content, '<p><em>' + 'x' * 197 + '...</em></p>')
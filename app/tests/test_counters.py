@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app.models import Bookmark, Category, Comment, CustomUser, Follow, Post, PostReaction
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.voter = CustomUser.objects.create_user(username='voter', password='12345')
+        cls.post = Post.objects.create(user=cls.author, title='Counters', content='content', status=1)
+
+    def setUp(self):
+        self.client.login(username='voter', password='12345')
+
+    def _counters(self):
+        return Post.objects.values('score', 'upvotes', 'downvotes', 'comment_count', 'bookmark_count').get(pk=self.post.pk)
+
+    def test_reactions_update_score(self):
+        response = self.client.post(f'/post/{self.post.pk}/react/upvote')
+        self.assertEqual(response.json()['total_feedback_value'], 1)
+        self.assertEqual(self._counters()['upvotes'], 1)
+
+        response = self.client.post(f'/post/{self.post.pk}/react/downvote')
+        self.assertEqual(response.json()['total_feedback_value'], -1)
+        self.assertEqual((self._counters()['upvotes'], self._counters()['downvotes']), (0, 1))
+
+        response = self.client.post(f'/post/{self.post.pk}/react/downvote')
+        self.assertEqual(response.json()['total_feedback_value'], 0)
+        self.assertEqual(self._counters()['downvotes'], 0)
+
+    def test_bookmarks_and_comments_update_counts(self):
+        self.client.post(f'/post/{self.post.pk}/bookmark')
+        self.assertEqual(self._counters()['bookmark_count'], 1)
+        self.client.post(f'/post/{self.post.pk}/bookmark')
+        self.assertEqual(self._counters()['bookmark_count'], 0)
+
+        root = Comment.objects.create(pk=-1, user=self.author, post=self.post, content='root')
+        self.client.post('/comment/', {'post_id': self.post.pk, 'parent_id': root.pk, 'comment_content': 'Hello'})
+        self.assertEqual(self._counters()['comment_count'], 1)
+
+    def test_stale_instance_does_not_overwrite_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        self.client.post(f'/post/{self.post.pk}/react/upvote')
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self._counters()['score'], 1)
+
+    def test_deferred_fields_are_not_loaded_by_save(self):
+        comment = Comment.objects.create(user=self.author, post=self.post, content='Hello')
+        instances = [
+            Post.objects.only('title').get(pk=self.post.pk),
+            Comment.objects.only('content').get(pk=comment.pk),
+            CustomUser.objects.only(*CustomUser.SEARCH_FIELDS, 'point').get(pk=self.author.pk),
+        ]
+        for instance in instances:
+            with CaptureQueriesContext(connection) as queries:
+                instance.save()
+            self.assertFalse([query['sql'] for query in queries if query['sql'].startswith('SELECT')])
+
+    def test_reconcile_repairs_drift(self):
+        PostReaction.objects.create(user=self.voter, post=self.post, feedback_value=1)
+        PostReaction.objects.create(user=self.author, post=self.post, feedback_value=-1)
+        Bookmark.objects.create(user=self.voter, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(score=42)
+
+        out = StringIO()
+        call_command('reconcile_post_counters', stdout=out)
+        self.assertIn('Repaired 1 posts', out.getvalue())
+        self.assertEqual(self._counters(), {'score': 0, 'upvotes': 1, 'downvotes': 1, 'comment_count': 0,
+                                            'bookmark_count': 1})
+
+
+class UserCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.reader = CustomUser.objects.create_user(username='reader', password='12345')
+        cls.category = Category.objects.create(name='Python')
+
+    def _counters(self, user):
+        return CustomUser.objects.values('follower_count', 'following_count', 'post_count').get(pk=user.pk)
+
+    def test_follow_and_unfollow(self):
+        self.client.login(username='reader', password='12345')
+        response = self.client.post(f'/follow/{self.author.pk}')
+        self.assertEqual(response.json()['followers_count'], 1)
+        self.assertEqual(self._counters(self.reader)['following_count'], 1)
+
+        response = self.client.post(f'/follow/{self.author.pk}')
+        self.assertEqual(response.json()['followers_count'], 0)
+        self.assertEqual(self._counters(self.reader)['following_count'], 0)
+
+    def test_post_status_transitions(self):
+        self.client.login(username='author', password='12345')
+        data = {'title': 'Post', 'content': 'content', 'categories': [self.category.pk], 'mode': 0}
+        self.client.post('/create-post', data)
+        self.client.post('/create-post', {**data, 'status': 0})
+        self.assertEqual(self._counters(self.author)['post_count'], 1)
+
+        draft = Post.objects.get(status=0)
+        self.client.post(f'/post/{draft.pk}/edit', data)
+        self.assertEqual(self._counters(self.author)['post_count'], 2)
+
+        self.client.get(f'/post/{draft.pk}/delete')
+        self.assertEqual(self._counters(self.author)['post_count'], 1)
+
+    def test_reconcile_repairs_drift(self):
+        Follow.objects.create(follower=self.reader, followed=self.author)
+        Post.objects.create(user=self.author, title='Published', content='content', status=1)
+        Post.objects.create(user=self.author, title='Draft', content='content', status=0)
+        CustomUser.objects.filter(pk=self.author.pk).update(follower_count=7)
+
+        out = StringIO()
+        call_command('reconcile_user_counters', stdout=out)
+        self.assertIn('Repaired 2 users', out.getvalue())
+        self.assertEqual(self._counters(self.author), {'follower_count': 1, 'following_count': 0, 'post_count': 1})
+        self.assertEqual(self._counters(self.reader)['following_count'], 1)
@@ -0,0 +1,185 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from app.leaderboards import get_famous_authors, get_trending_hashtags, get_trending_posts
+from app.models import (AuthorLiker, Category, CustomUser, FamousAuthor, HashTagSketch, Post, PostReaction,
+                        ReactionRollup, TrendingPost)
+
+
+class TrendingPostLeaderboardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.voter = CustomUser.objects.create_user(username='voter', password='12345')
+        cls.category = Category.objects.create(name='Python')
+        cls.post = Post.objects.create(user=cls.author, title='Trending', content='content', status=1)
+        cls.post.categories.add(cls.category)
+
+    def setUp(self):
+        self.client.login(username='voter', password='12345')
+
+    def _react(self, react_type):
+        return self.client.post(f'/post/{self.post.pk}/react/{react_type}')
+
+    def test_upvote_updates_all_windows(self):
+        self._react('upvote')
+        for days in (7, 30, 365):
+            self.assertEqual(TrendingPost.objects.get(days=days, post=self.post).r_count, 1)
+
+        posts = get_trending_posts(7)
+        self.assertEqual([post.pk for post in posts], [self.post.pk])
+        self.assertEqual(posts[0].r_count, 1)
+        self.assertEqual(posts[0].list_categories, 'Python')
+
+    def test_remove_and_change_upvote(self):
+        self._react('upvote')
+        self._react('downvote')
+        self.assertEqual(TrendingPost.objects.get(days=7, post=self.post).r_count, 0)
+        self.assertEqual(get_trending_posts(7), [])
+
+        self._react('upvote')
+        self._react('upvote')
+        self.assertEqual(TrendingPost.objects.get(days=7, post=self.post).r_count, 0)
+
+    def test_change_of_old_reaction_only_touches_its_windows(self):
+        reaction = PostReaction.objects.create(user=self.voter, post=self.post, feedback_value=-1)
+        PostReaction.objects.filter(pk=reaction.pk).update(time=timezone.now() - timedelta(days=10))
+        self._react('upvote')
+        self.assertFalse(TrendingPost.objects.filter(days=7, post=self.post).exists())
+        self.assertEqual(TrendingPost.objects.get(days=30, post=self.post).r_count, 1)
+
+    def test_refresh_expires_old_reactions(self):
+        self._react('upvote')
+        ReactionRollup.objects.update(bucket=timezone.now() - timedelta(days=10))
+        call_command('refresh_leaderboards', stdout=StringIO())
+        self.assertFalse(TrendingPost.objects.filter(days=7).exists())
+        self.assertEqual(TrendingPost.objects.get(days=30, post=self.post).r_count, 1)
+
+    def test_hidden_posts_are_not_served(self):
+        self._react('upvote')
+        Post.objects.filter(pk=self.post.pk).update(status=2)
+        self.assertEqual(get_trending_posts(7), [])
+
+
+class FamousAuthorLeaderboardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345', first_name='A', last_name='Nguyen')
+        cls.voter = CustomUser.objects.create_user(username='voter', password='12345')
+        cls.posts = [Post.objects.create(user=cls.author, title=f'Post {i}', content='content', status=1)
+                     for i in range(2)]
+
+    def setUp(self):
+        self.client.login(username='voter', password='12345')
+
+    def _react(self, post, react_type):
+        return self.client.post(f'/post/{post.pk}/react/{react_type}')
+
+    def test_liker_is_counted_once_per_author(self):
+        self._react(self.posts[0], 'upvote')
+        self._react(self.posts[1], 'upvote')
+        for days in (7, 30, 365):
+            self.assertEqual(FamousAuthor.objects.get(days=days, author=self.author).liked_people, 1)
+
+        authors = get_famous_authors(7)
+        self.assertEqual([author.pk for author in authors], [self.author.pk])
+        self.assertEqual(authors[0].liked_people, 1)
+        self.assertEqual(authors[0].full_name, 'Nguyen A')
+
+    def test_liker_is_removed_with_last_upvote(self):
+        self._react(self.posts[0], 'upvote')
+        self._react(self.posts[1], 'upvote')
+        self._react(self.posts[0], 'upvote')
+        self.assertEqual(FamousAuthor.objects.get(days=7, author=self.author).liked_people, 1)
+        self._react(self.posts[1], 'downvote')
+        self.assertEqual(FamousAuthor.objects.get(days=7, author=self.author).liked_people, 0)
+        self.assertFalse(AuthorLiker.objects.exists())
+
+    def test_earlier_like_in_window_is_not_counted_twice(self):
+        AuthorLiker.objects.create(author=self.author, liker=self.voter,
+                                   day=timezone.localdate() - timedelta(days=10))
+        self._react(self.posts[0], 'upvote')
+        self.assertEqual(FamousAuthor.objects.get(days=7, author=self.author).liked_people, 1)
+        self.assertFalse(FamousAuthor.objects.filter(days=30).exists())
+
+    def test_refresh_expires_old_likes(self):
+        self._react(self.posts[0], 'upvote')
+        PostReaction.objects.update(time=timezone.now() - timedelta(days=10))
+        call_command('refresh_leaderboards', stdout=StringIO())
+        self.assertFalse(FamousAuthor.objects.filter(days=7).exists())
+        self.assertEqual(FamousAuthor.objects.get(days=30, author=self.author).liked_people, 1)
+        self.assertEqual(AuthorLiker.objects.get().day, timezone.localdate() - timedelta(days=10))
+
+    def test_refresh_drops_likes_of_hidden_posts(self):
+        self._react(self.posts[0], 'upvote')
+        self.client.logout()
+        self.client.login(username='author', password='12345')
+        self.client.get(f'/post/{self.posts[0].pk}/delete')
+        call_command('refresh_leaderboards', stdout=StringIO())
+        self.assertFalse(AuthorLiker.objects.exists())
+        self.assertFalse(FamousAuthor.objects.exists())
+
+
+class TrendingHashTagTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.category = Category.objects.create(name='Python')
+
+    def setUp(self):
+        self.client.login(username='author', password='12345')
+
+    def _create_post(self, hashtags, **data):
+        return self.client.post('/create-post', {
+            'title': 'Post', 'content': 'content', 'categories': [self.category.pk],
+            'hashtags': hashtags, 'mode': 0, **data})
+
+    def test_published_hashtags_are_tracked(self):
+        self._create_post('django,python')
+        self._create_post('python')
+        self._create_post('draft', status=0)
+
+        hashtags = get_trending_hashtags(7)
+        self.assertEqual([(hashtag['name'], hashtag['posts']) for hashtag in hashtags], [('python', 2), ('django', 1)])
+        self.assertIsNotNone(hashtags[0]['last_post'])
+
+    def test_window_checkpoint_merges_previous_days(self):
+        today = timezone.localdate()
+        HashTagSketch.objects.create(day=today - timedelta(days=3), counters={'old': [4, 0, None]})
+        HashTagSketch.objects.create(day=today - timedelta(days=20), counters={'older': [9, 0, None]})
+        self._create_post('python')
+
+        self.assertEqual([hashtag['name'] for hashtag in get_trending_hashtags(7)], ['old', 'python'])
+        self.assertEqual([hashtag['name'] for hashtag in get_trending_hashtags(30)], ['older', 'old', 'python'])
+        self.assertTrue(HashTagSketch.objects.filter(window=7, day=today).exists())
+
+    def test_reading_does_not_checkpoint(self):
+        today = timezone.localdate()
+        HashTagSketch.objects.create(day=today - timedelta(days=3), counters={'old': [4, 0, None]})
+
+        # Checkpoint, previous days and today, no write
+        with self.assertNumQueries(3):
+            self.assertEqual([hashtag['name'] for hashtag in get_trending_hashtags(7)], ['old'])
+        self.assertFalse(HashTagSketch.objects.exclude(window=0).exists())
+        call_command('refresh_leaderboards', stdout=StringIO())
+        self.assertEqual(set(HashTagSketch.objects.exclude(window=0).values_list('window', flat=True)), {7, 30, 365})
+
+    def test_edit_only_feeds_new_hashtags(self):
+        self._create_post('python')
+        post = Post.objects.get()
+        self.client.post(f'/post/{post.pk}/edit', {
+            'title': 'Post', 'content': 'content', 'categories': [self.category.pk],
+            'hashtags': 'python,django', 'mode': 0})
+
+        self.assertEqual([(hashtag['name'], hashtag['posts']) for hashtag in get_trending_hashtags(7)],
+                         [('django', 1), ('python', 1)])
+
+    def test_verify_command(self):
+        self._create_post('python')
+        out = StringIO()
+        call_command('verify_trending_hashtags', '--repair', stdout=out)
+        self.assertIn('7 days: recall 100%', out.getvalue())
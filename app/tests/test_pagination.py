@@ -0,0 +1,95 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app.models import CustomUser, Post
+from app.pagination import CursorPaginator, ListCursorPaginator, decode_cursor, encode_cursor
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user(username='author', password='12345')
+        now = timezone.now()
+        cls.posts = []
+        for i in range(7):
+            post = Post.objects.create(user=author, title=f'Post {i}', content='content', status=1)
+            # Pairs of posts share their creation time, the id breaks the tie
+            Post.objects.filter(pk=post.pk).update(created_at=now - timezone.timedelta(minutes=i // 2))
+            cls.posts.append(post.pk)
+        cls.expected = sorted(cls.posts, key=lambda pk: (cls.posts.index(pk) // 2, -pk))
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Post.objects.filter(status=1), 3)
+
+    def _ids(self, page):
+        return [post.pk for post in page]
+
+    def test_walk_forward_and_back(self):
+        page = self.paginator.page()
+        self.assertEqual(self._ids(page), self.expected[:3])
+        self.assertFalse(page.has_previous())
+
+        page = self.paginator.page(page.next_cursor)
+        self.assertEqual(self._ids(page), self.expected[3:6])
+        self.assertTrue(page.has_previous())
+
+        page = self.paginator.page(page.next_cursor)
+        self.assertEqual(self._ids(page), self.expected[6:])
+        self.assertFalse(page.has_next())
+
+        page = self.paginator.page(page.previous_cursor)
+        self.assertEqual(self._ids(page), self.expected[3:6])
+        page = self.paginator.page(page.previous_cursor)
+        self.assertEqual(self._ids(page), self.expected[:3])
+        self.assertFalse(page.has_previous())
+
+    def test_last_page(self):
+        page = self.paginator.page(self.paginator.page().last_cursor)
+        self.assertEqual(self._ids(page), self.expected[4:])
+        self.assertFalse(page.has_next())
+        self.assertEqual(self._ids(self.paginator.page(page.previous_cursor)), self.expected[1:4])
+
+    def test_invalid_cursor_gives_first_page(self):
+        for cursor in ('2', 'not-a-cursor', encode_cursor('n', ['bad date', 1]), encode_cursor('x', [])):
+            self.assertEqual(self._ids(self.paginator.page(cursor)), self.expected[:3])
+
+    def test_malformed_cursor_gives_first_page(self):
+        for values in ([5, 3], [[1], 2], [{'a': 1}, 1], [None, 1], [timezone.now(), 'x'], [timezone.now(), None]):
+            self.assertEqual(self._ids(self.paginator.page(encode_cursor('n', values))), self.expected[:3])
+
+    def test_deep_page_seeks_without_count_or_offset(self):
+        cursor = self.paginator.page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.paginator.page(cursor)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+
+    def test_all_posts_view(self):
+        response = self.client.get('/all_posts')
+        self.assertEqual([post.pk for post in response.context['object_list']], self.expected)
+        self.assertFalse(response.context['object_list'].has_other_pages())
+        response = self.client.get('/all_posts', {'page': encode_cursor('n', self._key(self.expected[4]))})
+        self.assertEqual([post.pk for post in response.context['object_list']], self.expected[5:])
+        self.assertContains(response, 'href="?page=' + response.context['object_list'].previous_cursor + '"')
+
+    def _key(self, pk):
+        return list(Post.objects.filter(pk=pk).values_list('created_at', 'pk').get())
+
+
+class ListCursorPaginatorTest(SimpleTestCase):
+    def test_pages(self):
+        paginator = ListCursorPaginator([5, 3, 9, 1, 7], 2)
+        page = paginator.page()
+        self.assertEqual(list(page), [5, 3])
+        page = paginator.page(page.next_cursor)
+        self.assertEqual(list(page), [9, 1])
+        self.assertEqual(list(paginator.page(page.previous_cursor)), [5, 3])
+        self.assertEqual(list(paginator.page(page.last_cursor)), [1, 7])
+        self.assertEqual(list(paginator.page(encode_cursor('n', [42]))), [5, 3])
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor('p', [3])), ('p', [3]))
+        self.assertEqual(decode_cursor(None), (None, None))
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from app.models import CustomUser, Post
+from app.search.backends import get_backend
+from app.search.indexing import process_queue, rebuild_index
+from app.search.posts import rank_search
+from app.search.query import SearchQuery
+from app.search.ranking import freshness, rank_posts
+from app.tests import temporary_search_index
+
+
+class RankPostsTest(SimpleTestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_freshness_decay(self):
+        self.assertEqual(freshness(self.now, self.now), 1)
+        self.assertAlmostEqual(freshness(self.now - timedelta(days=30), self.now), 0.5)
+        self.assertEqual(freshness(self.now + timedelta(days=1), self.now), 1)
+
+    def test_relevance_first_then_freshness_and_score(self):
+        candidates = [
+            (1, self.now - timedelta(days=300), 0),
+            (2, self.now - timedelta(days=300), 0),
+            (3, self.now, 0),
+            (4, self.now - timedelta(days=300), 500),
+        ]
+        relevance = {1: 10.0, 2: 4.0, 3: 4.0, 4: 4.0}
+        self.assertEqual(rank_posts(relevance, candidates, now=self.now), [1, 3, 4, 2])
+        self.assertEqual(rank_posts(relevance, candidates, now=self.now, use_freshness=False, use_score=False)[0], 1)
+        self.assertEqual(rank_posts({}, [], now=self.now), [])
+
+
+@temporary_search_index
+class RankSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_backend().clear()
+        author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.in_content = Post.objects.create(user=author, title='Tips', content='<p>Django views</p>', status=1)
+        cls.in_title = Post.objects.create(user=author, title='Django views', content='<p>Tips</p>', status=1)
+        Post.objects.filter(pk=cls.in_title.pk).update(created_at=timezone.now() - timedelta(days=60))
+        process_queue()
+
+    def test_title_boost_beats_freshness(self):
+        self.assertEqual(rank_search(SearchQuery('django', 'Post')), [self.in_title.pk, self.in_content.pk])
+
+    def test_fields_restrict_relevance(self):
+        self.assertEqual(rank_search(SearchQuery('django', 'Post', only_by=['content'])), [self.in_content.pk])
+
+    def test_every_match_is_ranked(self):
+        author = CustomUser.objects.get(username='author')
+        Post.objects.bulk_create([Post(user=author, title=f'Django {i}', content='<p>Django</p>', plain_text='Django',
+                                       status=1) for i in range(250)])
+        rebuild_index()
+        ids = rank_search(SearchQuery('django', 'Post'))
+        self.assertEqual(len(ids), 252)
+        self.assertEqual(set(ids), set(Post.objects.values_list('pk', flat=True)))
+
+    def test_filters_apply_to_candidates(self):
+        Post.objects.filter(pk=self.in_title.pk).update(score=150)
+        self.assertEqual(rank_search(SearchQuery('django', 'Post', point='100-499')), [self.in_title.pk])
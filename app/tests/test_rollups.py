@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from app.models import CustomUser, Post, ReactionRollup
+from app.rollups import DAY, HOUR, compact_rollups, record_reaction, truncate, window_totals
+
+
+class ReactionRollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.voter = CustomUser.objects.create_user(username='voter', password='12345')
+        cls.post = Post.objects.create(user=cls.author, title='Rollup', content='content', status=1)
+
+    def test_react_view_maintains_hourly_bucket(self):
+        self.client.login(username='voter', password='12345')
+        self.client.post(f'/post/{self.post.pk}/react/upvote')
+        rollup = ReactionRollup.objects.get()
+        self.assertEqual((rollup.granularity, rollup.upvotes, rollup.downvotes), (HOUR, 1, 0))
+        self.assertEqual(rollup.author, self.author)
+
+        self.client.post(f'/post/{self.post.pk}/react/downvote')
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.upvotes, rollup.downvotes), (0, 1))
+
+        self.client.post(f'/post/{self.post.pk}/react/downvote')
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.upvotes, rollup.downvotes), (0, 0))
+
+    def test_old_reaction_goes_to_daily_bucket(self):
+        time = timezone.now() - timedelta(days=5)
+        record_reaction(self.post, time, None, 1)
+        rollup = ReactionRollup.objects.get()
+        self.assertEqual((rollup.granularity, rollup.bucket), (DAY, truncate(time, DAY)))
+
+    def test_compaction_folds_hourly_buckets(self):
+        now = timezone.now()
+        old = truncate(now - timedelta(days=4), DAY)
+        ReactionRollup.objects.create(post=self.post, author=self.author, granularity=HOUR,
+                                      bucket=old + timedelta(hours=1), upvotes=2)
+        ReactionRollup.objects.create(post=self.post, author=self.author, granularity=HOUR,
+                                      bucket=old + timedelta(hours=5), upvotes=1, downvotes=1)
+        ReactionRollup.objects.create(post=self.post, author=self.author, granularity=DAY,
+                                      bucket=old, upvotes=4)
+        recent = ReactionRollup.objects.create(post=self.post, author=self.author, granularity=HOUR,
+                                               bucket=truncate(now, HOUR), upvotes=1)
+
+        self.assertEqual(compact_rollups(now), 2)
+        daily = ReactionRollup.objects.get(granularity=DAY)
+        self.assertEqual((daily.bucket, daily.upvotes, daily.downvotes), (old, 7, 1))
+        self.assertTrue(ReactionRollup.objects.filter(pk=recent.pk).exists())
+
+    def test_window_totals(self):
+        record_reaction(self.post, timezone.now(), None, 1)
+        record_reaction(self.post, timezone.now() - timedelta(days=10), None, -1)
+        record_reaction(self.post, timezone.now() - timedelta(days=40), None, 1)
+
+        week = {row['post']: row for row in window_totals(timezone.now() - timedelta(days=7))}
+        self.assertEqual((week[self.post.pk]['total_upvotes'], week[self.post.pk]['total_downvotes']), (1, 0))
+        month = {row['author']: row for row in window_totals(timezone.now() - timedelta(days=30), 'author')}
+        self.assertEqual((month[self.author.pk]['total_upvotes'], month[self.author.pk]['total_downvotes']), (1, 1))
+
+    def test_window_starting_mid_day_counts_its_compacted_day(self):
+        now = timezone.now()
+        first_day = truncate(now - timedelta(days=4), DAY)
+        ReactionRollup.objects.create(post=self.post, author=self.author, granularity=HOUR,
+                                      bucket=first_day + timedelta(hours=15), upvotes=2)
+        ReactionRollup.objects.create(post=self.post, author=self.author, granularity=HOUR,
+                                      bucket=truncate(now, HOUR), upvotes=1)
+        compact_rollups(now)
+
+        totals = window_totals(first_day + timedelta(hours=12)).get()
+        self.assertEqual(totals['total_upvotes'], 3)
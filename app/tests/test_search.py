@@ -0,0 +1,505 @@
+import tempfile
+from unittest import mock
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app.models import Category, CustomUser, Follow, HashTag, Post, SearchIndexTask
+from app.pagination import CursorPaginator
+from app.search.authors import search_authors
+from app.search.backends import SearchBackend, SQLiteFTSBackend, get_backend
+from app.search.checks import check_fulltext_token_size
+from app.search.facets import compute_facets, search_facets
+from app.search.indexing import index_lag, process_queue
+from app.search.posts import posts_in_order, search_post_ids, search_posts
+from app.search.query import SearchQuery
+from app.search.text import VietnameseTokenizer, WordTokenizer, fold, query_terms
+from app.tests import temporary_search_index
+
+
+class SQLiteFTSBackendTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.backend = SQLiteFTSBackend(directory.name + '/index.sqlite3')
+        self.backend.index([
+            {'id': 1, 'title': 'Học Django', 'content': 'Models and views', 'hashtags': 'python'},
+            {'id': 2, 'title': 'Python tips', 'content': 'Django querysets', 'hashtags': 'django'},
+            {'id': 3, 'title': 'Rust', 'content': 'Borrow checker', 'hashtags': ''},
+        ])
+
+    def test_search_every_field(self):
+        self.assertEqual(sorted(self.backend.search('django')), [1, 2])
+        self.assertEqual(self.backend.search('borrow checker'), [3])
+        self.assertEqual(self.backend.search('query'), [2])
+        self.assertEqual(self.backend.search('học'), [1])
+        self.assertEqual(self.backend.search('"*)'), [])
+
+    def test_search_restricted_fields(self):
+        self.assertEqual(self.backend.search('django', fields=('title',)), [1])
+        self.assertEqual(self.backend.search('python', fields=('title', 'content')), [2])
+
+    def test_reindex_and_remove(self):
+        self.backend.index([{'id': 3, 'title': 'Rust and Django', 'content': '', 'hashtags': ''}])
+        self.assertEqual(sorted(self.backend.search('django')), [1, 2, 3])
+        self.assertEqual(self.backend.search('borrow'), [])
+        self.backend.remove([1, 3])
+        self.assertEqual(self.backend.search('django'), [2])
+
+    def _rebuild_batches(self):
+        yield [{'id': 1, 'title': 'Django again', 'content': '', 'hashtags': ''}]
+        # The current documents are searched during the rebuild, and changes made meanwhile are kept
+        self.assertEqual(sorted(self.backend.search('django')), [1, 2])
+        self.backend.index([{'id': 4, 'title': 'Django channels', 'content': '', 'hashtags': ''}])
+        yield [{'id': 2, 'title': 'Python tips', 'content': 'Django querysets', 'hashtags': 'django'}]
+
+    def test_rebuild_swaps_in_a_new_table(self):
+        self.assertEqual(self.backend.rebuild(self._rebuild_batches()), 2)
+        self.assertEqual(sorted(self.backend.search('django')), [1, 2, 4])
+        self.assertEqual(self.backend.search('borrow'), [])
+        self.assertEqual(sorted(self.backend.indexed_ids()), [1, 2, 4])
+
+    def test_rebuild_in_place_removes_untouched_documents(self):
+        self.assertEqual(SearchBackend.rebuild(self.backend, self._rebuild_batches()), 2)
+        self.assertEqual(sorted(self.backend.search('django')), [1, 2, 4])
+        self.assertEqual(sorted(self.backend.indexed_ids()), [1, 2, 4])
+
+
+class FullTextTokenSizeCheckTest(SimpleTestCase):
+    def _check(self, vendor, token_size):
+        mysql = mock.MagicMock(vendor=vendor)
+        mysql.cursor.return_value.__enter__.return_value.fetchone.return_value = (token_size,)
+        with mock.patch('app.search.checks.connections', {'default': mysql}):
+            return check_fulltext_token_size(None, databases=['default'])
+
+    def test_short_syllables_need_a_small_token_size(self):
+        self.assertEqual([warning.id for warning in self._check('mysql', 3)], ['app.W001'])
+        self.assertEqual(self._check('mysql', 1), [])
+        self.assertEqual(self._check('sqlite', 3), [])
+        self.assertEqual(check_fulltext_token_size(None), [])
+
+
+class VietnameseTokenizerTest(SimpleTestCase):
+    def setUp(self):
+        self.tokenizer = VietnameseTokenizer()
+
+    def test_longest_word_match(self):
+        self.assertEqual(self.tokenizer.tokens('Học máy và trí tuệ nhân tạo'), ['hoc_may', 'va', 'tri_tue_nhan_tao'])
+        self.assertEqual(self.tokenizer.tokens('Máy bay cho học sinh'), ['may_bay', 'cho', 'hoc_sinh'])
+
+    def test_bigram_fallback(self):
+        self.assertEqual(self.tokenizer.tokens('anh em đi'), ['anh_em', 'em_di', 'di'])
+        self.assertEqual(self.tokenizer.tokens('Cài đặt Django 4 trên Linux'),
+                         ['cai_dat', 'django', '4', 'tren', 'linux'])
+
+    def test_segmented_index(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backends = {
+            tokenizer: SQLiteFTSBackend(directory.name + f'/{tokenizer.__class__.__name__}.sqlite3', tokenizer)
+            for tokenizer in (WordTokenizer(), self.tokenizer)
+        }
+        for backend in backends.values():
+            backend.index([
+                {'id': 1, 'title': 'Học máy cơ bản', 'content': '', 'hashtags': ''},
+                {'id': 2, 'title': 'Máy bay cho học sinh', 'content': '', 'hashtags': ''},
+            ])
+
+        naive, segmented = backends.values()
+        self.assertEqual(sorted(naive.search('học máy')), [1, 2])
+        self.assertEqual(segmented.search('học máy'), [1])
+        self.assertEqual(sorted(segmented.search('hoc')), [1, 2])
+        self.assertEqual(segmented.statistics()['terms'], 9)
+
+    def test_following_syllables_are_indexed(self):
+        self.assertEqual(self.tokenizer.index_tokens('Học máy cơ bản'), ['hoc_may', 'may', 'co_ban', 'ban'])
+        self.assertEqual(self.tokenizer.index_tokens('anh em đi'), ['anh_em', 'em_di', 'di'])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backend = SQLiteFTSBackend(directory.name + '/index.sqlite3', self.tokenizer)
+        backend.index([
+            {'id': 1, 'title': 'Học máy cơ bản', 'content': 'Lập trình Python', 'hashtags': ''},
+            {'id': 2, 'title': 'Máy bay', 'content': '', 'hashtags': ''},
+        ])
+        self.assertEqual(backend.search('trình'), [1])
+        self.assertEqual(backend.search('bản'), [1])
+        self.assertEqual(sorted(backend.search('máy')), [1, 2])
+        self.assertEqual(backend.search('học máy'), [1])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_search_tokenizer', '--posts', 50, '--words', 20, '--queries', 10, stdout=out)
+        self.assertIn('naive: ', out.getvalue())
+        self.assertIn('vietnamese: ', out.getvalue())
+
+
+@temporary_search_index
+class SearchIndexingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_backend().clear()
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+
+    def test_published_posts_are_indexed(self):
+        post = Post.objects.create(user=self.author, title='Draft', content='<p>Hello &amp; welcome</p>', status=0)
+        process_queue()
+        self.assertEqual(get_backend().search('hello'), [])
+
+        post.status = 1
+        post.save()
+        self.assertEqual(get_backend().search('hello'), [])
+        process_queue()
+        self.assertEqual(get_backend().search('hello welcome'), [post.pk])
+        self.assertEqual(get_backend().search('amp'), [])
+
+        post.hashtags.add(HashTag.objects.create(name='greeting'))
+        process_queue()
+        self.assertEqual(get_backend().search('greeting'), [post.pk])
+
+        post.status = 2
+        post.save()
+        process_queue()
+        self.assertEqual(get_backend().search('hello'), [])
+
+    def test_deleted_posts_are_removed(self):
+        post = Post.objects.create(user=self.author, title='Hello', content='content', status=1)
+        process_queue()
+        post.delete()
+        process_queue()
+        self.assertEqual(get_backend().search('hello'), [])
+
+    def test_changes_are_coalesced_and_lag_is_measured(self):
+        self.assertEqual(index_lag(), timedelta(0))
+        post = Post.objects.create(user=self.author, title='Hello', content='content', status=1)
+        post.title = 'Hello again'
+        post.save()
+        self.assertEqual(SearchIndexTask.objects.count(), 1)
+
+        SearchIndexTask.objects.update(queued_at=timezone.now() - timedelta(minutes=5))
+        self.assertGreaterEqual(index_lag(), timedelta(minutes=5))
+
+        out = StringIO()
+        call_command('process_search_queue', stdout=out)
+        self.assertIn('Indexed 1 posts', out.getvalue())
+        self.assertEqual(index_lag(), timedelta(0))
+        self.assertEqual(get_backend().search('again'), [post.pk])
+
+    def test_change_during_processing_stays_queued(self):
+        post = Post.objects.create(user=self.author, title='Hello', content='content', status=1)
+        SearchIndexTask.objects.update(updated_at=timezone.now() - timedelta(seconds=1))
+        task = SearchIndexTask.objects.get()
+
+        original_filter = SearchIndexTask.objects.filter
+
+        def save_again(*args, **kwargs):
+            # Simulate a save of the post while the worker indexes its batch
+            if kwargs.get('updated_at') == task.updated_at:
+                Post.objects.get(pk=post.pk).save()
+            return original_filter(*args, **kwargs)
+
+        with mock.patch.object(SearchIndexTask.objects, 'filter', side_effect=save_again):
+            process_queue()
+        self.assertTrue(SearchIndexTask.objects.filter(post_id=post.pk).exists())
+
+    def test_rebuild_command(self):
+        posts = [Post.objects.create(user=self.author, title=f'Hello {i}', content='content', status=1)
+                 for i in range(3)]
+        Post.objects.create(user=self.author, title='Hello draft', content='content', status=0)
+        get_backend().clear()
+
+        out = StringIO()
+        call_command('rebuild_search_index', '--chunk-size', '2', stdout=out)
+        self.assertIn('Indexed 3 posts', out.getvalue())
+        self.assertEqual(sorted(get_backend().search('hello')), [post.pk for post in posts])
+        self.assertFalse(SearchIndexTask.objects.exists())
+
+
+@temporary_search_index
+class SearchPostsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_backend().clear()
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.category = Category.objects.create(name='Python')
+        cls.hashtag = HashTag.objects.create(name='django')
+        cls.posts = {}
+        for score in (5, 150, 700, 1500):
+            post = Post.objects.create(user=cls.author, title=f'Django {score}', content='content', status=1)
+            Post.objects.filter(pk=post.pk).update(score=score)
+            post.hashtags.add(cls.hashtag)
+            cls.posts[score] = post
+        cls.posts[150].categories.add(cls.category)
+        Post.objects.create(user=cls.author, title='Django draft', content='content', status=0)
+        process_queue()
+
+    def _scores(self, queryset):
+        return [post.score for post in queryset]
+
+    def _bucket(self, score):
+        return {5: '<100', 150: '100-499', 700: '500-999', 1500: '>1000'}[score]
+
+    def test_sorted_by_score(self):
+        self.assertEqual(self._scores(search_posts('django')), [1500, 700, 150, 5])
+
+    def test_point_ranges(self):
+        self.assertEqual(self._scores(search_posts('django', point='<100')), [5])
+        self.assertEqual(self._scores(search_posts('django', point='100-499')), [150])
+        self.assertEqual(self._scores(search_posts('django', point='500-999')), [700])
+        self.assertEqual(self._scores(search_posts('django', point='>1000')), [1500])
+        self.assertEqual(len(search_posts('django', point='----')), 4)
+
+    def test_filters(self):
+        self.assertEqual(self._scores(search_posts('django', categories=[self.category.pk])), [150])
+        self.assertEqual(self._scores(search_posts('1500', only_by=['title'])), [1500])
+        self.assertEqual(self._scores(search_posts('1500', only_by=['hashtag'])), [])
+
+    def test_filters_apply_beyond_the_first_matches(self):
+        with mock.patch('app.search.posts.MAX_RESULTS', 2):
+            first = self._scores(search_posts('django', only_by=['title']))
+            self.assertEqual(len(first), 2)
+            # The posts left out of the first matches are found by a filter keeping only them
+            for score in {5, 150, 700, 1500} - set(first):
+                self.assertEqual(self._scores(search_posts('django', only_by=['title'], point=self._bucket(score))),
+                                 [score])
+
+    def test_filtered_text_matches_read_at_most_max_pages(self):
+        backend = get_backend()
+        with mock.patch('app.search.posts.MAX_RESULTS', 1), mock.patch('app.search.posts.MAX_PAGES', 2), \
+                mock.patch.object(backend, 'search_scored', wraps=backend.search_scored) as search_scored:
+            self.assertEqual(self._scores(search_posts('django', only_by=['title'], to_date='2000-01-01')), [])
+        self.assertEqual(search_scored.call_count, 2)
+
+    def test_hashtag_matches_capped(self):
+        with mock.patch('app.search.posts.MAX_RESULTS', 2):
+            self.assertEqual(self._scores(search_posts('django', only_by=['hashtag'])), [1500, 700])
+            self.assertEqual(self._scores(search_posts('django', only_by=['hashtag'], point='<100')), [5])
+
+    def test_only_requested_page_is_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            posts = list(search_posts('django')[:2])
+        self.assertEqual(self._scores(posts), [1500, 700])
+        self.assertTrue(any('LIMIT 2' in query['sql'] for query in queries))
+
+    def test_search_view(self):
+        response = self.client.get('/search', {'search_keyword': 'django', 'choices_single_default': 'Post',
+                                                'point': '100-499'})
+        self.assertEqual(list(response.context['object_list']), [self.posts[150]])
+
+
+@temporary_search_index
+class SearchFacetsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_backend().clear()
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.python = Category.objects.create(name='Python')
+        cls.web = Category.objects.create(name='Web')
+        cls.posts = []
+        for score, created_at, categories in ((5, '2024-01-10', [cls.python, cls.web]), (150, '2024-01-20', [cls.python]),
+                                              (700, '2024-03-05', [cls.web]), (1500, '2024-03-06', [])):
+            post = Post.objects.create(user=cls.author, title=f'Django {score}', content='content', status=1)
+            Post.objects.filter(pk=post.pk).update(score=score, created_at=f'{created_at}T12:00:00Z')
+            post.categories.add(*categories)
+            cls.posts.append(post)
+        Post.objects.create(user=cls.author, title='Rust', content='content', status=1)
+        process_queue()
+
+    def setUp(self):
+        caches['search'].clear()
+
+    def test_counts_in_one_query(self):
+        query = SearchQuery('django', 'Post')
+        search_post_ids(query)
+        # The ranked ids are cached by the search itself
+        with self.assertNumQueries(1):
+            facets = compute_facets(query)
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(facets['categories'], {self.python.pk: 2, self.web.pk: 2})
+        self.assertEqual(facets['months'], [(date(2024, 1, 1), 2), (date(2024, 3, 1), 2)])
+        self.assertEqual(facets['points'], {'<100': 1, '100-499': 1, '500-999': 1, '>1000': 1})
+
+    def test_counts_follow_filters(self):
+        facets = search_facets(SearchQuery('django', 'Post', categories=[self.python.pk], point='<100'))
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual(facets['categories'], {self.python.pk: 1, self.web.pk: 1})
+        with self.assertNumQueries(0):
+            search_facets(SearchQuery('django', 'Post', categories=[self.python.pk], point='<100'))
+
+    def test_counts_cover_the_ranked_results(self):
+        query = SearchQuery('django', 'Post')
+        with mock.patch('app.search.facets.search_post_ids', return_value=[self.posts[0].pk, self.posts[3].pk]):
+            facets = compute_facets(query)
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['categories'], {self.python.pk: 1, self.web.pk: 1})
+        self.assertEqual(facets['points'], {'<100': 1, '>1000': 1})
+
+    def test_category_intersection(self):
+        categories = [self.python.pk, self.web.pk]
+        self.assertEqual(list(search_posts('django', categories=categories)), [self.posts[0]])
+        self.assertEqual(list(search_posts('django', categories=categories + [self.web.pk])), [self.posts[0]])
+        with CaptureQueriesContext(connection) as queries:
+            list(search_posts('django', categories=categories))
+        self.assertEqual(queries[0]['sql'].count('app_post_categories'), 1)
+
+    def test_search_view(self):
+        response = self.client.get('/search', {'search_keyword': 'django', 'choices_single_default': 'Post'})
+        self.assertContains(response, 'Python (2)')
+        self.assertContains(response, '100 ~ 499 (1)')
+        month_query = SearchQuery('django', 'Post', from_date=date(2024, 3, 1), to_date=date(2024, 3, 31)).urlencode()
+        self.assertEqual(response.context['date_histogram'][1], (date(2024, 3, 1), 2, month_query))
+
+
+class SearchQueryTest(SimpleTestCase):
+    def test_normalization(self):
+        query = SearchQuery.from_querydict(QueryDict(
+            'search_keyword=+django++tips&choices_single_default=Post&only_by[]=title&only_by[]=bad'
+            '&only_by[]=content&list_category=3&list_category=1&from_date=01/31/2024&point=<100'))
+        self.assertEqual(query.keyword, 'django tips')
+        self.assertEqual(query.only_by, ('content', 'title'))
+        self.assertEqual(query.categories, (1, 3))
+        self.assertEqual(str(query.from_date), '2024-01-31')
+        self.assertEqual(query.point, '<100')
+
+        same = SearchQuery.from_querydict(QueryDict(query.urlencode()))
+        self.assertEqual(same, query)
+        self.assertEqual(same.cache_key, query.cache_key)
+
+    def test_legacy_pagination_links(self):
+        query = SearchQuery.from_querydict(QueryDict(
+            "search_keyword=django&choices_single_default=Post&list_category=['1', '2']"
+            "&from_date=False&to_date=False&point=False"))
+        self.assertEqual(query.categories, (1, 2))
+        self.assertEqual((query.from_date, query.to_date, query.point), (None, None, None))
+        self.assertNotIn('False', query.urlencode())
+
+    def test_incomplete_query(self):
+        self.assertFalse(SearchQuery.from_querydict(QueryDict('search_keyword=django')))
+        self.assertFalse(SearchQuery.from_querydict(QueryDict('search_keyword=+&choices_single_default=Post')))
+
+
+@temporary_search_index
+class SearchCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_backend().clear()
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.posts = [Post.objects.create(user=cls.author, title=f'Django {i}', content='content', status=1)
+                     for i in range(3)]
+        process_queue()
+
+    def setUp(self):
+        caches['search'].clear()
+        self.query = SearchQuery(keyword='django', search_type='Post')
+
+    def test_page_flip_is_one_fetch(self):
+        ids = search_post_ids(self.query)
+        self.assertEqual(sorted(ids), sorted(post.pk for post in self.posts))
+        with self.assertNumQueries(0):
+            self.assertEqual(search_post_ids(self.query), ids)
+        with self.assertNumQueries(2):
+            self.assertEqual([post.pk for post in posts_in_order(ids[1:])], ids[1:])
+
+    def test_invalidated_when_posts_change(self):
+        search_post_ids(self.query)
+        post = Post.objects.create(user=self.author, title='Django new', content='content', status=1)
+        process_queue()
+        self.assertIn(post.pk, search_post_ids(self.query))
+
+        Post.objects.filter(pk=post.pk).update(status=2)
+        self.assertNotIn(post.pk, [post.pk for post in posts_in_order(search_post_ids(self.query))])
+
+    def test_pagination_links_are_canonical(self):
+        for i in range(10):
+            Post.objects.create(user=self.author, title=f'Django more {i}', content='content', status=1)
+        process_queue()
+        response = self.client.get('/search', {'search_keyword': 'django', 'choices_single_default': 'Post',
+                                                'list_category': '', 'point': 'False'})
+        page = response.context['object_list']
+        self.assertEqual(len(page), 9)
+        self.assertContains(response, f'href="?page={page.next_cursor}&search_keyword=django&amp;choices_single_default=Post"')
+
+        response = self.client.get('/search?page=' + page.next_cursor + '&' + response.context['query_string'])
+        self.assertEqual(len(response.context['object_list']), 4)
+
+
+@temporary_search_index
+class AuthorSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = CustomUser.objects.create_user(username='viewer', password='12345')
+        cls.nguyen = CustomUser.objects.create_user(username='nvan', password='12345', first_name='Van A',
+                                                    last_name='Nguyen', achievement=3)
+        cls.tran = CustomUser.objects.create_user(username='tranb', password='12345', first_name='Van B',
+                                                  last_name='Tran', achievement=5)
+        Follow.objects.create(follower=cls.viewer, followed=cls.tran)
+        CustomUser.objects.filter(pk=cls.tran.pk).update(post_count=1, follower_count=1)
+
+    def _usernames(self, keyword):
+        return [author.username for author in search_authors(keyword).order_by('-achievement', '-pk')]
+
+    def test_name_parts(self):
+        self.assertEqual(self._usernames('van'), ['tranb', 'nvan'])
+        self.assertEqual(self._usernames('guy'), ['nvan'])
+        self.assertEqual(self._usernames('Van nguyen'), ['nvan'])
+        self.assertEqual(self._usernames('tranb'), ['tranb'])
+        self.assertEqual(self._usernames('le'), [])
+        self.assertEqual(self._usernames('  '), [])
+
+    def test_rename_updates_tokens(self):
+        self.nguyen.last_name = 'Le'
+        self.nguyen.save()
+        self.assertEqual(self._usernames('nguyen'), [])
+        self.assertEqual(self._usernames('le'), ['nvan'])
+
+    def test_other_saves_do_not_reindex(self):
+        user = CustomUser.objects.get(pk=self.nguyen.pk)
+        user.achievement = 4
+        with self.assertNumQueries(1):
+            user.save()
+        user = CustomUser.objects.get(pk=self.nguyen.pk)
+        user.first_name = 'Thi'
+        user.save(update_fields=['first_name'])
+        self.assertEqual(self._usernames('thi'), ['nvan'])
+
+    def test_page_with_stats_is_one_query(self):
+        paginator = CursorPaginator(search_authors('van', self.viewer), 9, ('-achievement', '-pk'))
+        with self.assertNumQueries(1):
+            authors = list(paginator.page())
+            stats = [(author.username, author.post_count, author.follower_count, author.is_following)
+                     for author in authors]
+        self.assertEqual(stats, [('tranb', 1, 1, True), ('nvan', 0, 0, False)])
+
+    def test_search_view(self):
+        response = self.client.get('/search', {'search_keyword': 'nguyen', 'choices_single_default': 'Author'})
+        self.assertEqual([author.username for author in response.context['object_list']], ['nvan'])
+
+
+@temporary_search_index
+class AccentFoldingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_backend().clear()
+        cls.author = CustomUser.objects.create_user(username='duc', password='12345', first_name='Văn Đức',
+                                                    last_name='Nguyễn')
+        cls.post = Post.objects.create(user=cls.author, title='Lập trình Python',
+                                       content='<p>Học ở Đà Nẵng</p>', status=1)
+        process_queue()
+
+    def test_fold(self):
+        self.assertEqual(fold('Lập trình Đà Nẵng ĐẠI HỌC'), 'lap trinh da nang dai hoc')
+        self.assertEqual(query_terms('Tiếng Việt, có dấu!'), ['tieng', 'viet', 'co', 'dau'])
+
+    def test_posts_match_with_or_without_diacritics(self):
+        for keyword in ('lap trinh', 'lập trình', 'LẬP', 'da nang', 'Đà Nẵng'):
+            self.assertEqual(search_post_ids(SearchQuery(keyword, 'Post')), [self.post.pk], keyword)
+
+    def test_authors_match_with_or_without_diacritics(self):
+        for keyword in ('nguyen', 'Nguyễn', 'duc', 'Đức', 'van duc'):
+            self.assertEqual(list(search_authors(keyword)), [self.author], keyword)
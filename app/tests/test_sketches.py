@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from app.sketches import BloomFilter, HyperLogLog, RotatingBloomFilter, SpaceSaving
+
+
+class SpaceSavingTest(SimpleTestCase):
+    def test_exact_below_capacity(self):
+        summary = SpaceSaving(capacity=3)
+        for item in ['a', 'b', 'a', 'c', 'a', 'b']:
+            summary.offer(item)
+        self.assertEqual([(item, count) for item, count, time in summary.top(3)], [('a', 3), ('b', 2), ('c', 1)])
+
+    def test_heavy_hitters_survive_eviction(self):
+        summary = SpaceSaving(capacity=5)
+        for i in range(200):
+            summary.offer('hot')
+            summary.offer(f'cold{i}')
+        item, count, time = summary.top(1)[0]
+        self.assertEqual(item, 'hot')
+        self.assertGreaterEqual(count, 200)
+        self.assertEqual(len(summary.counters), 5)
+
+    def test_ties_broken_by_recency_then_name(self):
+        now = timezone.now()
+        summary = SpaceSaving()
+        summary.offer('b', time=now - timedelta(days=1))
+        summary.offer('c', time=now)
+        summary.offer('a', time=now - timedelta(days=1))
+        self.assertEqual([item for item, count, time in summary.top(3)], ['c', 'a', 'b'])
+        self.assertEqual(summary.top(1)[0][2], now)
+
+    def test_merge_and_round_trip(self):
+        first = SpaceSaving(capacity=2)
+        first.offer('a', 2)
+        second = SpaceSaving.from_dict({'a': [1, 0, None], 'b': [5, 0, None], 'c': [1, 0, None]}, capacity=2)
+        first.merge(second)
+        self.assertEqual([(item, count) for item, count, time in first.top(5)], [('b', 5), ('a', 3)])
+        self.assertEqual(SpaceSaving.from_dict(first.to_dict()).counters, first.counters)
+
+
+class HyperLogLogTest(SimpleTestCase):
+    def test_estimates(self):
+        for count in (0, 10, 1000, 20000):
+            sketch = HyperLogLog()
+            for i in range(count):
+                sketch.add(f'user:{i}')
+                sketch.add(f'user:{i}')
+            self.assertAlmostEqual(sketch.count(), count, delta=count * 0.05)
+
+    def test_merge_is_union(self):
+        first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            (first if i % 2 else second).add(i)
+            union.add(i)
+        self.assertEqual(first.merge(second).to_bytes(), union.to_bytes())
+        self.assertEqual(HyperLogLog(registers=union.to_bytes()).count(), union.count())
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter()
+        for i in range(200):
+            bloom.add(i)
+        self.assertTrue(all(i in bloom for i in range(200)))
+        self.assertLess(sum(f'other{i}' in bloom for i in range(10000)), 300)
+
+    def test_rotation_keeps_size_constant(self):
+        seen = RotatingBloomFilter(capacity=10)
+        self.assertTrue(seen.add(1))
+        self.assertFalse(seen.add(1))
+        size = len(str(seen.to_dict()))
+        for i in range(2, 25):
+            seen.add(i)
+            seen = RotatingBloomFilter.from_dict(seen.to_dict(), capacity=10)
+        self.assertEqual(len(str(seen.to_dict())), size)
+        # The previous generation is still looked up, older items are forgotten
+        self.assertIn(15, seen)
+        self.assertNotIn(1, seen)
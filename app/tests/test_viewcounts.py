@@ -0,0 +1,131 @@
+import json
+import threading
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app import viewcounts
+from app.models import CustomUser, Post, PostViewerSketch
+
+
+class ViewCountBufferTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(username='author', password='12345')
+        cls.posts = [Post.objects.create(user=cls.author, title=f'Post {i}', content='content', status=1)
+                     for i in range(3)]
+
+    def setUp(self):
+        viewcounts.reset()
+
+    def _view_counts(self):
+        return [post.view_count for post in Post.objects.order_by('pk')]
+
+    def test_views_are_buffered_and_flushed_in_batches(self):
+        updated_at = Post.objects.get(pk=self.posts[0].pk).updated_at
+        with self.assertNumQueries(0):
+            for post in (self.posts[0], self.posts[0], self.posts[1], self.posts[2], self.posts[2]):
+                viewcounts.record_view(post.pk)
+        self.assertEqual(viewcounts.buffered_views(self.posts[0].pk), 2)
+        self.assertEqual(viewcounts.pending_views()[0], 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(viewcounts.flush(), 5)
+        # Posts viewed twice share one statement
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 2)
+        self.assertEqual(self._view_counts(), [2, 1, 2])
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).updated_at, updated_at)
+        self.assertEqual(viewcounts.pending_views(), (0, 0))
+        self.assertEqual(viewcounts.flush(), 0)
+
+    def test_flush_when_full_or_old(self):
+        with mock.patch.object(viewcounts, 'MAX_PENDING', 3):
+            viewcounts.record_view(self.posts[0].pk)
+            viewcounts.record_view(self.posts[0].pk)
+            self.assertEqual(self._view_counts(), [0, 0, 0])
+            viewcounts.record_view(self.posts[1].pk)
+            self.assertEqual(self._view_counts(), [2, 1, 0])
+
+        with mock.patch.object(viewcounts, 'FLUSH_INTERVAL', 0):
+            viewcounts.record_view(self.posts[2].pk)
+        self.assertEqual(self._view_counts(), [2, 1, 1])
+
+    def test_failed_flush_keeps_views(self):
+        viewcounts.record_view(self.posts[0].pk)
+        with mock.patch.object(Post.objects, 'filter', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                viewcounts.flush()
+        self.assertEqual(viewcounts.pending_views()[0], 1)
+        viewcounts.flush()
+        self.assertEqual(self._view_counts(), [1, 0, 0])
+
+    def test_stale_instance_does_not_overwrite_flushed_views(self):
+        stale = Post.objects.get(pk=self.posts[0].pk)
+        viewcounts.record_view(self.posts[0].pk)
+        viewcounts.flush()
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self._view_counts(), [1, 0, 0])
+
+    def test_failed_write_does_not_fail_the_view(self):
+        with mock.patch.object(viewcounts, 'FLUSH_INTERVAL', 0), \
+                mock.patch.object(Post.objects, 'filter', side_effect=DatabaseError):
+            with self.assertLogs('app.viewcounts', 'ERROR'):
+                viewcounts.record_view(self.posts[0].pk)
+        self.assertEqual(viewcounts.pending_views()[0], 1)
+
+    def test_idle_process_is_flushed_by_a_timer(self):
+        flushed = threading.Event()
+        with mock.patch.object(viewcounts, 'IDLE_FLUSH', True), \
+                mock.patch.object(viewcounts, 'FLUSH_INTERVAL', 0.01), \
+                mock.patch.object(viewcounts, 'flush', side_effect=flushed.set):
+            viewcounts.record_view(self.posts[0].pk)
+            self.assertTrue(flushed.wait(5))
+
+    def test_failed_flush_schedules_a_timer(self):
+        with mock.patch.object(viewcounts, 'IDLE_FLUSH', True), \
+                mock.patch.object(viewcounts, 'FLUSH_INTERVAL', 60):
+            viewcounts.record_view(self.posts[0].pk)
+            # A flush in the request path took the views before the timer fired
+            viewcounts._timer.cancel()
+            viewcounts._timer = None
+            with mock.patch.object(Post.objects, 'filter', side_effect=DatabaseError):
+                with self.assertRaises(DatabaseError):
+                    viewcounts.flush()
+            self.assertIsNotNone(viewcounts._timer)
+        viewcounts.reset()
+
+    def test_post_detail_counts_first_view_of_session(self):
+        for _ in range(2):
+            response = self.client.get(f'/post/{self.posts[0].pk}')
+            self.assertEqual(response.context['view_count'], 1)
+        viewcounts.flush()
+        self.assertEqual(self._view_counts(), [1, 0, 0])
+
+    def test_unique_viewers(self):
+        CustomUser.objects.create_user(username='viewer', password='12345')
+        for _ in range(2):
+            self.client.logout()
+            self.client.login(username='viewer', password='12345')
+            self.client.get(f'/post/{self.posts[0].pk}')
+        for _ in range(3):
+            self.client_class().get(f'/post/{self.posts[0].pk}')
+        viewcounts.flush()
+
+        self.assertEqual(self._view_counts(), [5, 0, 0])
+        self.assertEqual(PostViewerSketch.objects.get(post=self.posts[0]).unique_viewers, 4)
+        self.assertEqual(self.client.get(f'/post/{self.posts[0].pk}').context['unique_viewers'], 4)
+
+    def test_session_size_does_not_grow(self):
+        session = self.client.session
+        session['viewed_post_1'] = True
+        session.save()
+        sizes = set()
+        for post in self.posts:
+            self.client.get(f'/post/{post.pk}')
+            session = self.client.session
+            self.assertEqual(set(session.keys()), {viewcounts.SEEN_SESSION_KEY, 'viewer_id'})
+            sizes.add(len(json.dumps(dict(session.items()))))
+        self.assertEqual(len(sizes), 1)
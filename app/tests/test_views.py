@@ -1,6 +1,14 @@
+from django.db import connection
 from django.test import TestCase
-from app.models import Post, CustomUser as User
+from django.test.utils import CaptureQueriesContext
+from app import viewcounts
+from app.comments import COMMENTS_PER_PAGE
+from app.models import Bookmark, Category, Comment, Follow, HashTag, Post, PostReaction, CustomUser as User
+from app.search.backends import get_backend
+from app.search.indexing import process_queue
+from app.tests import temporary_search_index
 
+@temporary_search_index
 class AppTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -42,3 +50,101 @@ class AppTestCase(TestCase):
             self.assertEqual(response.status_code, 200)
             self.assertContains(response, "error")
     
+
+
+@temporary_search_index
+class PostListingQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_backend().clear()
+        cls.author = User.objects.create_user(username='author', password='12345')
+        cls.voter = User.objects.create_user(username='voter', password='12345')
+        cls.hashtag = HashTag.objects.create(name='python')
+
+    def _create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(user=self.author, title=f'Python {i}', content='content', status=1)
+            post.hashtags.add(self.hashtag)
+            PostReaction.objects.create(user=self.voter, post=post, feedback_value=1)
+            Bookmark.objects.create(user=self.voter, post=post)
+        process_queue()
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.client.login(username='voter', password='12345')
+        urls = ['/search?search_keyword=Python&choices_single_default=Post', '/all_posts',
+                '/account/author', '/account/voter', '/account/voter/voted_up']
+
+        self._create_posts(1)
+        counts = [self._count_queries(url) for url in urls]
+        self._create_posts(8)
+        self.assertEqual([self._count_queries(url) for url in urls], counts)
+
+
+@temporary_search_index
+class PostDetailQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', password='12345')
+        cls.viewer = User.objects.create_user(username='viewer', password='12345')
+        cls.post = Post.objects.create(user=cls.author, title='Python', content='content', status=1)
+        cls.post.categories.add(Category.objects.create(name='Python'))
+        cls.post.hashtags.add(HashTag.objects.create(name='django'))
+        Bookmark.objects.create(user=cls.viewer, post=cls.post)
+        Follow.objects.create(follower=cls.viewer, followed=cls.author)
+        PostReaction.objects.create(user=cls.viewer, post=cls.post, feedback_value=-1)
+
+    def setUp(self):
+        # A flush of views buffered by other tests would add queries
+        viewcounts.reset()
+
+    def _add_comments(self, count):
+        for i in range(count):
+            user = User.objects.create_user(username=f'commenter{Comment.objects.count()}', password='12345')
+            comment = Comment.objects.create(user=user, post=self.post, content=f'comment {i}', reply_count=1)
+            Comment.objects.create(user=self.viewer, post=self.post, parent=comment, content=f'reply {i}')
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/post/{self.post.pk}')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_depend_on_comments(self):
+        for logged_in in (False, True):
+            if logged_in:
+                self.client.login(username='viewer', password='12345')
+            # The first view of the session also counts the view
+            self._get()
+            self._add_comments(1)
+            response, count = self._get()
+            self._add_comments(10)
+            response, more_comments_count = self._get()
+            self.assertEqual(more_comments_count, count)
+            # Post with the viewer state, categories, hashtags and comments, plus the session and context processors
+            self.assertEqual(count, 8 if logged_in else 5)
+            roots = Comment.objects.filter(post=self.post, parent__isnull=True).count()
+            self.assertEqual(len(response.context['comments']), min(roots, COMMENTS_PER_PAGE))
+
+    def test_viewer_state(self):
+        self.client.login(username='viewer', password='12345')
+        self._add_comments(2)
+        response, count = self._get()
+        context = response.context
+        self.assertEqual((context['is_bookmarked'], context['is_following'], context['is_paid']), (True, True, False))
+        self.assertEqual(context['reacted_value'], -1)
+        self.assertFalse(context['is_owner'])
+        # Only the root comments are rendered, with the number of their replies
+        self.assertEqual([comment.content for comment in context['comments']], ['comment 1', 'comment 0'])
+        self.assertEqual(context['comments'][0].reply_count, 1)
+        self.assertNotContains(response, 'reply 1')
+
+        self.client.logout()
+        context = self._get()[0].context
+        self.assertEqual((context['is_bookmarked'], context['is_following'], context['reacted_value']),
+                         (False, False, None))
@@ -3,4 +3,7 @@ from . import views_api
 
 urlpatterns = [
     path('upload_avatar', views_api.upload_avatar, name='upload_avatar'),
+    path('autocomplete', views_api.autocomplete_view, name='autocomplete'),
+    path('posts/<int:primary_key>/comments', views_api.post_comments_view, name='post_comments'),
+    path('comments/<int:primary_key>/replies', views_api.comment_replies_view, name='comment_replies'),
 ]
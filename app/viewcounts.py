@@ -0,0 +1,221 @@
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+
+from .models import Post, PostViewerSketch
+from .sketches import HyperLogLog, RotatingBloomFilter
+
+# Seconds after which the buffered views are written on the next view, bounding the views a crash can lose
+FLUSH_INTERVAL = 10
+
+# Number of buffered views written at once whatever their age, bounding the buffer of a busy process
+MAX_PENDING = 500
+
+# Whether a timer writes the buffered views FLUSH_INTERVAL after the first one, for a process that gets no other view
+IDLE_FLUSH = True
+
+# Number of posts updated by one statement
+BATCH_SIZE = 500
+
+# Session key of the filter of the posts viewed in the session, and number of posts it remembers at least
+SEEN_SESSION_KEY = 'viewed_posts'
+SEEN_CAPACITY = 200
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = Counter()
+_viewers = defaultdict(dict)
+_total = 0
+_oldest = None
+_timer = None
+
+
+def viewer_key(request):
+    """
+    Return the identity of a viewer for the unique viewer counts: the user, or a random id kept in the session
+    """
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if 'viewer_id' not in request.session:
+        request.session['viewer_id'] = uuid.uuid4().hex
+    return 'anonymous:' + request.session['viewer_id']
+
+
+def count_view(request, post_id):
+    """
+    Count a view of a post unless it was already viewed in the session. Return True when the view is counted.
+    The viewed posts are remembered in a fixed size rotating Bloom filter, so the session does not grow
+    with every post read; a rare false positive skips a view.
+    """
+    if SEEN_SESSION_KEY not in request.session:
+        # One key per viewed post was kept by older versions
+        for key in [key for key in request.session.keys() if key.startswith('viewed_post_')]:
+            del request.session[key]
+    seen = RotatingBloomFilter.from_dict(request.session.get(SEEN_SESSION_KEY), SEEN_CAPACITY)
+    if not seen.add(post_id):
+        return False
+    request.session[SEEN_SESSION_KEY] = seen.to_dict()
+    record_view(post_id, viewer_key(request))
+    return True
+
+
+def record_view(post_id, viewer=None):
+    """
+    Count a view of a post in the buffer of the process, with the viewer for the unique viewer sketch of the post.
+    The buffer is written when it is full or old enough, or by a timer when no other view comes.
+    A failed write is logged and the views stay buffered, the view itself never fails.
+    """
+    global _total, _oldest
+    with _lock:
+        _pending[post_id] += 1
+        if viewer is not None:
+            index, rank = HyperLogLog.position(viewer)
+            registers = _viewers[post_id]
+            registers[index] = max(rank, registers.get(index, 0))
+        _total += 1
+        if _oldest is None:
+            _oldest = time.monotonic()
+            _schedule_flush()
+        due = _total >= MAX_PENDING or time.monotonic() - _oldest >= FLUSH_INTERVAL
+    if due:
+        _flush_logged()
+
+
+def _flush_logged():
+    try:
+        flush()
+    except DatabaseError:
+        logger.exception('Could not write the buffered post views, they are kept for the next flush')
+
+
+def _schedule_flush():
+    # Called with the lock held, one timer at most is waiting
+    global _timer
+    if IDLE_FLUSH and _timer is None:
+        _timer = threading.Timer(FLUSH_INTERVAL, _flush_idle)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _flush_idle():
+    global _timer
+    with _lock:
+        _timer = None
+    try:
+        # Views kept by a failed write get the next timer
+        _flush_logged()
+    finally:
+        # The connections of the timer thread are not closed by the request cycle
+        connections.close_all()
+
+
+def buffered_views(post_id):
+    """
+    Return the views of a post that are not written to its view_count column yet
+    """
+    return _pending.get(post_id, 0)
+
+
+def pending_views():
+    """
+    Return the number of buffered views and the age in seconds of the oldest one, the views a crash would lose
+    """
+    with _lock:
+        return _total, time.monotonic() - _oldest if _oldest is not None else 0
+
+
+def flush():
+    """
+    Add the buffered views to the view_count columns. Posts are grouped by number of views,
+    so one UPDATE ... SET view_count = view_count + N covers every post viewed N times.
+    The row is not saved: updated_at and the other columns are left as they are.
+    The viewers are merged into the sketches of the posts in the same transaction.
+    Return the number of views written.
+    """
+    global _pending, _viewers, _total, _oldest
+    with _lock:
+        pending, viewers, total, oldest = _pending, _viewers, _total, _oldest
+        _pending, _viewers, _total, _oldest = Counter(), defaultdict(dict), 0, None
+    if not pending:
+        return 0
+
+    by_views = defaultdict(list)
+    for post_id, views in pending.items():
+        by_views[views].append(post_id)
+    try:
+        with transaction.atomic():
+            for views, post_ids in by_views.items():
+                for start in range(0, len(post_ids), BATCH_SIZE):
+                    Post.objects.filter(pk__in=post_ids[start:start + BATCH_SIZE]).update(
+                        view_count=F('view_count') + views)
+            if viewers:
+                _write_viewers(viewers)
+    except Exception:
+        # Nothing was written, the views are kept for the next flush
+        with _lock:
+            _pending.update(pending)
+            for post_id, registers in viewers.items():
+                for index, rank in registers.items():
+                    _viewers[post_id][index] = max(rank, _viewers[post_id].get(index, 0))
+            _total += total
+            _oldest = min(oldest, _oldest) if _oldest is not None else oldest
+            # The kept views are written by the timer when no other view comes
+            _schedule_flush()
+        raise
+    return total
+
+
+def _write_viewers(viewers):
+    """
+    Merge the buffered registers of each post into its stored sketch and refresh its unique viewer estimate
+    """
+    sketches = PostViewerSketch.objects.select_for_update().in_bulk(list(viewers))
+    new = []
+    for post_id, registers in viewers.items():
+        sketch = sketches.get(post_id)
+        if sketch is None:
+            sketch = PostViewerSketch(post_id=post_id)
+            new.append(sketch)
+        sketch_registers = HyperLogLog(registers=sketch.registers)
+        for index, rank in registers.items():
+            sketch_registers.update(index, rank)
+        sketch.registers = sketch_registers.to_bytes()
+        sketch.unique_viewers = sketch_registers.count()
+
+    if new:
+        # Posts deleted since their views were buffered are skipped
+        existing = set(Post.objects.filter(pk__in=[sketch.post_id for sketch in new]).values_list('pk', flat=True))
+        # A sketch created meanwhile by another process keeps its registers, the ones of this flush are lost
+        PostViewerSketch.objects.bulk_create([sketch for sketch in new if sketch.post_id in existing],
+                                             ignore_conflicts=True)
+    PostViewerSketch.objects.bulk_update(list(sketches.values()), ['registers', 'unique_viewers'],
+                                         batch_size=BATCH_SIZE)
+
+
+def reset():
+    """
+    Drop the buffered views without writing them
+    """
+    global _pending, _viewers, _total, _oldest, _timer
+    with _lock:
+        _pending, _viewers, _total, _oldest = Counter(), defaultdict(dict), 0, None
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -1,7 +1,7 @@
 import json
+from datetime import timedelta
 
 from django.db import transaction, IntegrityError
-from django.db.models import Sum
 from django.http import HttpResponseBadRequest, HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
@@ -10,47 +10,33 @@ from django.views.generic import CreateView
 from django.utils.translation import gettext_lazy as _
 from django.contrib import messages
 
+from .comments import comment_page, root_comments
+from .counters import (update_bookmark_count, update_comment_count, update_follow_counts, update_post_count,
+                       update_reaction_counters, update_reply_count)
 from .forms import PostForm, FilterForm
+from .leaderboards import (get_famous_authors, get_trending_hashtags, get_trending_posts, record_author_like,
+                           record_hashtags, record_post_reaction)
+from .pagination import CursorPaginator, ListCursorPaginator
+from .post_detail import get_post_detail, is_visible, prefetch_post_detail
+from .rollups import record_reaction
+from .search.authors import search_authors
+from .search.facets import search_facets
+from .search.posts import posts_in_order, search_post_ids
+from .search.query import SearchQuery
+from .viewcounts import buffered_views, count_view
 from .models import Post, HashTag, CustomUser, Follow, PostReaction, Bookmark, Comment, Category, PostPaid, Notification
 
-from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
-from datetime import datetime
 from django.contrib.auth.decorators import login_required
 
 
 def __get_trending_post_by_time(time, limit=5):
-    return Post.objects.raw(
-        "select p.*, count(distinct r.id) as r_count, "
-        "group_concat(distinct c.name separator ', ') as list_categories "
-        'from app_post p '
-        'join app_postreaction r on p.id = r.post_id '
-        'join app_post_categories pc on p.id = pc.post_id '
-        'join app_category c on c.id = pc.category_id '
-        'where r.feedback_value = 1 '
-        '  and p.status = 1'
-        '  and r.time > (now() - interval %s day) '
-        'group by p.id '
-        'order by r_count desc '
-        'limit %s', [time, limit])
+    return get_trending_posts(time, limit)
 
 
 def __get_famous_author_by_time(time, limit=5):
-    list_author = CustomUser.objects.raw(
-        'select c.username, c.id, c.achievement, '
-        '       concat(c.last_name, \' \', c.first_name) as full_name, '
-        '       c.avatar_link, '
-        '       count(distinct r.user_id)              as liked_people '
-        'from app_post p '
-        '         join app_postreaction r on p.id = r.post_id '
-        '         join app_customuser c on c.id = p.user_id '
-        'where r.feedback_value = 1 '
-        '  and p.status = 1 '
-        '  and r.time > (now() - interval %s day) '
-        'group by c.username '
-        'order by liked_people desc '
-        'limit %s', [time, limit])
+    list_author = get_famous_authors(time, limit)
 
     for author in list_author:
         author.achievement_rank, author.achievement_color = __get_color_rank(int(author.achievement))
@@ -94,7 +80,7 @@ def __get_famous_author(limit=5):
 
 
 def home(request):
-    new_posts = Post.objects.filter(status=1).order_by('-created_at')[:10]
+    new_posts = Post.objects.with_engagement().filter(status=1).order_by('-created_at')[:10]
     return render(request, 'home.html', {
         'all_top_posts': __get_trending(),
         'all_top_authors': __get_famous_author(),
@@ -110,7 +96,11 @@ class PostCreate(CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        update_post_count(self.object.user, None, self.object.status)
+        if self.object.status == 1:
+            record_hashtags(self.object.hashtags.all())
+        return response
 
     @transaction.atomic
     def get_form_kwargs(self):
@@ -149,122 +139,43 @@ def get_paginated_object_list(paginator, page):
 
 
 def homepageSearch(request):
-    # object_list = Post.objects.all()
-    params = request.GET
-    search_keyword = params.get('search_keyword', False)
-    search_type = params.get('choices_single_default', False)
-    only_by = params.getlist('only_by[]', False)
-
-    # Get value from search filter (if exist)
-    search_category_list = params.getlist('list_category', False)
-    from_date = params.get('from_date', False)
-    to_date = params.get('to_date', False)
-    point = params.get('point', False)
-
-    # Process "False" str from pagination link
-    if type(search_category_list) == list:
-        if "False" in search_category_list:
-            search_category_list = False
-    if from_date == "False":
-        from_date = False
-    if to_date == "False":
-        to_date = False
-    if point == "False":
-        point = False
-
-    if not search_keyword or not search_type:
+    # Keyword, type and filters in canonical form, whatever link or form they come from
+    query = SearchQuery.from_querydict(request.GET)
+
+    if not query:
         return render(request, 'search.html', {})
 
-    if search_type == "Post":
-        l_query = {
-            'title': Q(title__icontains=search_keyword),
-            'content': Q(content__icontains=search_keyword),
-            'hashtag': Q(hashtags__name=search_keyword),
-        }
-        query = Q()
-        if only_by:
-            for field in only_by:
-                query |= l_query[field]
-        else:
-            query = l_query['title'] | l_query['content'] | l_query['hashtag']
-        # Filter by date
-        if from_date:
-            from_date_query = datetime.strptime(from_date, '%m/%d/%Y').strftime('%Y-%m-%d')
-            query &= Q(created_at__gte=from_date_query)
-        if to_date:
-            to_date_query = datetime.strptime(to_date, '%m/%d/%Y').strftime('%Y-%m-%d')
-            query &= Q(created_at__lte=to_date_query)
-
-        object_list = Post.objects.filter(query, status=1).distinct()
-
-        # Filter by category
-        if search_category_list:
-            # If search_category_list is from pagination link
-            # If [ character is in search_category_list[0], it means that search_category_list is from pagination link
-            if "[" in search_category_list[0]:
-                search_category_list = eval(search_category_list[0])
-            for category in search_category_list:
-                object_list = object_list.filter(categories__pk=category)
-
-        for post in object_list:
-            reactions = PostReaction.objects.filter(post=post)
-            post.feedback_value = sum([reaction.feedback_value for reaction in reactions])
-            # count bookmark
-            post.bookmark_count = Bookmark.objects.filter(post=post).count()
-            # count comment
-            post.comment_count = Comment.objects.filter(post=post).count()
-
-        # Filter by point (feedback_value)
-        if point:
-            if point == '----':
-                pass
-            elif point == '<100':
-                object_list = [post for post in object_list if post.feedback_value < 100]
-            elif point == '100-499':
-                object_list = [post for post in object_list if 100 <= post.feedback_value <= 499]
-            elif point == '500-999':
-                object_list = [post for post in object_list if 500 <= post.feedback_value <= 999]
-            elif point == '>1000':
-                object_list = [post for post in object_list if post.feedback_value > 1000]
-
-        # Short by feedback_value
-        object_list = sorted(object_list, key=lambda x: x.feedback_value, reverse=True)
-
-    elif search_type == "Author":
-        object_list = CustomUser.objects.filter(
-            Q(last_name__icontains=search_keyword) |
-            Q(first_name__icontains=search_keyword)
-        ).order_by('-achievement')
-
-        for user in object_list:
-            user.post_count = Post.objects.filter(user=user).count()
-            user.follower_count = Follow.objects.filter(followed=user).count()
-
-    paginator = Paginator(object_list, 9)
-    page = request.GET.get('page')
+    cursor = request.GET.get('page')
+    facets = None
+    date_histogram = []
+    if query.search_type == "Post":
+        # Ordered ids of the whole search are cached, a page is one fetch of its posts
+        object_list_paginated = ListCursorPaginator(search_post_ids(query), 9).page(cursor)
+        object_list_paginated.object_list = posts_in_order(object_list_paginated.object_list)
+        # Counts of the filter choices, each month links to the search narrowed to it
+        facets = search_facets(query)
+        for month, count in facets['months']:
+            month_end = (month + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            date_histogram.append((month, count, query.replace(from_date=month, to_date=month_end).urlencode()))
+    else:
+        # Name tokens are looked up on an index, the counts are columns of the user
+        object_list = search_authors(query.keyword, request.user)
+        object_list_paginated = CursorPaginator(object_list, 9, ('-achievement', '-pk')).page(cursor)
 
     # Render filter form if exist
-    if search_category_list or from_date or to_date or point:
-        filter_form = FilterForm(initial={
-            'list_category': search_category_list,
-            'from_date': from_date,
-            'to_date': to_date,
-            'point': point,
-        })
+    if query.has_filters:
+        filter_form = FilterForm(initial=query.filter_initial(), facets=facets)
     else:
-        filter_form = FilterForm()
-
-    object_list_paginated = get_paginated_object_list(paginator, page)
+        filter_form = FilterForm(facets=facets)
 
     context = {
         'object_list': object_list_paginated,
-        'choices_single_default': search_type,
-        'search_keyword': search_keyword,
+        'choices_single_default': query.search_type,
+        'search_keyword': query.keyword,
+        'only_by': query.only_by,
         'filter_form': filter_form,
-        'list_category': search_category_list,
-        'from_date': from_date,
-        'to_date': to_date,
-        'point': point,
+        'date_histogram': date_histogram,
+        'query_string': query.urlencode(),
     }
 
     return render(request, 'search.html', context)
@@ -289,17 +200,9 @@ def __get_color_rank(achievement):
     return achievement_rank, achievement_color
 
 
-def __substring_content_safe(content):
-    temp = content[:min(1000, int(len(content) * 0.1))]
-    last_open_ab = temp.rfind('<')
-    last_close_ab = temp.rfind('>')
-    if last_open_ab > last_close_ab:
-        temp = content[:last_close_ab + 1 + content.find('>', last_open_ab)]
-    return temp + '...'
-
-
 def post_detail_view(request, primary_key):
-    post = get_object_or_404(Post, pk=primary_key)
+    # The post, its author and the state of the viewer come in one query
+    post = get_post_detail(primary_key, request.user)
     notice_type = (
         (0, _('Draft')),
         (1, None),
@@ -308,44 +211,25 @@ def post_detail_view(request, primary_key):
         (4, _('Pending')),
         (5, _('Rejected')),
     )
-    if post.status != 1 and not request.user.is_superuser:
-        if post.status in [2, 3, 5] or (post.status in [0, 4] and post.user != request.user):
-            return render(request, '404.html', {'message': get_message_404(post.status)})
-    feedback_value = PostReaction.objects.filter(post=post).aggregate(Sum('feedback_value'))['feedback_value__sum']
-    if feedback_value is None:
-        feedback_value = 0
+    if not is_visible(post, request.user):
+        return render(request, '404.html', {'message': get_message_404(post.status)})
+    feedback_value = post.score
 
     achievement_rank, achievement_color = __get_color_rank(int(post.user.achievement))
 
-    if request.session.get('viewed_post_' + str(post.pk)) is None:
-        request.session['viewed_post_' + str(post.pk)] = True
-        post.view_count = post.view_count + 1
-        post.save()
-    view_count = post.view_count
-
-    is_bookmarked = False
-    is_following = False
-    is_owner = False
-    reacted_value = None
-    is_paid = False
-    if request.user.is_authenticated:
-        is_bookmarked = Bookmark.objects.filter(user=request.user, post=post).exists()
-        is_following = Follow.objects.filter(follower=request.user, followed=post.user).exists()
-        is_owner = request.user == post.user
-        reacted = PostReaction.objects.filter(user=request.user, post=post).first()
-        is_paid = PostPaid.objects.filter(user=request.user, post=post).exists()
-        if reacted is not None:
-            reacted_value = reacted.feedback_value
-
-    # limit content length 10% of total characters(max 1000 characters)
-    if post.mode == 1 and not is_owner and not request.user.is_staff and not is_paid:
-        post.content = __substring_content_safe(post.content)
-    # Load comments
-    comments = Comment.objects.filter(post=post).order_by('-updated_at')
-    comments_tree = {comment for comment in comments if comment.parent.pk == -1}
-
-    for comment in comments_tree:
-        comment.child = {child for child in comments if child.parent.pk == comment.pk}
+    # Buffered and added to the column in batches, without saving the post
+    count_view(request, post.pk)
+    view_count = post.view_count + buffered_views(post.pk)
+
+    is_owner = request.user.is_authenticated and request.user.pk == post.user_id
+
+    # limit content to the excerpt computed on save: 10% of the text (max 1000 characters)
+    if post.mode == 1 and not is_owner and not request.user.is_staff and not post.is_paid:
+        post.content = post.excerpt
+    # Load categories and hashtags, then the first page of root comments with their authors,
+    # the replies and the next pages are loaded by the comments API
+    prefetch_post_detail(post)
+    comments = comment_page(root_comments(post))
 
     return render(request, 'post_detail.html', context={
         'post': post,
@@ -353,17 +237,18 @@ def post_detail_view(request, primary_key):
         'achievement_rank': achievement_rank,
         'achievement_color': achievement_color,
         'view_count': view_count.as_integer_ratio()[0],
-        'followers_count': Follow.objects.filter(followed=post.user).count(),
+        'unique_viewers': post.unique_viewers,
+        'followers_count': post.user.follower_count,
         'feedback_value': feedback_value,
         'categories': post.categories.all(),
         'hashtags': post.hashtags.all(),
-        'is_bookmarked': is_bookmarked,
-        'is_following': is_following,
+        'is_bookmarked': post.is_bookmarked,
+        'is_following': post.is_following,
         'is_owner': is_owner,
-        'comments_tree': comments_tree,
-        'reacted_value': reacted_value,
+        'comments': comments,
+        'reacted_value': post.reacted_value,
         'notice': notice_type[post.status][1],
-        'is_paid': is_paid,
+        'is_paid': post.is_paid,
     })
 
 
@@ -372,6 +257,7 @@ def edit_post_view(request, primary_key):
     try:
         with transaction.atomic():
             post = get_object_or_404(Post, pk=primary_key, user=request.user)
+            old_status = post.status
             if request.method == 'POST':
                 data = request.POST.copy()
                 if data.get('status') is None:
@@ -387,13 +273,14 @@ def edit_post_view(request, primary_key):
                 request.POST = data
                 form = PostForm(request.POST, instance=post)
                 if form.is_valid():
+                    old_hashtags = set(post.hashtags.values_list('pk', flat=True))
+                    # Also sets the categories and hashtags, adding and removing only the changed ones
                     form.save()
-                    post.categories.clear()
-                    post.hashtags.clear()
-                    for category in form.cleaned_data['categories']:
-                        post.categories.add(category)
-                    for hashtag in form.cleaned_data['hashtags']:
-                        post.hashtags.add(hashtag)
+                    update_post_count(post.user, old_status, post.status)
+                    if post.status == 1:
+                        # Only feed the hashtags this edit publishes
+                        record_hashtags([hashtag for hashtag in form.cleaned_data['hashtags']
+                                         if old_status != 1 or hashtag.pk not in old_hashtags])
                     return redirect('post_detail', primary_key=post.pk)
             else:
                 form = PostForm(instance=post)
@@ -409,8 +296,10 @@ def edit_post_view(request, primary_key):
         return HttpResponseBadRequest()
 
 
+@transaction.atomic
 def delete_post_view(request, primary_key):
     post = get_object_or_404(Post, pk=primary_key, user=request.user)
+    update_post_count(post.user, post.status, 2)
     post.status = 2
     post.save()
     return redirect('home')
@@ -429,9 +318,13 @@ def comment(request):
 
         post = get_object_or_404(Post, pk=post_id)
 
-        parent = get_object_or_404(Comment, pk=parent_id)
+        # Root comments have no parent, -1 is the parent sent by the root comment form
+        parent = None if parent_id == '-1' else get_object_or_404(Comment, pk=parent_id, post=post)
 
         comment = Comment.objects.create(user=request.user, post=post, parent=parent, content=content, is_edited=False)
+        update_comment_count(post)
+        if parent is not None:
+            update_reply_count(parent)
 
         if request.user.username != post.user.username:
             if parent_id == '-1':
@@ -442,12 +335,11 @@ def comment(request):
                     content=post.id
                 )
             else:
-                # search user who comment parent comment
-                parent_comment = Comment.objects.get(pk=parent_id)
-                if parent_comment is not None and parent_comment.user != request.user:
+                # notify the user who wrote the parent comment
+                if parent.user_id != request.user.pk:
                     notification = Notification.objects.create(
                         action_user=request.user,
-                        receive_user=parent_comment.user,
+                        receive_user=parent.user,
                         type_notify=2,
                         content=post.id
                     )
@@ -456,6 +348,7 @@ def comment(request):
 
 
 @csrf_exempt
+@transaction.atomic
 def react_post_view(request, primary_key, react_type):
     if request.method == 'POST' and request.user.is_authenticated and react_type in ['upvote', 'downvote']:
         value = ({
@@ -464,26 +357,28 @@ def react_post_view(request, primary_key, react_type):
         })
         feedback_value = value.get(react_type)
         post = get_object_or_404(Post, pk=primary_key)
-        reaction = PostReaction.objects.filter(post=post, user=request.user)
-        if reaction.exists():
-            if reaction.first().feedback_value == feedback_value:
+        reaction = PostReaction.objects.filter(post=post, user=request.user).first()
+        if reaction is not None:
+            old_value = reaction.feedback_value
+            if old_value == feedback_value:
                 reaction.delete()
                 message = 'deleted'
+                _record_reaction(post, request.user, reaction.time, old_value, None)
 
                 # delete notification if user remove react type
                 _delete_notify(request.user, post.user, post.id)
             else:
-                reaction = reaction.first()
                 reaction.feedback_value = feedback_value
                 message = react_type
                 reaction.save()
+                _record_reaction(post, request.user, reaction.time, old_value, feedback_value)
 
                 # delete notification if user change react type to downvote
                 _delete_notify(request.user, post.user, post.id)
         else:
             reaction = PostReaction.objects.create(post=post, user=request.user, feedback_value=feedback_value)
             message = react_type
-            reaction.save()
+            _record_reaction(post, request.user, reaction.time, None, feedback_value)
 
             # create notification
             if react_type == 'upvote':
@@ -494,10 +389,7 @@ def react_post_view(request, primary_key, react_type):
                         type_notify=0,
                         content=post.id
                     )
-        total_feedback_value = PostReaction.objects.filter(post=post).aggregate(Sum('feedback_value'))[
-            'feedback_value__sum']
-        if total_feedback_value is None:
-            total_feedback_value = 0
+        total_feedback_value = Post.objects.values_list('score', flat=True).get(pk=post.pk)
         return HttpResponse(json.dumps({
             'message': message,
             'total_feedback_value': total_feedback_value,
@@ -508,6 +400,12 @@ def react_post_view(request, primary_key, react_type):
                 'message': 'Bad Request',
             }), content_type='application/json')
 
+def _record_reaction(post, user, reaction_time, old_value, new_value):
+    update_reaction_counters(post, old_value, new_value)
+    record_reaction(post, reaction_time, old_value, new_value)
+    record_post_reaction(post, reaction_time, old_value, new_value)
+    record_author_like(post, user, reaction_time, old_value, new_value)
+
 def _delete_notify(action_user, receive_user, post_id, type_notify=0):
     notifications = Notification.objects.filter(action_user=action_user, receive_user=receive_user, content=post_id, type_notify=type_notify)
     if notifications.exists():
@@ -519,12 +417,12 @@ def bookmark_post_view(request, primary_key):
         post = get_object_or_404(Post, pk=primary_key)
         bookmark = Bookmark.objects.filter(post=post, user=request.user)
         if bookmark.exists():
-            bookmark.delete()
+            update_bookmark_count(post, -bookmark.delete()[0])
             message = 'deleted'
         else:
-            bookmark = Bookmark.objects.create(post=post, user=request.user)
+            Bookmark.objects.create(post=post, user=request.user)
+            update_bookmark_count(post)
             message = 'bookmarked'
-            bookmark.save()
         return HttpResponse(json.dumps({
             'message': message,
         }), content_type='application/json')
@@ -581,22 +479,24 @@ def pay_post_view(request, primary_key):
 
 
 @csrf_exempt
+@transaction.atomic
 def follow_user_view(request, primary_key):
     if request.method == 'POST' and request.user.is_authenticated:
         user = get_object_or_404(CustomUser, pk=primary_key)
         follow = Follow.objects.filter(follower=request.user, followed=user)
         if follow.exists():
-            follow.delete()
+            update_follow_counts(request.user, user, -follow.delete()[0])
             return HttpResponse(json.dumps({
                 'type': 'unfollowed',
-                'followers_count': Follow.objects.filter(followed=user).count(),
+                'followers_count': CustomUser.objects.values_list('follower_count', flat=True).get(pk=user.pk),
                 'message': 'Bỏ theo dõi thành công'
             }), content_type='application/json')
         else:
             Follow.objects.create(follower=request.user, followed=user)
+            update_follow_counts(request.user, user)
             return HttpResponse(json.dumps({
                 'type': 'followed',
-                'followers_count': Follow.objects.filter(followed=user).count(),
+                'followers_count': CustomUser.objects.values_list('follower_count', flat=True).get(pk=user.pk),
                 'message': 'Theo dõi thành công'
             }), content_type='application/json')
     else:
@@ -624,9 +524,9 @@ def read_all_notify_view(request):
 
 
 def all_posts_view(request):
-    all_posts = Post.objects.filter(status=1)
+    all_posts = Post.objects.with_engagement().filter(status=1)
     return render(request, 'all_post.html', {
-        'object_list': Paginator(all_posts, 10).get_page(request.GET.get('page')),
+        'object_list': CursorPaginator(all_posts, 10).page(request.GET.get('page')),
     })
 
 
@@ -654,20 +554,7 @@ def all_authors_view(request):
 
 
 def __get_trending_hash_tag_by_time(time, limit=10):
-    return HashTag.objects.raw(
-        'select ht.*, '
-        '       count(distinct p.id) as posts, '
-        '       max(p.created_at) as last_post '
-        'from app_hashtag ht '
-        '       join app_post_hashtags ph on ht.id = ph.hashtag_id '
-        '       join app_post p on ph.post_id = p.id '
-        'where p.status = 1 '
-        '  and p.created_at > (now() - interval %s day) '
-        'group by ht.id '
-        'order by posts desc, unix_timestamp(last_post) desc, ht.name '
-        'limit %s ',
-        [time, limit]
-    )
+    return get_trending_hashtags(time, limit)
 
 def __get_trending_hash_tag(limit=10):
     return [
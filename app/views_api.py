@@ -1,8 +1,16 @@
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.decorators import login_required
 import os
 
+from . import autocomplete
+from .comments import REPLIES_PER_PAGE, comment_page, replies, root_comments, serialize_comment
+from .models import Comment, Post
+from .post_detail import is_visible
+
 @login_required(login_url='/account/signin/')
 def upload_avatar(request):
   data = {
@@ -44,3 +52,58 @@ def upload_avatar(request):
     })
 
   return JsonResponse(data, safe=True)
+
+
+def autocomplete_view(request):
+  """
+  Suggest hashtags, authors (usernames) and categories starting with the typed prefix, most used first.
+  Answered from in-process indexes, no database query per keystroke.
+  """
+  prefix = request.GET.get('q', '').strip()
+  kinds = [kind for kind in request.GET.getlist('type') if kind in autocomplete.KINDS] or autocomplete.KINDS
+  try:
+    limit = min(max(int(request.GET.get('limit', 10)), 1), 20)
+  except ValueError:
+    limit = 10
+
+  if not prefix:
+    return JsonResponse({kind: [] for kind in kinds})
+
+  suggestions = autocomplete.complete(prefix, kinds, limit)
+  return JsonResponse({
+    kind: [{'name': name, 'count': count} for name, count in suggestions[kind]]
+    for kind in kinds
+  })
+
+
+def _comment_page_response(request, post, page):
+  # Rendered without the context processors of full pages, the fragment only needs the user and the CSRF token
+  context = {'comments': page, 'post': post, 'user': request.user, 'csrf_token': get_token(request)}
+  return JsonResponse({
+    'comments': [serialize_comment(comment) for comment in page],
+    'html': render_to_string('comment_list.html', context),
+    'next_cursor': page.next_cursor,
+  })
+
+
+def post_comments_view(request, primary_key):
+  """
+  Page of the root comments of a post, newest first, from the cursor of the previous page.
+  The replies are not included: each comment has its reply count and its replies are loaded on demand.
+  """
+  post = get_object_or_404(Post.objects.only('pk', 'status', 'user_id'), pk=primary_key)
+  if not is_visible(post, request.user):
+    raise Http404
+  return _comment_page_response(request, post, comment_page(root_comments(post), request.GET.get('cursor')))
+
+
+def comment_replies_view(request, primary_key):
+  """
+  Page of the direct replies of a comment, newest first, from the cursor of the previous page
+  """
+  comment = get_object_or_404(Comment.objects.select_related('post').only('pk', 'post__status', 'post__user_id'),
+                              pk=primary_key)
+  if not is_visible(comment.post, request.user):
+    raise Http404
+  page = comment_page(replies(comment), request.GET.get('cursor'), REPLIES_PER_PAGE)
+  return _comment_page_response(request, comment.post, page)
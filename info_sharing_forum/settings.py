@@ -163,3 +163,23 @@ CKEDITOR_UPLOAD_PATH = "ckeditor_media"
 
 IMGUR_CLIENT_ID = os.getenv("IMGUR_CLIENT_ID")
 IMGUR_CLIENT_SECRET = os.getenv("IMGUR_CLIENT_SECRET")
+
+# Ordered result ids of post searches, evicted after TIMEOUT seconds or least recently used first.
+# Use a shared backend (e.g. memcached) when several processes serve the site so invalidations reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'search',
+        'TIMEOUT': 60,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+# Full-text index of posts, MySQL FULLTEXT on MySQL and a SQLite FTS5 sidecar file otherwise
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND")
+SEARCH_INDEX_PATH = BASE_DIR / 'search_index.sqlite3'
+# Tokenizer of the post index, Vietnamese word segmentation by default
+SEARCH_TOKENIZER = os.getenv("SEARCH_TOKENIZER")
@@ -76,3 +76,28 @@ const pay = async (id) => {
         });
     }
 }
+
+const loadComments = async (button) => {
+    let url = new URL(button.dataset.url, window.location.origin)
+    if (button.dataset.cursor) {
+        url.searchParams.set('cursor', button.dataset.cursor)
+    }
+    button.disabled = true
+    let res = await fetch(url)
+    button.disabled = false
+    if (res.status !== 200) {
+        errorNotification({
+            title: button.dataset.errorTitle,
+            message: button.dataset.error,
+        });
+        return
+    }
+    let data = await res.json()
+    $(button.dataset.target).append(data.html)
+    if (data.next_cursor) {
+        button.dataset.cursor = data.next_cursor
+        $(button).text(button.dataset.more)
+    } else {
+        $(button).remove()
+    }
+}